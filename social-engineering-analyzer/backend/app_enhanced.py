@@ -3,17 +3,24 @@ Enhanced FastAPI application for Lurantis
 Includes comprehensive threat detection with Qdrant
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+import asyncio
 import os
 from dotenv import load_dotenv
 
 from services.enhanced_qdrant_service import EnhancedQdrantService
 from services.enhanced_analyzer import EnhancedAnalyzerService
 from services.credit_manager import CreditManager
-from services.onchain_analyzer import OnChainAnalyzer
+from services.inference_pool import InferencePoolSaturated
+from services.startup import StartupState
+from services.stream_scan import StreamScanner
 
 # Load environment variables
 load_dotenv()
@@ -34,10 +41,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
+# Initialize services (cheap: the model and Qdrant collections are set up lazily / by warm-up)
+startup_state = StartupState()
 qdrant_service = EnhancedQdrantService()
 analyzer_service = EnhancedAnalyzerService(qdrant_service)
 credit_manager = CreditManager()
+startup_state.record("app_init", time.perf_counter() - _import_started)
+warm_up_task = None
 
 # Initialize on-chain analyzer (lazy initialization to prevent startup errors)
 gnosis_rpc = os.getenv("GNOSIS_RPC_URL", "https://rpc.gnosischain.com")
@@ -48,12 +58,43 @@ def get_onchain_analyzer():
     global onchain_analyzer
     if onchain_analyzer is None:
         try:
+            # Imported lazily: pulls in web3
+            from services.onchain_analyzer import OnChainAnalyzer
             onchain_analyzer = OnChainAnalyzer(qdrant_service, gnosis_rpc)
         except Exception as e:
             print(f"Warning: Failed to initialize OnChainAnalyzer: {e}")
             raise HTTPException(status_code=500, detail=f"On-chain analyzer initialization failed: {str(e)}")
     return onchain_analyzer
 
+async def _warm_up():
+    """Load the model, prepare collections and run dummy encodes/searches in the background"""
+    try:
+        await qdrant_service.warm_up(startup_state)
+        startup_state.mark_ready()
+        print(f"Warm-up complete: {startup_state.phases}")
+    except Exception as e:
+        startup_state.mark_failed(str(e))
+        print(f"Warning: Warm-up failed: {e}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Start warm-up without blocking the server from binding its port"""
+    global warm_up_task
+    qdrant_service.stats_refresher.start()
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes"):
+        warm_up_task = asyncio.create_task(_warm_up())
+    else:
+        # Everything initializes lazily on the first request instead
+        startup_state.mark_ready()
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    """Stop background encoder and inference workers, close Qdrant connections"""
+    if qdrant_service.batch_encoder:
+        qdrant_service.batch_encoder.stop()
+    qdrant_service.inference_pool.shutdown(wait=False)
+    await qdrant_service.close()
+
 # Request/Response models
 class AnalysisRequest(BaseModel):
     content: str
@@ -82,6 +123,31 @@ class EnhancedAnalysisResult(BaseModel):
     wallet_stalking_analysis: Optional[Dict] = None
     detailed_analysis: Dict
 
+class BatchAnalysisItem(BaseModel):
+    content: str
+    known_addresses: Optional[List[str]] = None
+    context: Optional[Dict] = None
+
+class BatchAnalysisRequest(BaseModel):
+    items: List[BatchAnalysisItem]
+    user_address: Optional[str] = None
+
+class BatchAnalysisResult(BaseModel):
+    results: List[EnhancedAnalysisResult]
+    credits_used: int
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints that are still reading the request body
+    
+    The stock response listens for client disconnects by calling receive(),
+    which would swallow upload chunks meant for request.stream(). Here a
+    disconnect surfaces through request.stream() (ClientDisconnect) or send().
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
 class CreditBalance(BaseModel):
     address: str
     balance: int
@@ -104,16 +170,75 @@ async def root():
         ]
     }
 
+@app.get("/live")
+async def live():
+    """Liveness probe: the process is serving requests (touches no downstream services)"""
+    return {"status": "alive"}
+
 @app.get("/health")
 async def health():
-    """Detailed health check"""
-    qdrant_status = await qdrant_service.check_health()
-    stats = await qdrant_service.get_collection_stats()
+    """Detailed health check (served from the background-refreshed stats snapshot)"""
+    snapshot = await qdrant_service.stats_refresher.snapshot()
+    qdrant_status = snapshot["qdrant_connected"]
     
     return {
-        "status": "healthy" if qdrant_status else "degraded",
+        "status": "healthy" if qdrant_status and not snapshot["stale"] else "degraded",
         "qdrant": "connected" if qdrant_status else "disconnected",
-        "collections": stats
+        "collections": snapshot["collections"],
+        "stats_refreshed_at": snapshot["refreshed_at"],
+        "stats_age_seconds": snapshot["age_seconds"]
+    }
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the model is loaded and warm, 503 before"""
+    status = startup_state.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for sizing caches and pools"""
+    return {
+        "embedding_backend": qdrant_service.encoder_info(),
+        "embedding_cache": qdrant_service.embedding_cache.stats(),
+        "inference_pool": qdrant_service.inference_pool.stats(),
+        "encoder": (
+            qdrant_service.batch_encoder.stats()
+            if qdrant_service.batch_encoder
+            else {"enabled": False}
+        ),
+        "search_cache": (
+            qdrant_service.result_cache.stats()
+            if qdrant_service.result_cache
+            else {"enabled": False}
+        ),
+        "collection_stats": qdrant_service.stats_refresher.stats(),
+        "keywords": qdrant_service.keywords.stats(),
+        "search_latency": {
+            "deadline_seconds": qdrant_service.search_deadline,
+            "hedging": qdrant_service.search_hedging,
+            **qdrant_service.search_latency.stats()
+        },
+        "local_index": (
+            qdrant_service.local_index.stats()
+            if qdrant_service.local_index
+            else {"enabled": False}
+        ),
+        "payload_store": (
+            qdrant_service.payload_store.stats()
+            if qdrant_service.payload_store is not None
+            else {"enabled": False}
+        ),
+        "long_document": (
+            qdrant_service.chunker.stats()
+            if qdrant_service.chunker
+            else {"enabled": False}
+        ),
+        "near_duplicates": (
+            qdrant_service.near_duplicates.stats()
+            if qdrant_service.near_duplicates
+            else {"enabled": False}
+        )
     }
 
 @app.post("/analyze", response_model=AnalysisResult)
@@ -151,6 +276,8 @@ async def analyze_content(request: AnalysisRequest):
     
     except HTTPException:
         raise
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -194,9 +321,96 @@ async def analyze_enhanced(request: EnhancedAnalysisRequest):
     
     except HTTPException:
         raise
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Largest batch accepted by /analyze-enhanced/batch
+ANALYZE_BATCH_MAX_ITEMS = int(os.getenv("ANALYZE_BATCH_MAX_ITEMS", "500"))
+
+@app.post("/analyze-enhanced/batch", response_model=BatchAnalysisResult)
+async def analyze_enhanced_batch(request: BatchAnalysisRequest):
+    """
+    Enhanced analysis of many messages in one call (e.g. mail gateways)
+    
+    All messages are embedded together and searched with one batched request
+    per collection. Credits are checked and deducted once for the whole batch
+    (one credit per message).
+    """
+    if len(request.items) > ANALYZE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {ANALYZE_BATCH_MAX_ITEMS})"
+        )
+    
+    try:
+        credits_needed = len(request.items)
+        
+        # Check credits if address provided
+        if request.user_address and credits_needed:
+            balance, _ = await credit_manager.get_balance(request.user_address)
+            if balance < credits_needed:
+                raise HTTPException(
+                    status_code=402,
+                    detail=f"Insufficient credits: batch needs {credits_needed}, balance is {balance}."
+                )
+        
+        results = await analyzer_service.analyze_batch([
+            {
+                "content": item.content,
+                "user_address": request.user_address,
+                "known_addresses": item.known_addresses,
+                "context": item.context
+            }
+            for item in request.items
+        ])
+        
+        # Deduct credits if address provided
+        if request.user_address and credits_needed:
+            await credit_manager.deduct_credits(
+                request.user_address,
+                amount=credits_needed
+            )
+        
+        return BatchAnalysisResult(
+            results=[EnhancedAnalysisResult(**result) for result in results],
+            credits_used=credits_needed if request.user_address else 0
+        )
+    
+    except HTTPException:
+        raise
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze-enhanced/stream")
+async def analyze_enhanced_stream(request: Request, user_address: Optional[str] = None):
+    """
+    Scan an NDJSON export (one {"content": ..., "id": ...} object per line)
+    
+    The upload is read incrementally and results stream back as NDJSON, one
+    line per message as soon as it is analyzed, followed by a summary line.
+    Credits are deducted per micro-batch; when they run out mid-batch the
+    paid messages are still analyzed and the scan stops.
+    """
+    if user_address and not await credit_manager.check_credits(user_address):
+        raise HTTPException(
+            status_code=402,
+            detail="Insufficient credits. Please subscribe to continue."
+        )
+    
+    async def charge(count: int) -> int:
+        balance, _ = await credit_manager.get_balance(user_address)
+        paid = int(min(balance, count))
+        if paid > 0:
+            await credit_manager.deduct_credits(user_address, amount=paid)
+        return max(paid, 0)
+    
+    scanner = StreamScanner.from_env(analyzer_service, charge=charge if user_address else None)
+    return UploadStreamingResponse(scanner.scan(request.stream()), media_type="application/x-ndjson")
+
 @app.get("/credits/{address}", response_model=CreditBalance)
 async def get_credits(address: str):
     """Get credit balance for a wallet address"""
@@ -209,15 +423,18 @@ async def get_credits(address: str):
 
 @app.get("/patterns")
 async def get_patterns():
-    """Get statistics about attack patterns in database"""
-    stats = await qdrant_service.get_collection_stats()
+    """Get statistics about attack patterns in database (from the stats snapshot)"""
+    snapshot = await qdrant_service.stats_refresher.snapshot()
+    stats = snapshot["collections"]
     return {
         "collections": stats,
         "total_patterns": sum(
             stat.get("vectors_count", 0) 
             for stat in stats.values() 
             if "error" not in stat
-        )
+        ),
+        "stats_refreshed_at": snapshot["refreshed_at"],
+        "stats_age_seconds": snapshot["age_seconds"]
     }
 
 @app.post("/detect-address-spoofing")
@@ -234,6 +451,8 @@ async def detect_address_spoofing(
             known_addresses
         )
         return result
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -284,6 +503,8 @@ async def analyze_wallet(request: WalletAnalysisRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"ERROR: Exception in analyze-wallet: {e}")
         import traceback
@@ -316,6 +537,8 @@ async def compare_wallets(request: WalletCompareRequest):
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -350,6 +573,8 @@ async def trace_transaction_flow(
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except InferencePoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,61 @@
+"""
+Bulk Ingest - Load large JSONL / CSV attack pattern packs (threat-intel feeds) into Qdrant
+Batched encoding, parallel upserts and resumable checkpoints; reports patterns per second
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bulk_ingest import BulkIngestor
+from services.enhanced_qdrant_service import EnhancedQdrantService
+
+def print_progress(report: dict):
+    print(
+        f"  ... {report['ingested']} ingested, {report['skipped']} skipped "
+        f"({report['patterns_per_second']} patterns/sec)"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk ingest attack patterns from a JSONL or CSV pack")
+    parser.add_argument("path", help="Pattern pack (.jsonl / .ndjson / .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Override format detection")
+    parser.add_argument("--batch-size", type=int, default=512, help="Patterns per encode batch")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Points per upsert request")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent upsert requests")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+    
+    qdrant = EnhancedQdrantService()
+    ingestor = BulkIngestor(
+        qdrant,
+        batch_size=args.batch_size,
+        upsert_chunk_size=args.chunk_size,
+        max_parallel_upserts=args.parallel,
+        checkpoint_path=args.checkpoint or f"{args.path}.checkpoint.json"
+    )
+    
+    print(f"Ingesting {args.path}...")
+    try:
+        report = await ingestor.ingest(
+            args.path,
+            file_format=args.format,
+            resume=not args.restart,
+            on_progress=print_progress
+        )
+    finally:
+        await qdrant.close()
+    
+    if report["resumed_from"]:
+        print(f"  [OK] Resumed after {report['resumed_from']} records")
+    for attack_type, count in report["attack_types"].items():
+        print(f"  [OK] [{attack_type.upper()}] {count} patterns")
+    print(f"\nIngested {report['ingested']} patterns ({report['skipped']} skipped) "
+          f"in {report['seconds']}s: {report['patterns_per_second']} patterns/sec")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+Cascade Replay - Agreement between the tiered scoring cascade and the full pipeline
+Analyzes a replay set twice (cascade off / on) and reports threat level agreement, skip rates and latency
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.enhanced_qdrant_service import EnhancedQdrantService
+from services.enhanced_analyzer import EnhancedAnalyzerService
+from scripts.quantization_report import DEFAULT_QUERIES
+from scripts.seed_enhanced_patterns import (
+    SIM_SWAPPING_PATTERNS,
+    WALLET_STALKING_PATTERNS,
+    ADDRESS_SPOOFING_PATTERNS,
+    GENERAL_PHISHING_PATTERNS
+)
+
+# Everyday messages: the cascade should skip the short ones without changing their verdict
+BENIGN_MESSAGES = [
+    "ok thanks",
+    "see you at 5",
+    "lunch tomorrow?",
+    "Happy birthday!",
+    "The meeting moved to Thursday afternoon, same room as last week.",
+    "Can you send me the slides from the conference when you get a chance?",
+    "I pushed the fix for the login page, let me know if the tests pass.",
+    "Dinner was great, thanks again for organizing it."
+]
+
+def load_replay_set(path: str):
+    """
+    Read messages from a .txt file (one per line) or .jsonl file
+    
+    JSONL lines are {"content": ...} with optional user_address,
+    known_addresses and context, like /analyze-enhanced requests.
+    """
+    items = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            items.append(json.loads(line) if path.endswith(".jsonl") else {"content": line})
+    return items
+
+def default_replay_set():
+    patterns = SIM_SWAPPING_PATTERNS + WALLET_STALKING_PATTERNS + ADDRESS_SPOOFING_PATTERNS + GENERAL_PHISHING_PATTERNS
+    texts = [pattern["text"] for pattern in patterns] + DEFAULT_QUERIES + BENIGN_MESSAGES
+    return [{"content": text} for text in texts]
+
+async def analyze(analyzer: EnhancedAnalyzerService, item: dict, cascade: bool):
+    started = time.perf_counter()
+    result = await analyzer.analyze_comprehensive(
+        content=item["content"],
+        user_address=item.get("user_address"),
+        known_addresses=item.get("known_addresses"),
+        context=item.get("context"),
+        cascade=cascade
+    )
+    return result, time.perf_counter() - started
+
+async def replay(analyzer: EnhancedAnalyzerService, items) -> dict:
+    """
+    Returns:
+        Dict with agreement, score deltas, skip counts, mean latencies and disagreements
+    """
+    rows = []
+    for item in items:
+        full, full_seconds = await analyze(analyzer, item, cascade=False)
+        cascaded, cascade_seconds = await analyze(analyzer, item, cascade=True)
+        rows.append({
+            "content": item["content"],
+            "full_level": full["threat_level"],
+            "cascade_level": cascaded["threat_level"],
+            "full_score": full["overall_threat_score"],
+            "cascade_score": cascaded["overall_threat_score"],
+            "skipped": cascaded["detailed_analysis"]["cascade"]["skipped"],
+            "full_ms": full_seconds * 1000,
+            "cascade_ms": cascade_seconds * 1000
+        })
+    
+    total = len(rows) or 1
+    skipped = {}
+    for row in rows:
+        if row["skipped"]:
+            skipped[row["skipped"]] = skipped.get(row["skipped"], 0) + 1
+    deltas = [abs(row["full_score"] - row["cascade_score"]) for row in rows]
+    return {
+        "messages": len(rows),
+        "level_agreement": sum(row["full_level"] == row["cascade_level"] for row in rows) / total,
+        "mean_score_delta": sum(deltas) / total,
+        "max_score_delta": max(deltas, default=0.0),
+        "skipped": skipped,
+        "skip_rate": sum(skipped.values()) / total,
+        "full_mean_ms": sum(row["full_ms"] for row in rows) / total,
+        "cascade_mean_ms": sum(row["cascade_ms"] for row in rows) / total,
+        "disagreements": [row for row in rows if row["full_level"] != row["cascade_level"]]
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare the scoring cascade against the full pipeline on a replay set")
+    parser.add_argument("--messages", help="Replay set (.txt one per line, or .jsonl with a content field)")
+    parser.add_argument("--show", type=int, default=10, help="Disagreements to print")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+    
+    qdrant = EnhancedQdrantService()
+    await qdrant.ensure_collections()
+    analyzer = EnhancedAnalyzerService(qdrant)
+    items = load_replay_set(args.messages) if args.messages else default_replay_set()
+    
+    try:
+        report = await replay(analyzer, items)
+    finally:
+        await qdrant.close()
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    print(f"\nCascade replay ({report['messages']} messages, certain score {analyzer.cascade_certain_score}, trivial <= {analyzer.cascade_trivial_max_chars} chars)\n")
+    print(f"   Threat level agreement: {report['level_agreement']:.1%}")
+    print(f"   Score delta:            mean {report['mean_score_delta']:.2f}, max {report['max_score_delta']:.2f}")
+    print(f"   Skipped semantic:       {report['skip_rate']:.1%} {report['skipped']}")
+    print(f"   Mean latency:           full {report['full_mean_ms']:.1f} ms, cascade {report['cascade_mean_ms']:.1f} ms")
+    
+    if report["disagreements"]:
+        print(f"\n   Disagreements (first {args.show}):")
+        for row in report["disagreements"][:args.show]:
+            print(
+                f"   - {row['full_level']} -> {row['cascade_level']} "
+                f"({row['full_score']} -> {row['cascade_score']}, {row['skipped'] or 'not skipped'}): {row['content'][:70]}"
+            )
+    
+    print("\n[OK] Tune CASCADE_CERTAIN_SCORE / CASCADE_TRIVIAL_MAX_CHARS until agreement is acceptable.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
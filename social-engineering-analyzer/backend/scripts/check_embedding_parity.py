@@ -0,0 +1,104 @@
+"""
+Embedding Parity Check - Compares a candidate backend against the PyTorch reference
+Reports cosine agreement on the seeded attack patterns and whether top-1 neighbours match
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_backends import BACKENDS, create_backend
+from scripts.seed_enhanced_patterns import (
+    SIM_SWAPPING_PATTERNS,
+    WALLET_STALKING_PATTERNS,
+    ADDRESS_SPOOFING_PATTERNS,
+    GENERAL_PHISHING_PATTERNS,
+    TRANSACTION_ANALYSIS_PATTERNS
+)
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+def _nearest(vectors, index):
+    """Index of the most similar other vector"""
+    best, best_score = -1, -2.0
+    for j, vector in enumerate(vectors):
+        if j != index:
+            score = _dot(vectors[index], vector)
+            if score > best_score:
+                best, best_score = j, score
+    return best
+
+def check_parity(candidate_name: str, reference_name: str = "torch", batch_size: int = 32) -> dict:
+    """
+    Encode every seeded pattern with both backends and compare
+    
+    Returns:
+        Dict with dimension check, cosine statistics and top-1 neighbour agreement
+    """
+    texts = [
+        pattern["text"]
+        for pattern in [
+            *SIM_SWAPPING_PATTERNS,
+            *WALLET_STALKING_PATTERNS,
+            *ADDRESS_SPOOFING_PATTERNS,
+            *GENERAL_PHISHING_PATTERNS,
+            *TRANSACTION_ANALYSIS_PATTERNS
+        ]
+    ]
+    
+    reference = create_backend(reference_name)
+    candidate = create_backend(candidate_name)
+    
+    def encode_all(backend):
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(backend.encode(texts[start:start + batch_size]))
+        return vectors
+    
+    reference_vectors = encode_all(reference)
+    candidate_vectors = encode_all(candidate)
+    
+    # Vectors are normalized, so the dot product is the cosine similarity
+    cosines = sorted(_dot(r, c) for r, c in zip(reference_vectors, candidate_vectors))
+    top1_agreement = sum(
+        1 for i in range(len(texts))
+        if _nearest(reference_vectors, i) == _nearest(candidate_vectors, i)
+    ) / len(texts)
+    
+    return {
+        "reference": reference.model_id,
+        "candidate": candidate.model_id,
+        "patterns": len(texts),
+        "dimension_ok": all(len(v) == len(reference_vectors[0]) for v in candidate_vectors),
+        "cosine_mean": sum(cosines) / len(cosines),
+        "cosine_min": cosines[0],
+        "cosine_p5": cosines[int(0.05 * (len(cosines) - 1))],
+        "top1_neighbour_agreement": top1_agreement
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check embedding backend parity against the reference model")
+    parser.add_argument("--backend", default="onnx-int8", choices=list(BACKENDS), help="Candidate backend")
+    parser.add_argument("--reference", default="torch", choices=list(BACKENDS), help="Reference backend")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Fail if mean cosine is below this")
+    args = parser.parse_args()
+    
+    report = check_parity(args.backend, args.reference)
+    
+    print(f"\nParity: {report['candidate']} vs {report['reference']} on {report['patterns']} seeded patterns")
+    print(f"   dimension match:          {report['dimension_ok']}")
+    print(f"   cosine mean:              {report['cosine_mean']:.4f}")
+    print(f"   cosine p5:                {report['cosine_p5']:.4f}")
+    print(f"   cosine min:               {report['cosine_min']:.4f}")
+    print(f"   top-1 neighbour agreement: {report['top1_neighbour_agreement']:.1%}")
+    
+    if not report["dimension_ok"] or report["cosine_mean"] < args.min_cosine:
+        print(f"\n[FAIL] Candidate does not meet mean cosine >= {args.min_cosine}")
+        sys.exit(1)
+    print("\n[OK] Candidate backend is compatible with existing collections")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Export the embedding model to ONNX for the CPU backends
+Writes model.onnx (fp32) and model_int8.onnx (dynamic int8 quantization) plus the tokenizer
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_backends import DEFAULT_MODEL_NAME, DEFAULT_ONNX_DIR, export_onnx
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="sentence-transformers model name")
+    parser.add_argument("--output", default=DEFAULT_ONNX_DIR, help="Output directory")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 variant")
+    args = parser.parse_args()
+    
+    print(f"Exporting {args.model} to {args.output}...")
+    written = export_onnx(args.model, args.output, quantize=not args.no_quantize)
+    for backend, path in written.items():
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"  [OK] {backend}: {path} ({size_mb:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+HNSW Tuning Harness - Recall versus latency for each attack pattern collection
+Replays a query set with different HNSW parameters and compares ANN results against exact search
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client.models import (
+    CollectionStatus,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    SearchParams
+)
+from services.enhanced_qdrant_service import EnhancedQdrantService
+from scripts.quantization_report import DEFAULT_QUERIES, load_queries
+
+EXACT_PARAMS = SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+
+def parse_ints(value: str):
+    return [int(v) for v in value.split(",") if v.strip()] if value else []
+
+def percentile(latencies, p: float) -> float:
+    """Nearest-rank percentile in milliseconds"""
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+    return round(latencies[index] * 1000, 3)
+
+async def build_variant(qdrant: EnhancedQdrantService, attack_type: str, m: int, ef_construct: int) -> str:
+    """
+    Copy one attack type's points into a temporary collection built with the given HNSW parameters
+    
+    indexing_threshold is lowered so even small pattern sets get an HNSW graph
+    (Qdrant otherwise scans small segments exactly and ef has no effect).
+    """
+    settings = qdrant.settings_for(attack_type)
+    name = f"{qdrant.collection_for(attack_type)}__hnsw_m{m}_efc{ef_construct}"
+    if await qdrant.client.collection_exists(name):
+        await qdrant.client.delete_collection(name)
+    await qdrant.client.create_collection(
+        collection_name=name,
+        vectors_config=settings.vectors_config(qdrant.vector_size),
+        quantization_config=settings.quantization_config(),
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1)
+    )
+    
+    records = await qdrant.scroll_points(attack_type)
+    for start in range(0, len(records), 256):
+        await qdrant.client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+                for record in records[start:start + 256]
+            ]
+        )
+    
+    # Wait for the optimizer to finish building the graph
+    for _ in range(600):
+        if (await qdrant.client.get_collection(name)).status == CollectionStatus.GREEN:
+            break
+        await asyncio.sleep(0.5)
+    return name
+
+async def replay(qdrant, collection_name, query_filter, query_vectors, exact_ids, params, k: int, repeat: int) -> dict:
+    """Run every query `repeat` times; recall@k against exact results plus latency percentiles"""
+    latencies = []
+    recalls = []
+    for vector, expected in zip(query_vectors, exact_ids):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = await qdrant.client.search(
+                collection_name=collection_name,
+                query_vector=vector,
+                query_filter=query_filter,
+                limit=k,
+                search_params=params
+            )
+            latencies.append(time.perf_counter() - started)
+        if expected:
+            recalls.append(len(expected & {hit.id for hit in hits}) / len(expected))
+    
+    return {
+        f"recall@{k}": round(sum(recalls) / len(recalls), 4) if recalls else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99)
+    }
+
+async def tune_attack_type(qdrant, attack_type, query_vectors, ef_values, build_params, k, repeat):
+    """
+    Returns:
+        List of result rows (one per build variant and ef value, plus the exact baseline)
+    """
+    source = qdrant.collection_for(attack_type)
+    query_filter = qdrant.attack_type_filter(attack_type)
+    # Keep the collection's quantization rescoring, vary only HNSW parameters
+    configured = qdrant.settings_for(attack_type).search_params()
+    quantization = configured.quantization if configured else None
+    
+    exact_ids = []
+    for vector in query_vectors:
+        hits = await qdrant.client.search(
+            collection_name=source,
+            query_vector=vector,
+            query_filter=query_filter,
+            limit=k,
+            search_params=EXACT_PARAMS
+        )
+        exact_ids.append({hit.id for hit in hits})
+    
+    rows = [{
+        "attack_type": attack_type, "m": None, "ef_construct": None, "hnsw_ef": "exact",
+        **await replay(qdrant, source, query_filter, query_vectors, exact_ids, EXACT_PARAMS, k, repeat)
+    }]
+    
+    # Without --m/--ef-construct, only query-time ef is varied on the live collection
+    variants = [(None, None, source, query_filter)]
+    temporary = []
+    try:
+        if build_params:
+            variants = []
+            for m, ef_construct in build_params:
+                name = await build_variant(qdrant, attack_type, m, ef_construct)
+                temporary.append(name)
+                variants.append((m, ef_construct, name, None))
+        
+        for m, ef_construct, collection_name, variant_filter in variants:
+            for ef in ef_values:
+                params = SearchParams(hnsw_ef=ef, quantization=quantization)
+                rows.append({
+                    "attack_type": attack_type, "m": m, "ef_construct": ef_construct, "hnsw_ef": ef,
+                    **await replay(qdrant, collection_name, variant_filter, query_vectors, exact_ids, params, k, repeat)
+                })
+    finally:
+        for name in temporary:
+            await qdrant.client.delete_collection(name)
+    
+    return rows
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k and latency for HNSW parameter combinations")
+    parser.add_argument("--queries", help="Query set (.txt one per line, or .jsonl with a text field)")
+    parser.add_argument("--attack-types", help="Comma separated attack types (default: all)")
+    parser.add_argument("--ef", default="16,32,64,128,256", help="Query-time hnsw_ef values")
+    parser.add_argument("--m", default="", help="HNSW m values to build (builds temporary collections)")
+    parser.add_argument("--ef-construct", default="", help="HNSW ef_construct values to build")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query (more = steadier percentiles)")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON rows")
+    args = parser.parse_args()
+    
+    qdrant = EnhancedQdrantService()
+    await qdrant.ensure_collections()
+    queries = load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+    query_vectors = await qdrant.encode_texts_async(queries)
+    attack_types = args.attack_types.split(",") if args.attack_types else list(qdrant.collections.keys())
+    
+    m_values = parse_ints(args.m)
+    ef_construct_values = parse_ints(args.ef_construct)
+    build_params = []
+    if m_values or ef_construct_values:
+        build_params = [
+            (m, ef_construct)
+            for m in (m_values or [16])
+            for ef_construct in (ef_construct_values or [100])
+        ]
+    
+    rows = []
+    try:
+        for attack_type in attack_types:
+            rows.extend(await tune_attack_type(
+                qdrant, attack_type, query_vectors, parse_ints(args.ef), build_params, args.k, args.repeat
+            ))
+    finally:
+        await qdrant.close()
+    
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    
+    print(f"\nHNSW tuning ({len(queries)} queries x {args.repeat}, recall@{args.k} vs exact search)\n")
+    print(f"   {'attack_type':<22}{'m':>5}{'ef_c':>6}{'ef':>7}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for row in rows:
+        recall = row[f"recall@{args.k}"]
+        print(
+            f"   {row['attack_type']:<22}{str(row['m'] or '-'):>5}{str(row['ef_construct'] or '-'):>6}"
+            f"{str(row['hnsw_ef']):>7}{(f'{recall:.3f}' if recall is not None else 'n/a'):>9}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+        )
+    print("\nPut the chosen values (m, ef_construct, hnsw_ef) in data/collection_config.json.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Migrate attack patterns from per attack type collections into the unified collection
+Copies points with their stored vectors (no re-embedding), then verifies counts per attack type
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client.models import DeleteAlias, DeleteAliasOperation, PointStruct
+from services.enhanced_qdrant_service import EnhancedQdrantService
+
+async def copy_collection(
+    qdrant: EnhancedQdrantService,
+    attack_type: str,
+    source: str,
+    seen_ids: dict,
+    batch_size: int
+) -> int:
+    """
+    Copy every point of one per-type collection into the unified collection
+    
+    Args:
+        source: Physical collection holding the attack type (live names are aliases)
+    
+    Returns:
+        Number of points copied
+    """
+    copied = 0
+    offset = None
+    
+    while True:
+        records, offset = await qdrant.client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if not records:
+            break
+        
+        points = []
+        for record in records:
+            # Seeded IDs are unique across attack types (1xxx, 2xxx, ...); refuse to overwrite
+            if record.id in seen_ids:
+                raise ValueError(
+                    f"Point {record.id} exists in both {seen_ids[record.id]} and {source}; "
+                    f"re-number one of them before migrating"
+                )
+            seen_ids[record.id] = source
+            points.append(PointStruct(
+                id=record.id,
+                vector=record.vector,
+                payload={**(record.payload or {}), "attack_type": attack_type}
+            ))
+        
+        await qdrant.client.upsert(collection_name=qdrant.unified_collection, points=points)
+        copied += len(points)
+        
+        if offset is None:
+            break
+    
+    return copied
+
+async def migrate(batch_size: int = 256, drop_old: bool = False):
+    qdrant = EnhancedQdrantService()
+    
+    # Live names are aliases over timestamped collections (plain collections on older deployments)
+    sources = {}
+    for attack_type, live_name in qdrant.collections.items():
+        physical = await qdrant.physical_collection(live_name)
+        if physical is None:
+            print(f"  [SKIP] {live_name} does not exist")
+            continue
+        sources[attack_type] = physical
+    if not sources:
+        print("\nNo per attack type collections found; nothing to migrate.")
+        await qdrant.close()
+        sys.exit(1)
+    
+    print(f"Creating unified collection {qdrant.unified_collection}...")
+    await qdrant.ensure_unified_collection()
+    
+    seen_ids = {}
+    copied = {}
+    for attack_type, source in sources.items():
+        copied[attack_type] = await copy_collection(qdrant, attack_type, source, seen_ids, batch_size)
+        print(f"  [OK] {source} -> {qdrant.unified_collection}: {copied[attack_type]} patterns")
+    
+    if not sum(copied.values()):
+        print(f"\nNo points were copied from {', '.join(sources.values())}. Old collections were kept.")
+        await qdrant.close()
+        sys.exit(1)
+    
+    # Verify before anything is dropped
+    stats = await qdrant.unified_stats()
+    mismatched = [
+        attack_type for attack_type, count in copied.items()
+        if stats[attack_type].get("points_count") != count
+    ]
+    if mismatched:
+        print(f"\nCount mismatch for: {', '.join(mismatched)}. Old collections were kept.")
+        await qdrant.close()
+        sys.exit(1)
+    print("\nCounts verified.")
+    
+    if drop_old:
+        for attack_type in copied:
+            live_name, physical = qdrant.collections[attack_type], sources[attack_type]
+            if physical != live_name:
+                await qdrant.client.update_collection_aliases(
+                    change_aliases_operations=[DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=live_name))]
+                )
+            await qdrant.client.delete_collection(physical)
+            print(f"  [OK] Dropped {live_name} ({physical})")
+    
+    await qdrant.close()
+    print("\nMigration complete. Set STORAGE_LAYOUT=unified to serve from the unified collection.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate per attack type collections into one unified collection")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points copied per scroll/upsert")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the per-type collections after verification")
+    args = parser.parse_args()
+    
+    asyncio.run(migrate(batch_size=args.batch_size, drop_old=args.drop_old))
+
+if __name__ == "__main__":
+    main()
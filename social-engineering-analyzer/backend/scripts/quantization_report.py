@@ -0,0 +1,125 @@
+"""
+Quantization Report - Memory saved versus recall lost for each attack pattern collection
+Compares the configured (quantized + rescored) search against exact float32 search on held-out queries
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client.models import QuantizationSearchParams, SearchParams
+from services.enhanced_qdrant_service import EnhancedQdrantService
+
+# Held-out queries: realistic messages that are NOT in the seeded pattern set
+DEFAULT_QUERIES = [
+    "Hi, this is your mobile carrier. To keep your line active please confirm the PIN on your account.",
+    "We noticed a login from a new device. Reply with the 6 digit code we just texted you.",
+    "Your phone number is being moved to a new SIM. If this was not you, call support now.",
+    "I saw your wallet on the leaderboard, nice bags. Which exchange do you use?",
+    "Someone sent 0.00001 ETH to your address from an unknown wallet.",
+    "I have been following your transactions for a while, want to collaborate on a trade?",
+    "Please send the payment to 0x742d35Cc6634C0532925a3b844Bc9e7595f0bEc, the usual address changed.",
+    "Copy this new deposit address for the exchange, the old one is deprecated.",
+    "Your MetaMask wallet will be suspended unless you verify your recovery phrase today.",
+    "Congratulations! You are eligible for the governance token airdrop, connect your wallet to claim.",
+    "Support team here: share your seed phrase so we can restore your lost funds.",
+    "Limited time: double your crypto by sending it to our staking contract.",
+    "wallet with many small incoming transfers from new addresses",
+    "wallet drained to zero balance after a single large outgoing transfer",
+    "wallet sending funds in rapid succession to many fresh addresses"
+]
+
+def load_queries(path: str):
+    """Read queries from a .txt file (one per line) or .jsonl file ({"text": ...} per line)"""
+    queries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            queries.append(json.loads(line)["text"] if path.endswith(".jsonl") else line)
+    return queries
+
+def format_mb(num_bytes: int) -> str:
+    return f"{num_bytes / (1024 * 1024):.2f} MB"
+
+async def build_report(qdrant: EnhancedQdrantService, queries, k: int = 10) -> dict:
+    """
+    Returns:
+        Dict mapping attack type to memory and recall@k figures
+    """
+    query_vectors = qdrant.encode_texts(queries)
+    exact_params = SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+    report = {}
+    
+    for attack_type, collection_name in qdrant.collections.items():
+        settings = qdrant.collection_settings[attack_type]
+        info = await qdrant.client.get_collection(collection_name)
+        points = info.points_count or 0
+        
+        baseline_ram = points * qdrant.vector_size * 4
+        configured_ram = settings.estimated_ram_bytes(points, qdrant.vector_size)
+        
+        recalls = []
+        for vector in query_vectors:
+            exact = await qdrant.client.search(
+                collection_name=collection_name,
+                query_vector=vector,
+                limit=k,
+                search_params=exact_params
+            )
+            if not exact:
+                continue
+            approx = await qdrant.client.search(
+                collection_name=collection_name,
+                query_vector=vector,
+                limit=k,
+                search_params=settings.search_params()
+            )
+            exact_ids = {point.id for point in exact}
+            recalls.append(len(exact_ids & {point.id for point in approx}) / len(exact_ids))
+        
+        report[attack_type] = {
+            "settings": settings.to_dict(),
+            "points": points,
+            "baseline_ram_bytes": baseline_ram,
+            "configured_ram_bytes": configured_ram,
+            "ram_saved_bytes": baseline_ram - configured_ram,
+            f"recall@{k}": sum(recalls) / len(recalls) if recalls else None
+        }
+    
+    return report
+
+async def main():
+    parser = argparse.ArgumentParser(description="Report memory saved vs recall lost by vector quantization")
+    parser.add_argument("--queries", help="Held-out queries (.txt one per line, or .jsonl with a text field)")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+    
+    queries = load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+    qdrant = EnhancedQdrantService()
+    try:
+        report = await build_report(qdrant, queries, k=args.k)
+    finally:
+        await qdrant.close()
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    print(f"\nQuantization report ({len(queries)} held-out queries, recall@{args.k} vs exact search)\n")
+    for attack_type, row in report.items():
+        recall = row[f"recall@{args.k}"]
+        print(f"   {attack_type} [{row['settings']['quantization']}, on_disk={row['settings']['on_disk']}]")
+        print(f"      points: {row['points']}")
+        print(f"      RAM: {format_mb(row['baseline_ram_bytes'])} -> {format_mb(row['configured_ram_bytes'])} "
+              f"(saved {format_mb(row['ram_saved_bytes'])})")
+        print(f"      recall@{args.k}: {recall:.3f}" if recall is not None else f"      recall@{args.k}: n/a (no results)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
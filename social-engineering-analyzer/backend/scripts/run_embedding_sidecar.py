@@ -0,0 +1,51 @@
+"""
+Run the local embedding sidecar
+One model instance per host, shared by every uvicorn worker over a UNIX domain socket
+
+Usage:
+    python scripts/run_embedding_sidecar.py --socket /tmp/lurantis-embeddings.sock --threads 4
+    EMBEDDING_SIDECAR_SOCKET=/tmp/lurantis-embeddings.sock uvicorn app_enhanced:app --workers 4
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_backends import BACKENDS, DEFAULT_MODEL_NAME, create_backend
+from services.embedding_sidecar import EmbeddingSidecarServer
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embeddings to all workers over a UNIX socket")
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("EMBEDDING_SIDECAR_SOCKET", "/tmp/lurantis-embeddings.sock"),
+        help="UNIX socket path"
+    )
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "torch"), choices=list(BACKENDS))
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL_NAME))
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Model intra-op threads")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    # The backend reads its thread count from the environment
+    os.environ["EMBEDDING_INTRA_OP_THREADS"] = str(args.threads)
+    print(f"Loading {args.backend} backend for {args.model} with {args.threads} intra-op threads...")
+    backend = create_backend(args.backend, args.model)
+    
+    server = EmbeddingSidecarServer(
+        args.socket,
+        backend,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nEmbedding sidecar stopped")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Enhanced Seed Data - Real-world attack patterns for Web3 social engineering
 Includes SIM swapping, wallet stalking, address spoofing, and crypto-specific attacks
 """
 
+import argparse
 import asyncio
 import sys
 import os
@@ -10,6 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.enhanced_qdrant_service import EnhancedQdrantService
+from services.pattern_sync import PatternSync
 
 # SIM Swapping Attack Patterns
 SIM_SWAPPING_PATTERNS = [
@@ -391,8 +393,14 @@ TRANSACTION_ANALYSIS_PATTERNS = [
     }
 ]
 
-async def seed_database():
-    """Seed all collections with attack patterns"""
+async def seed_database(rebuild: bool = False, keep_old: bool = False):
+    """
+    Seed all collections with attack patterns
+    
+    Re-running only re-embeds new or changed patterns and deletes removed ones.
+    After an embedding model change the collections are rebuilt in the
+    background and swapped in atomically (or always, with rebuild=True).
+    """
     print("Initializing Enhanced Qdrant Service...")
     qdrant = EnhancedQdrantService()
     
@@ -404,16 +412,16 @@ async def seed_database():
         *TRANSACTION_ANALYSIS_PATTERNS
     ]
     
-    print(f"\nSeeding {len(all_patterns)} attack patterns across {len(qdrant.collections)} collections...\n")
+    print(f"\nSyncing {len(all_patterns)} attack patterns across {len(qdrant.collections)} collections...\n")
     
-    for pattern in all_patterns:
-        await qdrant.add_attack_pattern(
-            pattern_id=pattern["id"],
-            text=pattern["text"],
-            attack_type=pattern["attack_type"],
-            metadata=pattern.get("metadata", {})
-        )
-        print(f"  [OK] [{pattern['attack_type'].upper()}] Added pattern #{pattern['id']}")
+    report = await PatternSync(qdrant, pack="seed", keep_old=keep_old).sync(all_patterns, rebuild=rebuild)
+    for collection_name, result in report.items():
+        if result["mode"] == "rebuild":
+            print(f"  [OK] {collection_name}: rebuilt as {result['collection']} "
+                  f"({result['patterns']} patterns, {result['carried_over']} carried over)")
+        else:
+            print(f"  [OK] {collection_name}: {result['added']} added, {result['updated']} updated, "
+                  f"{result['unchanged']} unchanged, {result['deleted']} deleted")
     
     print("\nDatabase seeded successfully!")
     
@@ -427,5 +435,10 @@ async def seed_database():
             print(f"   {attack_type}: Error - {stat['error']}")
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    parser = argparse.ArgumentParser(description="Seed (or incrementally re-seed) the attack pattern collections")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild shadow collections and swap them in")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the replaced collections after a swap")
+    args = parser.parse_args()
+    
+    asyncio.run(seed_database(rebuild=args.rebuild, keep_old=args.keep_old))
 
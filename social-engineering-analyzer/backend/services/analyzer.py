@@ -3,6 +3,7 @@ Analyzer Service - Main logic for analyzing content for threats
 """
 
 from services.qdrant_service import QdrantService
+from services.keyword_engine import KeywordEngine
 from typing import Dict, List
 
 class AnalyzerService:
@@ -16,17 +17,8 @@ class AnalyzerService:
     def __init__(self, qdrant_service: QdrantService):
         self.qdrant = qdrant_service
         
-        # Common social engineering indicators
-        self.red_flags = [
-            "urgent action required",
-            "verify your account",
-            "click here immediately",
-            "limited time offer",
-            "your account will be closed",
-            "suspended",
-            "verify identity",
-            "unusual activity",
-        ]
+        # Common social engineering indicators (basic_red_flags in data/keywords.json)
+        self.keywords = KeywordEngine.from_env()
     
     async def analyze(self, content: str) -> Dict:
         """
@@ -49,11 +41,7 @@ class AnalyzerService:
             similarity_score = similar_patterns[0]["score"]
         
         # Step 3: Check for red flag keywords
-        content_lower = content.lower()
-        detected_flags = []
-        for flag in self.red_flags:
-            if flag in content_lower:
-                detected_flags.append(flag)
+        detected_flags = [entry.phrase for entry in self.keywords.scan(content).matches("basic_red_flags")]
         
         # Step 4: Calculate overall threat score (0-100)
         # Base score from similarity
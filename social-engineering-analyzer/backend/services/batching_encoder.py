@@ -0,0 +1,253 @@
+"""
+Micro-Batching Encoder - Groups concurrent encode requests into batched model calls
+Flushes when the batch is full or the oldest request has waited max_wait_ms
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import asyncio
+import queue
+import threading
+import time
+
+from services.inference_pool import InferencePoolSaturated
+
+
+class _PendingEncode:
+    """A single text waiting to be encoded"""
+
+    __slots__ = ("text", "tokens", "future", "enqueued_at")
+
+    def __init__(self, text: str, tokens: int):
+        self.text = text
+        self.tokens = tokens
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatchEncoder:
+    """
+    Dynamic micro-batching front-end for a sentence embedding model
+
+    Callers submit one text at a time from any thread, or await encode_async
+    from the event loop. A single worker thread
+    drains the queue, waits at most max_wait_ms for more texts to arrive, then
+    encodes them together. Texts are bucketed by approximate token length so a
+    short message is never padded up to the length of a long email.
+
+    At most max_pending texts wait in the queue; further submissions raise
+    InferencePoolSaturated (HTTP 503), like a full inference pool.
+
+    ELI5: Instead of running the oven for every single cookie, we wait a few
+    milliseconds for a tray to fill up and bake them all at once.
+    """
+
+    # Batch-size histogram bucket upper bounds
+    HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        bucket_width: int = 32,
+        token_counter: Optional[Callable[[str], int]] = None,
+        latency_window: int = 2000,
+        max_pending: int = 256
+    ):
+        """
+        Args:
+            encode_batch: Function encoding a list of texts into normalized vectors
+            max_batch_size: Flush as soon as this many texts are queued
+            max_wait_ms: Flush when the oldest queued text has waited this long
+            bucket_width: Texts whose token estimates fall in the same width are encoded together
+            token_counter: Token length estimate (defaults to a cheap word-based estimate)
+            latency_window: Number of recent per-item latencies kept for percentiles
+            max_pending: Queued texts before new submissions are rejected
+        """
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_width = max(1, bucket_width)
+        self.token_counter = token_counter or self.estimate_tokens
+
+        self.max_pending = max(1, max_pending)
+        self._queue: "queue.Queue[Optional[_PendingEncode]]" = queue.Queue(maxsize=self.max_pending)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Observability
+        self.batches = 0
+        self.items = 0
+        self.model_calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self._histogram = {bound: 0 for bound in self.HISTOGRAM_BOUNDS}
+        self._histogram_overflow = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (word-piece models average ~1.3 tokens per word)"""
+        return int(len(text.split()) * 1.3) + 2
+
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="micro-batch-encoder", daemon=True
+                )
+                self._worker.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop the worker after the queued texts are encoded"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join(timeout)
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text and return a future resolving to its vector
+
+        Raises:
+            InferencePoolSaturated: If max_pending texts are already queued
+        """
+        self.start()
+        pending = _PendingEncode(text, self.token_counter(text))
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self.rejected += 1
+            raise InferencePoolSaturated(
+                f"Embedding batch queue is full ({self.max_pending} texts pending). Please retry shortly."
+            )
+        return pending.future
+
+    def _submit_all(self, texts: List[str]) -> List[Future]:
+        """Queue several texts, rejecting all of them up front when they do not fit"""
+        if self._queue.qsize() + len(texts) > self.max_pending:
+            self.rejected += 1
+            raise InferencePoolSaturated(
+                f"Embedding batch queue is full ({self._queue.qsize()} of {self.max_pending} texts pending). "
+                f"Please retry shortly."
+            )
+        return [self.submit(text) for text in texts]
+
+    def encode(self, text: str) -> List[float]:
+        """
+        Encode one text, blocking until its batch has been processed
+
+        Only for worker threads: blocking the event loop here means no other
+        request can queue a text, so every batch has size 1 and still waits
+        max_wait_ms. Async callers use encode_async.
+        """
+        return self.submit(text).result()
+
+    def encode_many(self, texts: List[str]) -> List[List[float]]:
+        """Encode several texts; they are queued together so they share batches (blocking, see encode)"""
+        futures = self._submit_all(texts)
+        return [future.result() for future in futures]
+
+    async def encode_async(self, text: str) -> List[float]:
+        """Encode one text without blocking the event loop, so concurrent requests share batches"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def encode_many_async(self, texts: List[str]) -> List[List[float]]:
+        """Like encode_many, awaited from the event loop"""
+        futures = [asyncio.wrap_future(future) for future in self._submit_all(texts)]
+        return list(await asyncio.gather(*futures))
+
+    def _run(self):
+        """Worker loop: collect a batch, encode it, resolve futures"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[_PendingEncode]):
+        """Encode a flushed batch bucket by bucket"""
+        self._record_batch(len(batch))
+
+        buckets: Dict[int, List[_PendingEncode]] = {}
+        for pending in sorted(batch, key=lambda p: p.tokens):
+            buckets.setdefault(pending.tokens // self.bucket_width, []).append(pending)
+
+        for bucket in buckets.values():
+            self.model_calls += 1
+            try:
+                vectors = self.encode_batch([pending.text for pending in bucket])
+            except Exception as e:
+                self.errors += 1
+                for pending in bucket:
+                    pending.future.set_exception(e)
+                continue
+
+            finished_at = time.perf_counter()
+            for pending, vector in zip(bucket, vectors):
+                self._latencies.append(finished_at - pending.enqueued_at)
+                pending.future.set_result(vector)
+
+    def _record_batch(self, size: int):
+        self.batches += 1
+        self.items += size
+        for bound in self.HISTOGRAM_BOUNDS:
+            if size <= bound:
+                self._histogram[bound] += 1
+                return
+        self._histogram_overflow += 1
+
+    def stats(self) -> Dict:
+        """Queue depth, batch-size histogram and per-item latency percentiles"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 3)
+
+        histogram = {f"<={bound}": count for bound, count in self._histogram.items()}
+        histogram[f">{self.HISTOGRAM_BOUNDS[-1]}"] = self._histogram_overflow
+
+        return {
+            "enabled": True,
+            "queue_depth": self._queue.qsize(),
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "model_calls": self.model_calls,
+            "errors": self.errors,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": histogram,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99)
+            }
+        }
@@ -0,0 +1,281 @@
+"""
+Bulk Ingest - Streams large attack pattern packs (JSONL / CSV) into Qdrant
+Lazy reading, large encode batches, parallel chunked upserts and resumable checkpoints
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, TYPE_CHECKING
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+
+if TYPE_CHECKING:
+    from services.enhanced_qdrant_service import EnhancedQdrantService
+
+# Columns / keys that are not copied into the payload metadata
+RESERVED_FIELDS = ("id", "text", "attack_type", "metadata")
+
+
+def detect_format(path: str) -> str:
+    """jsonl or csv, from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot infer pattern pack format from {path} (use .jsonl or .csv)")
+
+
+def read_patterns(path: str, file_format: Optional[str] = None) -> Iterator[Optional[Dict]]:
+    """
+    Yield raw pattern records one at a time (the file is never loaded whole)
+
+    JSONL: {"id": ..., "text": ..., "attack_type": ..., "metadata": {...}} per line
+    CSV: id,text,attack_type columns; any other column goes into metadata
+
+    A corrupt JSONL line is logged with its line number and yielded as None,
+    so one bad line in a large feed does not abort the ingest.
+    """
+    file_format = file_format or detect_format(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "jsonl":
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping {path} line {line_number}: invalid JSON ({e})")
+                    yield None
+        else:
+            for row in csv.DictReader(f):
+                metadata = {
+                    key: value for key, value in row.items()
+                    if key not in RESERVED_FIELDS and value not in (None, "")
+                }
+                yield {
+                    "id": row.get("id"),
+                    "text": row.get("text"),
+                    "attack_type": row.get("attack_type"),
+                    "metadata": metadata
+                }
+
+
+def point_id(raw_id, attack_type: str, text: str):
+    """
+    Qdrant point id for a pattern
+
+    Integer ids (the seeded 1xxx..5xxx scheme) and UUIDs are kept. Feed-specific
+    string ids, or missing ids, map to a stable UUID so re-ingesting the same
+    feed overwrites instead of duplicating.
+    """
+    if isinstance(raw_id, int):
+        return raw_id
+    if isinstance(raw_id, str) and raw_id.strip().isdigit():
+        return int(raw_id)
+    if raw_id:
+        try:
+            return str(uuid.UUID(str(raw_id)))
+        except ValueError:
+            pass
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{attack_type}:{raw_id or text}"))
+
+
+class BulkIngestor:
+    """
+    Ingests a pattern pack with batched encoding and parallel upserts
+
+    Pipeline: read lazily -> encode batch N on the inference pool while the
+    upserts of batch N-1 are still in flight -> upsert in chunks with
+    wait=False (bounded parallelism) -> checkpoint once a batch is acknowledged.
+
+    The checkpoint records how many records of the file were consumed, so an
+    interrupted run resumes where it stopped. Re-ingesting a record is harmless
+    (upserts are idempotent by point id).
+
+    ELI5: Instead of carrying books to the shelf one at a time, fill a cart,
+    let a helper shelve the last cart while you fill the next one, and write
+    down the page you stopped on.
+    """
+
+    def __init__(
+        self,
+        qdrant_service: "EnhancedQdrantService",
+        batch_size: int = 512,
+        upsert_chunk_size: int = 256,
+        max_parallel_upserts: int = 4,
+        checkpoint_path: Optional[str] = None,
+        progress_interval: float = 5.0
+    ):
+        """
+        Args:
+            qdrant_service: Service providing the encoder and Qdrant client
+            batch_size: Patterns encoded per model call
+            upsert_chunk_size: Points per upsert request
+            max_parallel_upserts: Concurrent upsert requests
+            checkpoint_path: JSON file recording progress (None = no resume)
+            progress_interval: Seconds between progress callbacks
+        """
+        self.qdrant = qdrant_service
+        self.batch_size = batch_size
+        self.upsert_chunk_size = upsert_chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.progress_interval = progress_interval
+        self._upsert_slots = asyncio.Semaphore(max_parallel_upserts)
+
+    def _load_checkpoint(self, source: str) -> int:
+        """Records already ingested from source (0 when there is no matching checkpoint)"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") != os.path.abspath(source) or checkpoint.get("size") != os.path.getsize(source):
+            print(f"Checkpoint {self.checkpoint_path} belongs to another file; starting from the beginning")
+            return 0
+        return checkpoint["offset"]
+
+    def _save_checkpoint(self, source: str, offset: int, ingested: int):
+        if not self.checkpoint_path:
+            return
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({
+                "source": os.path.abspath(source),
+                "size": os.path.getsize(source),
+                "offset": offset,
+                "ingested": ingested,
+                "updated_at": time.time()
+            }, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    async def _upsert_chunk(self, collection_name: str, points: List):
+        async with self._upsert_slots:
+            await self.qdrant.client.upsert(collection_name=collection_name, points=points, wait=False)
+
+    async def _write_batch(self, batch: List[Dict]) -> List[asyncio.Task]:
+        """Encode one batch and schedule its upserts (returns the upsert tasks)"""
+        vectors = await self.qdrant.encode_batch_async([pattern["text"] for pattern in batch])
+
+        points_by_collection: Dict[str, List] = {}
+        for pattern, vector in zip(batch, vectors):
+            points_by_collection.setdefault(self.qdrant.collection_for(pattern["attack_type"]), []).append(
+                self.qdrant.pattern_point(
+                    pattern["id"], pattern["text"], pattern["attack_type"], vector, pattern["metadata"]
+                )
+            )
+
+        return [
+            asyncio.create_task(self._upsert_chunk(collection_name, points[start:start + self.upsert_chunk_size]))
+            for collection_name, points in points_by_collection.items()
+            for start in range(0, len(points), self.upsert_chunk_size)
+        ]
+
+    def _validate(self, record: Optional[Dict]) -> Optional[Dict]:
+        """Normalized pattern, or None if the record cannot be ingested"""
+        if not isinstance(record, dict):
+            return None
+        text = (record.get("text") or "").strip()
+        attack_type = record.get("attack_type")
+        if not text or attack_type not in self.qdrant.collections:
+            return None
+        return {
+            "id": point_id(record.get("id"), attack_type, text),
+            "text": text,
+            "attack_type": attack_type,
+            "metadata": {
+                **(record.get("metadata") or {}),
+                **{key: value for key, value in record.items() if key not in RESERVED_FIELDS}
+            }
+        }
+
+    async def ingest(
+        self,
+        path: str,
+        file_format: Optional[str] = None,
+        resume: bool = True,
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Ingest a JSONL or CSV pattern pack
+
+        Returns:
+            Report with ingested/skipped counts, per attack type counts and patterns per second
+        """
+        await self.qdrant.ensure_collections()
+        start_offset = self._load_checkpoint(path) if resume else 0
+
+        started = time.perf_counter()
+        last_progress = started
+        offset = 0
+        ingested = 0
+        skipped = 0
+        per_type: Dict[str, int] = {}
+        batch: List[Dict] = []
+        # (offset after batch, ingested after batch, upsert tasks) not yet acknowledged
+        in_flight: List[tuple] = []
+
+        def report() -> Dict:
+            elapsed = time.perf_counter() - started
+            return {
+                "source": path,
+                "resumed_from": start_offset,
+                "records": offset,
+                "ingested": ingested,
+                "skipped": skipped,
+                "attack_types": dict(per_type),
+                "seconds": round(elapsed, 2),
+                "patterns_per_second": round(ingested / elapsed, 1) if elapsed else 0.0
+            }
+
+        async def settle(keep: int):
+            """Wait for all but the newest `keep` batches, checkpointing each"""
+            while len(in_flight) > keep:
+                batch_offset, batch_ingested, tasks = in_flight.pop(0)
+                await asyncio.gather(*tasks)
+                self._save_checkpoint(path, batch_offset, batch_ingested)
+
+        async def flush():
+            nonlocal ingested, batch
+            tasks = await self._write_batch(batch)
+            ingested += len(batch)
+            for pattern in batch:
+                per_type[pattern["attack_type"]] = per_type.get(pattern["attack_type"], 0) + 1
+            in_flight.append((offset, start_offset + ingested, tasks))
+            batch = []
+            # Keep one batch of upserts in flight while the next one is encoded
+            await settle(keep=1)
+
+        try:
+            for record in read_patterns(path, file_format):
+                offset += 1
+                if offset <= start_offset:
+                    continue
+
+                pattern = self._validate(record)
+                if pattern is None:
+                    skipped += 1
+                    continue
+                batch.append(pattern)
+
+                if len(batch) >= self.batch_size:
+                    await flush()
+                    if on_progress and time.perf_counter() - last_progress >= self.progress_interval:
+                        last_progress = time.perf_counter()
+                        on_progress(report())
+
+            if batch:
+                await flush()
+            await settle(keep=0)
+            # Trailing skipped records are consumed too
+            self._save_checkpoint(path, offset, start_offset + ingested)
+        finally:
+            for _, _, tasks in in_flight:
+                for task in tasks:
+                    task.cancel()
+            if per_type:
+                await self.qdrant.patterns_written(per_type.keys())
+
+        return report()
@@ -0,0 +1,191 @@
+"""
+Collection Config - Per attack type storage and search settings for Qdrant collections
+Vector quantization (scalar int8 / binary), on-disk original vectors, query-time rescoring and HNSW tuning
+"""
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff
+)
+from typing import Dict, List, Optional
+import json
+import os
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "collection_config.json"
+)
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+class CollectionSettings:
+    """
+    Storage and search settings for one attack pattern collection
+
+    quantization: none | scalar (int8, 4x smaller) | binary (1 bit, 32x smaller)
+    on_disk: keep original float32 vectors memmapped on disk instead of RAM
+    always_ram: keep the quantized vectors in RAM even when originals are on disk
+    rescore: re-rank quantized candidates with the original vectors
+    oversampling: fetch limit * oversampling quantized candidates before rescoring
+    m: HNSW graph degree (None = Qdrant default 16; higher = better recall, more RAM)
+    ef_construct: HNSW build-time beam width (None = Qdrant default 100)
+    hnsw_ef: query-time beam width (None = Qdrant default; higher = better recall, slower)
+    exact: skip the HNSW graph and scan every vector (exact results, linear cost)
+    """
+
+    def __init__(
+        self,
+        quantization: str = "none",
+        on_disk: bool = False,
+        always_ram: bool = True,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+        quantile: float = 0.99,
+        m: Optional[int] = None,
+        ef_construct: Optional[int] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization} (choose from {', '.join(QUANTIZATION_MODES)})")
+        self.quantization = quantization
+        self.on_disk = on_disk
+        self.always_ram = always_ram
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.quantile = quantile
+        self.m = m
+        self.ef_construct = ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.exact = exact
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CollectionSettings":
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        return {
+            "quantization": self.quantization,
+            "on_disk": self.on_disk,
+            "always_ram": self.always_ram,
+            "rescore": self.rescore,
+            "oversampling": self.oversampling,
+            "quantile": self.quantile,
+            "m": self.m,
+            "ef_construct": self.ef_construct,
+            "hnsw_ef": self.hnsw_ef,
+            "exact": self.exact
+        }
+
+    def vectors_config(self, vector_size: int) -> VectorParams:
+        """Vector parameters used when creating the collection"""
+        return VectorParams(
+            size=vector_size,
+            distance=Distance.COSINE,
+            on_disk=self.on_disk
+        )
+
+    def vectors_diff(self) -> VectorParamsDiff:
+        """Vector parameter changes applied to an existing collection"""
+        return VectorParamsDiff(on_disk=self.on_disk)
+
+    def quantization_config(self):
+        """Qdrant quantization config (None when quantization is off)"""
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=self.quantile,
+                    always_ram=self.always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.always_ram)
+            )
+        return None
+
+    def quantization_diff(self):
+        """Quantization change for an existing collection (explicitly disabled when off)"""
+        return self.quantization_config() or Disabled.DISABLED
+
+    def hnsw_config(self) -> Optional[HnswConfigDiff]:
+        """HNSW graph parameters (None = Qdrant defaults)"""
+        if self.m is None and self.ef_construct is None:
+            return None
+        return HnswConfigDiff(m=self.m, ef_construct=self.ef_construct)
+
+    def hnsw_differs(self, current) -> bool:
+        """Whether an existing collection's HNSW config differs from the configured one"""
+        return (
+            (self.m is not None and current.m != self.m)
+            or (self.ef_construct is not None and current.ef_construct != self.ef_construct)
+        )
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Query-time parameters (HNSW ef / exact, rescoring with oversampling for quantized collections)"""
+        quantization = None
+        if self.quantization != "none":
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        if quantization is None and self.hnsw_ef is None and not self.exact:
+            return None
+        return SearchParams(
+            hnsw_ef=self.hnsw_ef,
+            exact=self.exact,
+            quantization=quantization
+        )
+
+    def estimated_ram_bytes(self, points: int, vector_size: int) -> int:
+        """Approximate RAM taken by the vectors of this collection"""
+        original = 0 if self.on_disk else points * vector_size * 4
+        if self.quantization == "scalar" and self.always_ram:
+            return original + points * vector_size
+        if self.quantization == "binary" and self.always_ram:
+            return original + points * ((vector_size + 7) // 8)
+        return original
+
+
+def load_collection_settings(
+    attack_types: List[str],
+    path: Optional[str] = None
+) -> Dict[str, CollectionSettings]:
+    """
+    Load per attack type settings
+
+    The JSON file (COLLECTION_CONFIG_PATH, default data/collection_config.json)
+    has a "default" section and optional per attack type overrides:
+
+        {"default": {"quantization": "none"},
+         "general_phishing": {"quantization": "scalar", "on_disk": true}}
+
+    HNSW keys (m, ef_construct, hnsw_ef, exact) follow the same rules; pick values
+    with scripts/hnsw_tuning_harness.py.
+
+    Missing file = every collection uses plain float32 vectors in RAM.
+    """
+    path = path or os.getenv("COLLECTION_CONFIG_PATH", DEFAULT_CONFIG_PATH)
+    raw: Dict = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            raw = json.load(f)
+
+    defaults = raw.get("default", {})
+    return {
+        attack_type: CollectionSettings.from_dict({**defaults, **raw.get(attack_type, {})})
+        for attack_type in attack_types
+    }
@@ -0,0 +1,123 @@
+"""
+Collection Stats - Background-refreshed Qdrant collection statistics
+Health and pattern-count endpoints read a snapshot from memory instead of querying Qdrant per request
+"""
+
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+
+
+class CollectionStatsRefresher:
+    """
+    Keeps the latest collection statistics and Qdrant reachability in memory
+
+    A background task refreshes the snapshot every `interval` seconds (or
+    sooner after pattern writes, see request_refresh). Readers get the
+    snapshot plus its age, so load balancers polling /health every second
+    cause no Qdrant traffic at all.
+
+    ELI5: Instead of everyone phoning the warehouse to ask how much stock
+    there is, one clerk checks every few seconds and writes it on a board.
+    """
+
+    def __init__(
+        self,
+        fetch_stats: Callable[[], Awaitable[Dict]],
+        check_health: Callable[[], Awaitable[bool]],
+        interval: float = 15.0
+    ):
+        """
+        Args:
+            fetch_stats: Coroutine returning per attack type collection stats
+            check_health: Coroutine returning whether Qdrant is reachable
+            interval: Seconds between refreshes
+        """
+        self.fetch_stats = fetch_stats
+        self.check_health = check_health
+        self.interval = interval
+
+        self.collections: Dict = {}
+        self.qdrant_connected = False
+        self.refreshed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.refreshes = 0
+        self.failures = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def refresh(self):
+        """Query Qdrant once and replace the snapshot (previous stats are kept on failure)"""
+        try:
+            self.qdrant_connected = await self.check_health()
+            if self.qdrant_connected:
+                self.collections = await self.fetch_stats()
+                self.last_error = None
+            else:
+                self.last_error = "Qdrant unreachable"
+                self.failures += 1
+        except Exception as e:
+            self.qdrant_connected = False
+            self.last_error = str(e)
+            self.failures += 1
+        self.refreshed_at = time.time()
+        self.refreshes += 1
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        """Start the background refresher (call from a running event loop)"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def request_refresh(self):
+        """Refresh soon (after pattern writes) instead of waiting for the interval"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def snapshot(self) -> Dict:
+        """
+        Latest stats with their age
+
+        Only the very first call, before any refresh has completed, waits for Qdrant.
+        """
+        if self.refreshed_at is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self.refreshed_at is None:
+                    await self.refresh()
+
+        age = time.time() - self.refreshed_at
+        return {
+            "qdrant_connected": self.qdrant_connected,
+            "collections": self.collections,
+            "refreshed_at": self.refreshed_at,
+            "age_seconds": round(age, 1),
+            "stale": age > 2 * self.interval,
+            "error": self.last_error
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "refreshed_at": self.refreshed_at
+        }
@@ -5,7 +5,6 @@ In production, this should integrate with smart contracts on Gnosis chain
 
 from typing import Dict, Optional
 import os
-from web3 import Web3
 import json
 
 class CreditManager:
@@ -19,7 +18,7 @@ class CreditManager:
     def __init__(self):
         # In production, connect to Gnosis chain
         self.gnosis_rpc = os.getenv("GNOSIS_RPC", "https://rpc.gnosischain.com")
-        self.w3 = Web3(Web3.HTTPProvider(self.gnosis_rpc))
+        self._w3 = None  # Created on first payment check (web3 is slow to import)
         
         # In-memory storage for credits (in production, use database or blockchain)
         # Format: {address: {"balance": int, "tier": str}}
@@ -30,6 +29,14 @@ class CreditManager:
         self.pro_tier_credits = 1000
         self.enterprise_credits = float('inf')
     
+    @property
+    def w3(self):
+        """Web3 connection to Gnosis chain, created on first use"""
+        if self._w3 is None:
+            from web3 import Web3
+            self._w3 = Web3(Web3.HTTPProvider(self.gnosis_rpc))
+        return self._w3
+    
     async def check_credits(self, address: str) -> bool:
         """Check if user has credits available"""
         balance = await self.get_balance(address)
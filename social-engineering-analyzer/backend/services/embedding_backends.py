@@ -0,0 +1,253 @@
+"""
+Embedding Backends - Interchangeable encoder implementations for CPU-only nodes
+PyTorch (reference), exported ONNX Runtime model, and dynamically int8-quantized ONNX model
+"""
+
+from typing import Dict, List, Optional
+import os
+
+DEFAULT_MODEL_NAME = "all-mpnet-base-v2"
+DEFAULT_ONNX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "models",
+    f"{DEFAULT_MODEL_NAME}-onnx"
+)
+
+# Files written by export_onnx()
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+
+
+def model_id_for(backend_name: str, model_name: str) -> str:
+    """Identifier used in cache keys and payloads (model plus backend)"""
+    return f"{model_name}:{backend_name}"
+
+
+class EmbeddingBackend:
+    """
+    Base class for text encoders
+
+    Every backend must return L2-normalized vectors of the same dimension as
+    the reference model (768 for all-mpnet-base-v2), so they can search the
+    existing collections without re-seeding.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, dimension: int = 768):
+        self.model_name = model_name
+        self.dimension = dimension
+
+    @property
+    def model_id(self) -> str:
+        """Identifier used in cache keys and payloads (model plus backend)"""
+        return model_id_for(self.name, self.model_name)
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode a batch of texts into normalized vectors"""
+        raise NotImplementedError
+
+    def info(self) -> Dict:
+        """Description for /metrics and parity reports"""
+        return {
+            "backend": self.name,
+            "model": self.model_name,
+            "dimension": self.dimension
+        }
+
+
+class TorchBackend(EmbeddingBackend):
+    """Reference backend: the sentence-transformers PyTorch model"""
+
+    name = "torch"
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        dimension: int = 768,
+        intra_op_threads: Optional[int] = None
+    ):
+        super().__init__(model_name, dimension)
+        # Imported lazily: torch is only needed by this backend
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            texts,
+            batch_size=max(1, len(texts)),
+            normalize_embeddings=True
+        ).tolist()
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX Runtime backend for a model exported with export_onnx()
+
+    Reproduces the sentence-transformers pipeline (transformer -> mean pooling
+    -> L2 normalize) without importing torch.
+    """
+
+    name = "onnx"
+    model_file = ONNX_MODEL_FILE
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        dimension: int = 768,
+        model_dir: str = DEFAULT_ONNX_DIR,
+        max_seq_length: int = 384,
+        intra_op_threads: Optional[int] = None
+    ):
+        super().__init__(model_name, dimension)
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.max_seq_length = max_seq_length
+        model_path = self._model_path()
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_path}. "
+                f"Run: python scripts/export_onnx_model.py --output {model_dir}"
+            )
+
+        options = onnxruntime.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _model_path(self) -> str:
+        return os.path.join(self.model_dir, self.model_file)
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        inputs = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in tokens
+        }
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real (non-padding) tokens, then L2 normalize
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+        norms = np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return (embeddings / norms).tolist()
+
+    def info(self) -> Dict:
+        return {**super().info(), "model_path": self._model_path()}
+
+
+class QuantizedOnnxBackend(OnnxBackend):
+    """ONNX Runtime backend using the dynamically int8-quantized export"""
+
+    name = "onnx-int8"
+    model_file = ONNX_INT8_MODEL_FILE
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxBackend.name: OnnxBackend,
+    QuantizedOnnxBackend.name: QuantizedOnnxBackend
+}
+
+
+def create_backend(
+    name: Optional[str] = None,
+    model_name: Optional[str] = None
+) -> EmbeddingBackend:
+    """
+    Build the configured embedding backend
+
+    Args:
+        name: torch, onnx or onnx-int8 (default: EMBEDDING_BACKEND or torch)
+        model_name: Model identifier (default: EMBEDDING_MODEL or all-mpnet-base-v2)
+    """
+    name = (name or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    model_name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL_NAME)
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name} (choose from {', '.join(BACKENDS)})")
+
+    threads = os.getenv("EMBEDDING_INTRA_OP_THREADS")
+    intra_op_threads = int(threads) if threads else None
+
+    if name == TorchBackend.name:
+        return TorchBackend(model_name, intra_op_threads=intra_op_threads)
+
+    return BACKENDS[name](
+        model_name,
+        model_dir=os.getenv("EMBEDDING_ONNX_DIR", DEFAULT_ONNX_DIR),
+        intra_op_threads=intra_op_threads
+    )
+
+
+def export_onnx(
+    model_name: str = DEFAULT_MODEL_NAME,
+    output_dir: str = DEFAULT_ONNX_DIR,
+    quantize: bool = True
+) -> Dict[str, str]:
+    """
+    Export the sentence-transformers model to ONNX (and an int8 variant)
+
+    Returns:
+        Dict with the paths that were written
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask") if name in sample]
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"}
+            },
+            opset_version=14
+        )
+    written = {"onnx": model_path}
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        written["onnx-int8"] = int8_path
+
+    return written
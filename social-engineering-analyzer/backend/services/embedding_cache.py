@@ -0,0 +1,186 @@
+"""
+Embedding Cache - Cross-request cache for sentence embeddings
+Keeps recently used vectors in memory (LRU) with an optional on-disk tier that survives restarts
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by normalized text plus model name
+
+    Tier 1: bounded in-memory LRU (vectors stored as compact float32 arrays)
+    Tier 2: optional SQLite file, consulted on memory misses and promoted back to memory
+
+    ELI5: Turning text into a vector is the slowest thing we do. If we have
+    already seen the exact same text, we just hand back the vector we made last time.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 500000
+    ):
+        """
+        Args:
+            model_name: Embedding model identifier (part of every cache key)
+            max_entries: Maximum vectors kept in memory (0 disables the memory tier)
+            disk_path: SQLite file for the persistent tier (None = memory only)
+            disk_max_entries: Oldest disk entries are pruned beyond this size
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_writes_since_prune = 0
+
+        # Counters used to size the cache against the CPU it saves
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_writes = 0
+
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @classmethod
+    def from_env(cls, model_name: str) -> "EmbeddingCache":
+        """Build a cache from EMBEDDING_CACHE_* environment variables"""
+        return cls(
+            model_name=model_name,
+            max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+            disk_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            disk_max_entries=int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "500000"))
+        )
+
+    def _open_disk(self, path: str):
+        """Open (or create) the SQLite tier"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._disk = sqlite3.connect(path, check_same_thread=False)
+        self._disk.execute("PRAGMA journal_mode=WAL")
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._disk.commit()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        Normalize text before hashing
+
+        Only whitespace is collapsed: the tokenizer splits on whitespace anyway,
+        so this never changes the resulting embedding.
+        """
+        return " ".join(text.split())
+
+    def _key(self, text: str) -> str:
+        normalized = self.normalize_text(text)
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached vector for text, or None on a miss"""
+        key = self._key(text)
+
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vector = array("f")
+                    vector.frombytes(row[0])
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector.tolist()
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: List[float]):
+        """Store a vector for text in every enabled tier"""
+        key = self._key(text)
+        packed = array("f", vector)
+
+        with self._lock:
+            self._remember(key, packed)
+
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, packed.tobytes())
+                )
+                self._disk.commit()
+                self.disk_writes += 1
+                self._disk_writes_since_prune += 1
+                if self._disk_writes_since_prune >= 1000:
+                    self._prune_disk()
+
+    def _remember(self, key: str, vector: array):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self):
+        """Drop the oldest disk entries beyond disk_max_entries (lock held)"""
+        self._disk_writes_since_prune = 0
+        self._disk.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            " SELECT rowid FROM embeddings ORDER BY rowid DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.disk_max_entries,)
+        )
+        self._disk.commit()
+
+    def clear(self):
+        """Empty both tiers and reset counters"""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM embeddings")
+                self._disk.commit()
+            self.memory_hits = self.disk_hits = self.misses = 0
+            self.evictions = self.disk_writes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters for sizing the cache"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_enabled": self._disk is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_writes": self.disk_writes,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,215 @@
+"""
+Embedding Sidecar - One shared model instance for all uvicorn workers on a host
+Serves encode requests over a UNIX domain socket and batches them across workers
+"""
+
+from array import array
+from typing import Dict, List
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+
+from services.batching_encoder import MicroBatchEncoder
+from services.embedding_backends import EmbeddingBackend
+
+# Frame = 4-byte big-endian length + payload.
+# Requests are JSON. Responses start with a type byte:
+#   b"V" + count (uint32) + dimension (uint32) + float32 vectors (native byte order, same host)
+#   b"I" + JSON backend info
+#   b"E" + UTF-8 error message
+_LENGTH = struct.Struct(">I")
+_VECTOR_HEADER = struct.Struct(">II")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def _frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _pack_vectors(vectors: List[List[float]]) -> bytes:
+    dimension = len(vectors[0]) if vectors else 0
+    packed = array("f")
+    for vector in vectors:
+        packed.extend(vector)
+    return b"V" + _VECTOR_HEADER.pack(len(vectors), dimension) + packed.tobytes()
+
+
+def _unpack_vectors(payload: bytes) -> List[List[float]]:
+    count, dimension = _VECTOR_HEADER.unpack_from(payload, 1)
+    packed = array("f")
+    packed.frombytes(payload[1 + _VECTOR_HEADER.size:])
+    return [packed[i * dimension:(i + 1) * dimension].tolist() for i in range(count)]
+
+
+class EmbeddingSidecarServer:
+    """
+    UNIX socket server holding a single embedding backend
+
+    Requests from every connection (i.e. every uvicorn worker) go through one
+    MicroBatchEncoder, so concurrent texts from different workers share batches
+    and the model's intra-op threads are sized once for the whole host.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        backend: EmbeddingBackend,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        self.socket_path = socket_path
+        self.backend = backend
+        self.batcher = MicroBatchEncoder(
+            backend.encode,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms
+        )
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve framed requests on one connection until the client disconnects"""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_LENGTH.size)
+                except asyncio.IncompleteReadError:
+                    return
+                (length,) = _LENGTH.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    writer.write(_frame(b"E" + b"Request too large"))
+                    await writer.drain()
+                    return
+
+                body = await reader.readexactly(length)
+                self.requests += 1
+                try:
+                    payload = await self._respond(json.loads(body))
+                except Exception as e:
+                    payload = b"E" + str(e).encode("utf-8")
+                writer.write(_frame(payload))
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _respond(self, request: Dict) -> bytes:
+        op = request.get("op", "encode")
+        if op == "info":
+            info = {
+                **self.backend.info(),
+                "model_id": self.backend.model_id,
+                "batcher": self.batcher.stats(),
+                "connections": self.connections,
+                "requests": self.requests
+            }
+            return b"I" + json.dumps(info).encode("utf-8")
+        if op == "encode":
+            futures = [self.batcher.submit(text) for text in request["texts"]]
+            vectors = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+            return _pack_vectors(list(vectors))
+        raise ValueError(f"Unknown op: {op}")
+
+    async def serve_forever(self):
+        """Listen on the socket (replacing a stale one) until cancelled"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        # Workers usually run as the same user/group
+        os.chmod(self.socket_path, 0o660)
+        print(f"Embedding sidecar serving {self.backend.model_id} on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher.stop()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class SidecarEncoder(EmbeddingBackend):
+    """
+    Embedding backend that forwards to the local sidecar
+
+    Used transparently by EnhancedQdrantService when EMBEDDING_SIDECAR_SOCKET is
+    set. It reports the same model_id as the backend it proxies, so cache keys
+    and stored payloads are unchanged. Each calling thread keeps its own
+    connection, so concurrent pool threads reach the sidecar's batcher together.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        backend_name: str,
+        model_name: str,
+        timeout: float = 30.0
+    ):
+        super().__init__(model_name)
+        self.name = backend_name
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        info = json.loads(self._request({"op": "info"})[1:])
+        if info["model_id"] != self.model_id:
+            raise ValueError(
+                f"Embedding sidecar at {socket_path} serves {info['model_id']}, expected {self.model_id}"
+            )
+        self.dimension = info["dimension"]
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def _request(self, request: Dict) -> bytes:
+        """Send one request, reconnecting once if the sidecar restarted"""
+        body = json.dumps(request).encode("utf-8")
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(_frame(body))
+                (length,) = _LENGTH.unpack(self._recv_exact(sock, _LENGTH.size))
+                payload = self._recv_exact(sock, length)
+                break
+            except OSError:
+                self._close()
+                if attempt == 1:
+                    raise
+
+        if payload[:1] == b"E":
+            raise RuntimeError(f"Embedding sidecar error: {payload[1:].decode('utf-8')}")
+        return payload
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Embedding sidecar closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return _unpack_vectors(self._request({"op": "encode", "texts": texts}))
+
+    def info(self) -> Dict:
+        return {**super().info(), "sidecar": self.socket_path}
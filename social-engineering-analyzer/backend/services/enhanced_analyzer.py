@@ -4,8 +4,15 @@ Handles SIM swapping, wallet stalking, address spoofing, and general phishing
 """
 
 from services.enhanced_qdrant_service import EnhancedQdrantService
-from typing import Dict, List, Optional
+from services.search_planner import SearchPlanner
+from services.keyword_engine import KeywordScan
+from services.inference_pool import InferencePoolSaturated
+from services.simhash import hamming
+from typing import Awaitable, Dict, List, Optional, Tuple
+import asyncio
+import os
 import re
+import time
 
 class EnhancedAnalyzerService:
     """
@@ -15,32 +22,29 @@ class EnhancedAnalyzerService:
     def __init__(self, qdrant_service: EnhancedQdrantService):
         self.qdrant = qdrant_service
         
-        # Red flag keywords for different attack types
-        self.red_flags = {
-            "urgency": [
-                "urgent", "immediately", "asap", "right now", "limited time",
-                "expires soon", "act now", "don't delay"
-            ],
-            "authority": [
-                "verify your account", "confirm your identity", "security check",
-                "account suspended", "account locked", "compliance required"
-            ],
-            "financial": [
-                "send funds", "transfer money", "payment required", "transaction fee",
-                "unlock wallet", "verify payment", "refund processing"
-            ],
-            "crypto_specific": [
-                "seed phrase", "private key", "mnemonic", "wallet connect",
-                "gas fee", "smart contract", "defi protocol", "airdrop"
-            ]
-        }
+        # Each detector of analyze_comprehensive gets this long before it is skipped
+        self.detector_timeout = float(os.getenv("DETECTOR_TIMEOUT", "5"))
+        
+        # Scoring cascade: skip the semantic stages when the cheap ones settle the verdict.
+        # Off by default: enable it once scripts/cascade_replay.py agrees on your traffic
+        self.cascade = os.getenv("CASCADE", "false").lower() in ("1", "true", "yes")
+        # Cheap score from which the threat level cannot change any more (80 = CRITICAL)
+        self.cascade_certain_score = float(os.getenv("CASCADE_CERTAIN_SCORE", "80"))
+        # Messages up to this length with no keyword hit, address or context are not searched (0 = never)
+        self.cascade_trivial_max_chars = int(os.getenv("CASCADE_TRIVIAL_MAX_CHARS", "0"))
+        
+        # Red flag keywords and their category weights live in the red_flags
+        # dictionary of data/keywords.json (hot-reloaded, see KeywordEngine)
     
     async def analyze_comprehensive(
         self,
         content: str,
         user_address: Optional[str] = None,
         known_addresses: Optional[List[str]] = None,
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        planner: Optional[SearchPlanner] = None,
+        cascade: Optional[bool] = None,
+        prescreen: Optional[Dict] = None
     ) -> Dict:
         """
         Comprehensive analysis of content for all threat types
@@ -50,6 +54,12 @@ class EnhancedAnalyzerService:
             user_address: User's wallet address (optional)
             known_addresses: List of addresses user owns/trusts (optional)
             context: Additional context (phone number, transaction data, etc.)
+            planner: Search planner shared with other analyses (batches); its
+                searches may already have been executed
+            cascade: Skip the semantic stages when the cheap stages settle the
+                threat level (None = CASCADE setting)
+            prescreen: Result of _prescreen for this message, when the caller
+                already ran it (batches)
         
         Returns:
             Comprehensive threat analysis with scores and recommendations
@@ -65,62 +75,253 @@ class EnhancedAnalyzerService:
             "wallet_stalking_analysis": None
         }
         
-        # 1. General pattern matching
-        general_results = await self.qdrant.search_attack_patterns(
-            content,
-            attack_types=None,  # Search all collections
-            limit=10,
-            score_threshold=0.4
+        # Long documents are searched window by window; inputs beyond
+        # LONG_DOCUMENT_MAX_CHARS are cut so every stage has a bounded cost
+        long_document = self.qdrant.chunker.describe(content) if self.qdrant.chunker else None
+        content = self._clip(content)
+        
+        # 1. Cheap stages: keyword automaton, address regex, spoof check
+        if prescreen is None:
+            prescreen = await self._prescreen(
+                content,
+                user_address,
+                known_addresses,
+                context,
+                cascade=self.cascade if cascade is None else cascade
+            )
+        keyword_scan = prescreen["keyword_scan"]
+        addresses_in_content = prescreen["addresses"]
+        planner = planner or SearchPlanner(self.qdrant)
+        
+        near_duplicates = self.qdrant.near_duplicates
+        near_duplicate = None
+        if prescreen["skip"]:
+            # Semantic stages could not change the threat level; the cheap verdict stands
+            query_texts = []
+            general_results = {}
+            outcomes, detector_timings = prescreen["outcomes"], prescreen["timings"]
+        else:
+            # 2. Semantic stages: plan the searches that share text so each is
+            # embedded and run only once, then run the independent detectors
+            # concurrently (none needs another's output). Detectors the cascade
+            # already ran only add their searches to the cheap outcome.
+            near_duplicate = self._reuse_near_duplicate(planner, content, prescreen)
+            query_texts = self.plan_searches(planner, content, context)
+            outcomes, detector_timings = await self._run_detectors(self._detectors(
+                content,
+                user_address,
+                known_addresses,
+                context,
+                keyword_scan,
+                addresses_in_content,
+                planner=planner,
+                prior=prescreen["outcomes"]
+            ))
+            general_results = outcomes.get("pattern_matching") or {}
+            if near_duplicates and near_duplicate is None:
+                near_duplicates.add(
+                    prescreen["fingerprint"],
+                    planner.snapshot(content),
+                    prescreen["generation"],
+                    sample=content
+                )
+        
+        results["address_analysis"] = outcomes.get("address_spoofing")
+        results["sim_swap_analysis"] = outcomes.get("sim_swapping")
+        results["wallet_stalking_analysis"] = outcomes.get("wallet_stalking")
+        
+        # 3. Calculate overall threat score
+        red_flag_score = self._calculate_red_flag_score(content, keyword_scan)
+        results["detected_attacks"], results["overall_threat_score"] = self._aggregate(
+            outcomes,
+            general_results,
+            red_flag_score
         )
+        results["threat_level"] = self._threat_level(results["overall_threat_score"])
+        
+        # Generate recommendations
+        results["recommendations"] = self._generate_recommendations(results)
+        
+        # Detailed analysis breakdown
+        results["detailed_analysis"] = {
+            "pattern_matches": general_results,
+            "red_flags_detected": self._detect_red_flags(content, keyword_scan),
+            "red_flag_spans": keyword_scan.span_dicts("red_flags"),
+            "addresses_found": addresses_in_content,
+            "search_plan": planner.stats(),
+            "detector_timings": detector_timings,
+            "long_document": long_document,
+            # Campaign cluster whose semantic results this message reused
+            "near_duplicate": {
+                "cluster": near_duplicate.cluster,
+                "distance": near_duplicate.distance
+            } if near_duplicate else None,
+            "cascade": {
+                "enabled": prescreen["cascade"],
+                "stages": prescreen["stages"] if prescreen["skip"] else prescreen["stages"] + ["semantic"],
+                "skipped": prescreen["skip"],
+                "cheap_score": prescreen["score"]
+            },
+            # Collections that failed or missed the search deadline; scores are based on the rest
+            "missing_attack_types": planner.missing_attack_types(query_texts),
+            "threat_breakdown": {
+                "pattern_similarity": self._get_max_pattern_similarity(general_results),
+                "address_spoofing": 90 if (results["address_analysis"] and results["address_analysis"]["is_spoofed"]) else 0,
+                "sim_swapping": 85 if (results["sim_swap_analysis"] and results["sim_swap_analysis"]["is_sim_swap"]) else 0,
+                "wallet_stalking": 70 if (results["wallet_stalking_analysis"] and results["wallet_stalking_analysis"]["is_stalking"]) else 0,
+                "red_flags": red_flag_score
+            }
+        }
         
-        # 2. Extract wallet addresses from content
-        addresses_in_content = self.qdrant.extract_wallet_addresses(content)
+        return results
+    
+    def _detectors(
+        self,
+        content: str,
+        user_address: Optional[str],
+        known_addresses: Optional[List[str]],
+        context: Optional[Dict],
+        keyword_scan: KeywordScan,
+        addresses_in_content: List[str],
+        planner: Optional[SearchPlanner] = None,
+        prior: Optional[Dict] = None
+    ) -> Dict[str, Awaitable]:
+        """
+        Detector coroutines for one message
         
-        # 3. Address spoofing detection (if addresses found and user addresses provided)
+        Without a planner only the cheap stages run: no pattern matching, and
+        the SIM swap, stalking and spoofing detectors skip their vector searches.
+        prior holds the cheap outcomes of the cascade, whose non-semantic
+        checks are reused rather than repeated.
+        """
+        prior = prior or {}
+        semantic = planner is not None
+        detectors = {
+            "sim_swapping": self.qdrant.detect_sim_swapping(
+                content,
+                context,
+                planner=planner,
+                keyword_scan=keyword_scan,
+                semantic=semantic,
+                prior=prior.get("sim_swapping")
+            )
+        }
+        if semantic:
+            # General pattern matching across all collections
+            detectors["pattern_matching"] = planner.search(
+                content,
+                attack_types=None,
+                limit=10,
+                score_threshold=0.4
+            )
+        # Address spoofing detection (if addresses found and user addresses provided)
         if addresses_in_content and known_addresses:
-            address_analysis = await self.qdrant.detect_address_spoofing(
+            detectors["address_spoofing"] = self.qdrant.detect_address_spoofing(
                 addresses_in_content[0],
-                known_addresses
+                known_addresses,
+                semantic=semantic,
+                prior=prior.get("address_spoofing")
             )
-            results["address_analysis"] = address_analysis
-            
-            if address_analysis["is_spoofed"]:
-                results["detected_attacks"].append({
-                    "type": "address_spoofing",
-                    "severity": "CRITICAL",
-                    "confidence": 0.9
-                })
-        
-        # 4. SIM swapping detection
-        sim_swap_analysis = await self.qdrant.detect_sim_swapping(
-            content,
-            context
-        )
-        results["sim_swap_analysis"] = sim_swap_analysis
-        
-        if sim_swap_analysis["is_sim_swap"]:
-            results["detected_attacks"].append({
-                "type": "sim_swapping",
-                "severity": "CRITICAL",
-                "confidence": 0.85
-            })
-        
-        # 5. Wallet stalking detection (if transaction context provided)
+        # Wallet stalking detection (if transaction context provided)
         if context and context.get("transaction_data"):
-            stalking_analysis = await self.qdrant.detect_wallet_stalking(
+            detectors["wallet_stalking"] = self.qdrant.detect_wallet_stalking(
                 context["transaction_data"],
-                user_address or ""
+                user_address or "",
+                planner=planner,
+                semantic=semantic,
+                prior=prior.get("wallet_stalking")
             )
-            results["wallet_stalking_analysis"] = stalking_analysis
-            
-            if stalking_analysis["is_stalking"]:
-                results["detected_attacks"].append({
-                    "type": "wallet_stalking",
-                    "severity": "HIGH",
-                    "confidence": 0.75
-                })
-        
-        # 6. Calculate overall threat score
+        return detectors
+    
+    async def _prescreen(
+        self,
+        content: str,
+        user_address: Optional[str],
+        known_addresses: Optional[List[str]],
+        context: Optional[Dict],
+        cascade: bool
+    ) -> Dict:
+        """
+        Cheap stages of the cascade and the decision whether to skip the semantic ones
+        
+        Semantic stages only add evidence (a pattern similarity, or a detector
+        flipping to positive), so the cheap score is a lower bound of the full
+        score. Once it reaches cascade_certain_score the threat level is final.
+        Trivially short messages with no keyword hit, address or context are
+        skipped as well; that rule is a heuristic, measure it with
+        scripts/cascade_replay.py.
+        
+        ELI5: If the letter already says "urgent, send your seed phrase", we do
+        not need to compare it with every scam in the library to call it a scam.
+        
+        Returns:
+            Dict with keyword_scan, addresses, stages run, cheap outcomes and
+            score, skip (None, "certain" or "trivial") and the near-duplicate
+            fingerprint
+        """
+        prescreen = {
+            "keyword_scan": self.qdrant.keywords.scan(content),
+            "addresses": self.qdrant.extract_wallet_addresses(content),
+            "cascade": cascade,
+            "stages": ["keywords", "addresses"],
+            "outcomes": {},
+            "timings": {},
+            "score": None,
+            "skip": None,
+            "fingerprint": None,
+            "generation": None
+        }
+        if cascade:
+            await self._cascade(prescreen, content, user_address, known_addresses, context)
+        
+        # Fingerprint for the near-duplicate cache, taken before anything is searched
+        near_duplicates = self.qdrant.near_duplicates
+        if near_duplicates and not prescreen["skip"]:
+            prescreen["fingerprint"] = near_duplicates.fingerprint(content)
+            prescreen["generation"] = near_duplicates.generation
+        return prescreen
+    
+    async def _cascade(
+        self,
+        prescreen: Dict,
+        content: str,
+        user_address: Optional[str],
+        known_addresses: Optional[List[str]],
+        context: Optional[Dict]
+    ):
+        """Run the cheap detectors and set prescreen's cheap score and skip reason"""
+        keyword_scan = prescreen["keyword_scan"]
+        if prescreen["addresses"] and known_addresses:
+            prescreen["stages"].append("spoof_check")
+        outcomes, timings = await self._run_detectors(self._detectors(
+            content,
+            user_address,
+            known_addresses,
+            context,
+            keyword_scan,
+            prescreen["addresses"]
+        ))
+        _, score = self._aggregate(outcomes, {}, self._calculate_red_flag_score(content, keyword_scan))
+        prescreen.update(outcomes=outcomes, timings=timings, score=score)
+        
+        if score >= self.cascade_certain_score:
+            prescreen["skip"] = "certain"
+        elif (
+            len(content.strip()) <= self.cascade_trivial_max_chars
+            and not keyword_scan.spans
+            and not prescreen["addresses"]
+            and not context
+        ):
+            prescreen["skip"] = "trivial"
+    
+    def _aggregate(self, outcomes: Dict, general_results: Dict, red_flag_score: float) -> Tuple[List[Dict], float]:
+        """
+        Detected attacks and overall threat score from detector outcomes
+        
+        Returns:
+            (detected attacks, overall threat score)
+        """
+        detected_attacks = []
         threat_scores = []
         
         # Score from general pattern matching
@@ -134,57 +335,198 @@ class EnhancedAnalyzerService:
                 threat_scores.append(max_similarity * 100)
         
         # Score from address spoofing
-        if results["address_analysis"] and results["address_analysis"]["is_spoofed"]:
+        address_analysis = outcomes.get("address_spoofing")
+        if address_analysis and address_analysis["is_spoofed"]:
+            detected_attacks.append({
+                "type": "address_spoofing",
+                "severity": "CRITICAL",
+                "confidence": 0.9
+            })
             threat_scores.append(90)  # Critical threat
         
         # Score from SIM swapping
-        if results["sim_swap_analysis"] and results["sim_swap_analysis"]["is_sim_swap"]:
+        sim_swap_analysis = outcomes.get("sim_swapping")
+        if sim_swap_analysis and sim_swap_analysis["is_sim_swap"]:
+            detected_attacks.append({
+                "type": "sim_swapping",
+                "severity": "CRITICAL",
+                "confidence": 0.85
+            })
             threat_scores.append(85)  # Critical threat
         
         # Score from wallet stalking
-        if results["wallet_stalking_analysis"] and results["wallet_stalking_analysis"]["is_stalking"]:
+        wallet_stalking_analysis = outcomes.get("wallet_stalking")
+        if wallet_stalking_analysis and wallet_stalking_analysis["is_stalking"]:
+            detected_attacks.append({
+                "type": "wallet_stalking",
+                "severity": "HIGH",
+                "confidence": 0.75
+            })
             threat_scores.append(70)  # High threat
         
         # Score from red flags
-        red_flag_score = self._calculate_red_flag_score(content)
         threat_scores.append(red_flag_score)
         
         # Overall threat score (take maximum, but weight multiple detections)
-        if threat_scores:
-            base_score = max(threat_scores)
-            # Boost score if multiple attack types detected
-            if len(results["detected_attacks"]) > 1:
-                base_score = min(base_score * 1.2, 100)
-            results["overall_threat_score"] = round(base_score, 2)
-        
-        # Determine threat level
-        if results["overall_threat_score"] >= 80:
-            results["threat_level"] = "CRITICAL"
-        elif results["overall_threat_score"] >= 60:
-            results["threat_level"] = "HIGH"
-        elif results["overall_threat_score"] >= 40:
-            results["threat_level"] = "MEDIUM"
+        base_score = max(threat_scores)
+        # Boost score if multiple attack types detected
+        if len(detected_attacks) > 1:
+            base_score = min(base_score * 1.2, 100)
+        return detected_attacks, round(base_score, 2)
+    
+    def _threat_level(self, threat_score: float) -> str:
+        """Threat level for an overall threat score"""
+        if threat_score >= 80:
+            return "CRITICAL"
+        elif threat_score >= 60:
+            return "HIGH"
+        elif threat_score >= 40:
+            return "MEDIUM"
+        return "LOW"
+    
+    def _reuse_near_duplicate(self, planner: SearchPlanner, content: str, prescreen: Dict):
+        """
+        Prime the planner with the searches of a cached near-duplicate of content
+        
+        analyze_batch looks matches up in advance (prescreen["near_duplicate"]);
+        otherwise the cache is searched here. Every fingerprinted message is
+        counted as a hit or miss of the cache.
+        
+        Returns:
+            The NearDuplicateMatch reused, or None
+        """
+        near_duplicates = self.qdrant.near_duplicates
+        if not near_duplicates or prescreen["fingerprint"] is None:
+            return None
+        if "near_duplicate" in prescreen:
+            match = prescreen["near_duplicate"]
         else:
-            results["threat_level"] = "LOW"
+            match = near_duplicates.find(prescreen["fingerprint"])
+        if match:
+            planner.prime(content, match.executed)
+        near_duplicates.record(match)
+        return match
+    
+    def _clip(self, content: str) -> str:
+        """The part of content that is analyzed (LONG_DOCUMENT_MAX_CHARS)"""
+        return self.qdrant.chunker.clip(content) if self.qdrant.chunker else content
+    
+    def plan_searches(self, planner: SearchPlanner, content: str, context: Optional[Dict] = None) -> List[str]:
+        """
+        Register every search analyze_comprehensive will make for this message
         
-        # Generate recommendations
-        results["recommendations"] = self._generate_recommendations(results)
+        Returns:
+            The query texts planned
+        """
+        planner.plan(content, attack_types=None, limit=10, score_threshold=0.4)
+        query_texts = [content, self.qdrant.build_sim_swap_query(content, context)]
+        planner.plan(query_texts[1], attack_types=["sim_swapping"], limit=5, score_threshold=0.4)
+        if context and context.get("transaction_data"):
+            query_texts.append(self.qdrant.build_wallet_stalking_query(context["transaction_data"]))
+            planner.plan(query_texts[2], attack_types=["wallet_stalking"], limit=5, score_threshold=0.4)
+        return query_texts
+    
+    async def analyze_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        analyze_comprehensive for many messages at once
         
-        # Detailed analysis breakdown
-        results["detailed_analysis"] = {
-            "pattern_matches": general_results,
-            "red_flags_detected": self._detect_red_flags(content),
-            "addresses_found": addresses_in_content,
-            "threat_breakdown": {
-                "pattern_similarity": self._get_max_pattern_similarity(general_results),
-                "address_spoofing": 90 if (results["address_analysis"] and results["address_analysis"]["is_spoofed"]) else 0,
-                "sim_swapping": 85 if (results["sim_swap_analysis"] and results["sim_swap_analysis"]["is_sim_swap"]) else 0,
-                "wallet_stalking": 70 if (results["wallet_stalking_analysis"] and results["wallet_stalking_analysis"]["is_stalking"]) else 0,
-                "red_flags": red_flag_score
-            }
-        }
+        The cascade's cheap stages run for every message first; every query
+        text of the remaining messages is embedded in one encode call and
+        searched with one batched request per collection; the per-message
+        detectors then read their results from the shared planner.
         
-        return results
+        Args:
+            items: Dicts with content and optional user_address, known_addresses, context
+        
+        Returns:
+            One analysis per item, in order
+        """
+        # Cheap stages first, so messages the cascade settles are never embedded
+        prescreens = await asyncio.gather(*(
+            self._prescreen(
+                self._clip(item["content"]),
+                item.get("user_address"),
+                item.get("known_addresses"),
+                item.get("context"),
+                cascade=self.cascade
+            )
+            for item in items
+        ))
+        
+        # Near-duplicates of cached messages, or of an earlier message of this
+        # batch (its leader), are not searched themselves
+        near_duplicates = self.qdrant.near_duplicates
+        planner = SearchPlanner(self.qdrant)
+        leaders: List[Tuple[str, Dict]] = []
+        followers = []
+        for item, prescreen in zip(items, prescreens):
+            if prescreen["skip"]:
+                continue
+            content = self._clip(item["content"])
+            fingerprint = prescreen["fingerprint"]
+            if fingerprint is not None:
+                prescreen["near_duplicate"] = near_duplicates.find(fingerprint)
+                if prescreen["near_duplicate"]:
+                    continue
+                # Linear scan: batches are bounded by ANALYZE_BATCH_MAX_ITEMS
+                if any(
+                    hamming(fingerprint, leader["fingerprint"]) <= near_duplicates.radius
+                    for _, leader in leaders
+                ):
+                    followers.append(prescreen)
+                    continue
+                leaders.append((content, prescreen))
+            self.plan_searches(planner, content, item.get("context"))
+        await planner.execute()
+        
+        for content, leader in leaders:
+            near_duplicates.add(leader["fingerprint"], planner.snapshot(content), leader["generation"], sample=content)
+        for follower in followers:
+            follower["near_duplicate"] = near_duplicates.find(follower["fingerprint"])
+        
+        return list(await asyncio.gather(*(
+            self.analyze_comprehensive(
+                content=item["content"],
+                user_address=item.get("user_address"),
+                known_addresses=item.get("known_addresses"),
+                context=item.get("context"),
+                planner=planner,
+                prescreen=prescreen
+            )
+            for item, prescreen in zip(items, prescreens)
+        )))
+    
+    async def _run_detectors(self, detectors: Dict[str, Awaitable]) -> Tuple[Dict, Dict]:
+        """
+        Await detectors concurrently, each under detector_timeout
+        
+        A detector that times out or fails yields None and does not affect the
+        others. InferencePoolSaturated is re-raised so the API still answers 503.
+        
+        Returns:
+            (detector name -> result or None, detector name -> timing and status)
+        """
+        async def run(name: str, detector: Awaitable):
+            started = time.perf_counter()
+            outcome, status = None, "ok"
+            try:
+                outcome = await asyncio.wait_for(detector, timeout=self.detector_timeout)
+            except asyncio.TimeoutError:
+                status = "timeout"
+                print(f"Detector {name} timed out after {self.detector_timeout}s")
+            except InferencePoolSaturated:
+                raise
+            except Exception as e:
+                status = "error"
+                print(f"Detector {name} failed: {e}")
+            timing = {"ms": round((time.perf_counter() - started) * 1000, 1), "status": status}
+            return outcome, timing
+        
+        names = list(detectors.keys())
+        runs = await asyncio.gather(*(run(name, detectors[name]) for name in names))
+        outcomes = {name: outcome for name, (outcome, _) in zip(names, runs)}
+        timings = {name: timing for name, (_, timing) in zip(names, runs)}
+        return outcomes, timings
     
     def _get_max_pattern_similarity(self, general_results: Dict) -> float:
         """Get maximum pattern similarity score from results"""
@@ -199,35 +541,15 @@ class EnhancedAnalyzerService:
         
         return max(similarities) if similarities else 0.0
     
-    def _calculate_red_flag_score(self, content: str) -> float:
-        """Calculate threat score based on red flag keywords"""
-        content_lower = content.lower()
-        score = 0.0
-        
-        for category, keywords in self.red_flags.items():
-            matches = sum(1 for keyword in keywords if keyword in content_lower)
-            if category == "urgency":
-                score += matches * 15
-            elif category == "authority":
-                score += matches * 20
-            elif category == "financial":
-                score += matches * 25
-            elif category == "crypto_specific":
-                score += matches * 30
-        
-        return min(score, 100)
+    def _calculate_red_flag_score(self, content: str, keyword_scan: Optional[KeywordScan] = None) -> float:
+        """Calculate threat score based on red flag keywords (category weight per matched phrase)"""
+        keyword_scan = keyword_scan or self.qdrant.keywords.scan(content)
+        return keyword_scan.score("red_flags", cap=100)
     
-    def _detect_red_flags(self, content: str) -> List[str]:
+    def _detect_red_flags(self, content: str, keyword_scan: Optional[KeywordScan] = None) -> List[str]:
         """Detect specific red flag phrases in content"""
-        content_lower = content.lower()
-        detected = []
-        
-        for category, keywords in self.red_flags.items():
-            for keyword in keywords:
-                if keyword in content_lower:
-                    detected.append(f"{category}: {keyword}")
-        
-        return detected
+        keyword_scan = keyword_scan or self.qdrant.keywords.scan(content)
+        return [f"{entry.category}: {entry.phrase}" for entry in keyword_scan.matches("red_flags")]
     
     def _generate_recommendations(self, analysis_results: Dict) -> List[str]:
         """Generate actionable recommendations based on analysis"""
@@ -3,18 +3,70 @@ Enhanced Qdrant Service - Specialized for Web3 Social Engineering Detection
 Handles SIM swapping, wallet stalking, address spoofing, and other crypto-specific attacks
 """
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue, MatchAny, PayloadSchemaType, BinaryQuantization, ScalarQuantization, SearchRequest, CreateAlias, CreateAliasOperation
+from services.embedding_backends import BACKENDS, DEFAULT_MODEL_NAME, EmbeddingBackend, create_backend, model_id_for
+from services.embedding_cache import EmbeddingCache
+from services.batching_encoder import MicroBatchEncoder
+from services.inference_pool import InferencePool
+from services.collection_config import CollectionSettings, load_collection_settings
+from services.local_index import LocalIndex
+from services.keyword_engine import KeywordEngine, KeywordScan
+from services.long_document import DocumentChunker
+from services.payload_store import PayloadStore, public_payload
+from services.result_cache import SearchResultCache
+from services.simhash import NearDuplicateCache
+from services.collection_stats import CollectionStatsRefresher
+from services.pattern_sync import PAYLOAD_SCHEMA_VERSION, pattern_content_hash
+from services.search_fanout import SearchLatencyTracker, SearchResults, hedged, hedging_from_env
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 import hashlib
 import re
+import threading
+import asyncio
+import time
+import httpx
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from services.search_planner import SearchPlanner
+    from services.startup import StartupState
+
 # Load environment variables
 load_dotenv()
 
+# "per_type": one collection per attack type (original layout)
+# "unified": every pattern in one collection, filtered/grouped by the attack_type payload
+STORAGE_LAYOUTS = ("per_type", "unified")
+UNIFIED_COLLECTION = "attack_patterns"
+
+# Keyword payload indexes on the unified collection
+UNIFIED_PAYLOAD_INDEXES = ("attack_type", "severity", "tactic")
+
+def load_encoder(backend_name: str, model_name: str) -> EmbeddingBackend:
+    """
+    Create the embedding backend, or connect to the shared local sidecar
+    when EMBEDDING_SIDECAR_SOCKET is set (one model per host instead of per worker)
+    """
+    socket_path = os.getenv("EMBEDDING_SIDECAR_SOCKET")
+    if socket_path:
+        from services.embedding_sidecar import SidecarEncoder
+        return SidecarEncoder(socket_path, backend_name, model_name)
+    return create_backend(backend_name, model_name)
+
+# Encoder held by each worker of a process inference pool
+_worker_encoder: Optional[EmbeddingBackend] = None
+
+def _init_encoder_worker(backend_name: str, model_name: str):
+    """Load the embedding backend once per inference pool process"""
+    global _worker_encoder
+    _worker_encoder = load_encoder(backend_name, model_name)
+
+def _encode_in_worker(texts: List[str]) -> List[List[float]]:
+    """Encode texts inside an inference pool process"""
+    return _worker_encoder.encode(texts)
+
 class EnhancedQdrantService:
     """
     Enhanced Qdrant service with specialized collections for different attack types
@@ -31,16 +83,60 @@ class EnhancedQdrantService:
         self.qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
         self.qdrant_api_key = os.getenv("QDRANT_API_KEY", None)
         
-        # Initialize Qdrant client (with API key if provided for Qdrant Cloud)
-        if self.qdrant_api_key:
-            self.client = QdrantClient(url=self.qdrant_url, api_key=self.qdrant_api_key)
-        else:
-            self.client = QdrantClient(url=self.qdrant_url)
+        # Async Qdrant client so searches never block the event loop.
+        # REST uses a pooled keep-alive connection set; gRPC is opt-in.
+        self.search_timeout = float(os.getenv("QDRANT_SEARCH_TIMEOUT", "5"))
+        # A fan-out across collections returns whatever finished within the deadline;
+        # with hedging, a search slower than its collection's p95 is sent a second time
+        self.search_deadline = float(os.getenv("QDRANT_SEARCH_DEADLINE", "2"))
+        self.search_hedging = hedging_from_env()
+        self.search_latency = SearchLatencyTracker()
+        self.client = AsyncQdrantClient(
+            url=self.qdrant_url,
+            api_key=self.qdrant_api_key,
+            prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes"),
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            timeout=int(os.getenv("QDRANT_TIMEOUT", "10")),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("QDRANT_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("QDRANT_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=float(os.getenv("QDRANT_KEEPALIVE_EXPIRY", "30"))
+            )
+        )
         
         # Use a better model for financial/crypto context
         # all-mpnet-base-v2 is better for semantic similarity
-        self.model = SentenceTransformer('all-mpnet-base-v2')
+        # EMBEDDING_BACKEND selects torch (reference), onnx or onnx-int8.
+        # The model itself is loaded lazily (see encoder) so importing the app stays fast.
+        self.backend_name = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        if self.backend_name not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {self.backend_name} (choose from {', '.join(BACKENDS)})")
+        self.model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL_NAME)
+        self.model_id = model_id_for(self.backend_name, self.model_name)
         self.vector_size = 768  # Size of vectors for this model
+        self._encoder: Optional[EmbeddingBackend] = None
+        self._encoder_lock = threading.Lock()
+        
+        # Cross-request embedding cache (same phrases recur constantly);
+        # keyed by model plus backend so quantized vectors never mix with reference ones
+        self.embedding_cache = EmbeddingCache.from_env(self.model_id)
+        
+        # Optional micro-batching of concurrent encode calls; the batch worker is
+        # the only caller of the model (see _encode_batch for process pools)
+        self.batch_encoder = None
+        if os.getenv("EMBEDDING_BATCHING", "false").lower() in ("1", "true", "yes"):
+            self.batch_encoder = MicroBatchEncoder(
+                self._encode_batch,
+                max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32")),
+                max_wait_ms=float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+                max_pending=int(os.getenv("EMBEDDING_BATCH_MAX_PENDING", "256"))
+            )
+        
+        # Dedicated pool so embedding never runs on the event loop
+        self.inference_pool = InferencePool.from_env()
+        if self.inference_pool.kind == "process":
+            self.inference_pool.initializer = _init_encoder_worker
+            self.inference_pool.initargs = (self.backend_name, self.model_name)
         
         # Collection names
         self.collections = {
@@ -51,29 +147,450 @@ class EnhancedQdrantService:
             "transaction_analysis": "transaction_analysis_patterns"
         }
         
-        # Initialize all collections
-        self._ensure_all_collections()
+        # Per attack type quantization / on-disk / rescoring settings
+        self.collection_settings = load_collection_settings(list(self.collections.keys()))
+        
+        # Storage layout (STORAGE_LAYOUT=unified stores every pattern in one collection;
+        # migrate existing data with scripts/migrate_to_unified.py)
+        self.storage_layout = os.getenv("STORAGE_LAYOUT", "per_type").lower()
+        if self.storage_layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"Unknown storage layout: {self.storage_layout} (choose from {', '.join(STORAGE_LAYOUTS)})")
+        self.unified_collection = os.getenv("UNIFIED_COLLECTION", UNIFIED_COLLECTION)
+        self.unified_settings = load_collection_settings(["unified"])["unified"]
+        
+        # Optional in-process exact index (LOCAL_INDEX=true), loaded during warm-up
+        self.local_index = LocalIndex.from_env(self.vector_size)
+        self._local_index_task: Optional[asyncio.Task] = None
+        
+        # Pattern payloads kept in-process so searches only fetch ids and scores
+        self.payload_store = PayloadStore.from_env()
+        self._payload_store_task: Optional[asyncio.Task] = None
+        
+        # Results of identical searches are reused until a pattern write
+        # invalidates the attack type (or SEARCH_CACHE_TTL_SECONDS passes)
+        self.result_cache = SearchResultCache.from_env()
+        
+        # Collection stats for /health and /patterns, refreshed in the background
+        self.stats_refresher = CollectionStatsRefresher(
+            self.get_collection_stats,
+            self.check_health,
+            interval=float(os.getenv("COLLECTION_STATS_REFRESH_SECONDS", "15"))
+        )
+        
+        # Keyword dictionaries (red flags, SIM swap indicators) compiled into one automaton
+        self.keywords = KeywordEngine.from_env()
+        
+        # Texts longer than the model's sequence length are searched window by window
+        self.chunker = DocumentChunker.from_env()
+        
+        # Semantic search results of recent messages, reused by their near-duplicates
+        self.near_duplicates = NearDuplicateCache.from_env()
+        
+        # Collections are created/migrated on first use or during warm-up,
+        # so startup does not block on (or fail because of) Qdrant
+        self._collections_ready = False
+        self._collections_lock = asyncio.Lock()
+    
+    @property
+    def encoder(self) -> EmbeddingBackend:
+        """Embedding backend, loaded on first use"""
+        if self._encoder is None:
+            with self._encoder_lock:
+                if self._encoder is None:
+                    encoder = load_encoder(self.backend_name, self.model_name)
+                    if encoder.dimension != self.vector_size:
+                        raise ValueError(
+                            f"Embedding backend {encoder.model_id} produces {encoder.dimension}-dim vectors, "
+                            f"collections expect {self.vector_size}"
+                        )
+                    self._encoder = encoder
+        return self._encoder
+    
+    def encoder_info(self) -> Dict:
+        """Backend description without forcing the model to load"""
+        if self._encoder is None:
+            return {"backend": self.backend_name, "model": self.model_name, "loaded": False}
+        return {**self._encoder.info(), "loaded": True}
+    
+    async def ensure_collections(self, start_refreshers: bool = True) -> bool:
+        """
+        Create/migrate all collections once
+        
+        Args:
+            start_refreshers: Also start the local index and payload store
+                refreshers, which load them in the background (warm_up loads
+                them itself first)
+        
+        Returns:
+            True when collections are ready, False if Qdrant could not be reached (retried on next call)
+        """
+        if not self._collections_ready:
+            async with self._collections_lock:
+                if not self._collections_ready:
+                    try:
+                        await self._ensure_all_collections()
+                        self._collections_ready = True
+                    except Exception as e:
+                        print(f"Warning: Could not initialize collections: {e}")
+        if self._collections_ready and start_refreshers:
+            # Without warm-up (WARMUP_ON_STARTUP=false) the first search starts it
+            self.start_local_index(sync_now=True)
+            self.start_payload_store(sync_now=True)
+        return self._collections_ready
     
-    def _ensure_all_collections(self):
-        """Create all collections if they don't exist"""
-        for collection_name in self.collections.values():
+    async def warm_up(self, startup: "StartupState"):
+        """
+        Load the model, create collections and run dummy encodes and searches
+        
+        Heavy steps run on the inference pool. Phase timings are recorded in startup.
+        """
+        with startup.phase("model_load"):
+            await self._encode_on_pool(["warm up"])
+        
+        # Keep retrying until Qdrant is reachable
+        with startup.phase("collections"):
+            delay = 1.0
+            while not await self.ensure_collections(start_refreshers=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        
+        if self.local_index and self._local_index_task is None:
+            with startup.phase("local_index"):
+                await self.sync_local_index(full=True)
+            self.start_local_index(sync_now=False)
+        
+        if self.payload_store is not None and self._payload_store_task is None:
+            with startup.phase("payload_store"):
+                await self.sync_payload_store()
+            self.start_payload_store(sync_now=False)
+        
+        with startup.phase("warmup_encode"):
+            # Bypass the cache so the model actually runs (first calls are slow)
+            dummy_texts = ["warm up", "urgent: verify your wallet seed phrase to avoid suspension"]
+            for _ in range(2):
+                await self._encode_on_pool(dummy_texts)
+        
+        with startup.phase("warmup_search"):
+            vector = (await self._encode_on_pool(["warm up search"]))[0]
+            await self.search_by_vector(vector, limit=1, score_threshold=0.0)
+    
+    def attack_type_filter(self, attack_type: str) -> Optional[Filter]:
+        """Filter selecting one attack type inside its collection (only needed in the unified layout)"""
+        if self.storage_layout == "unified":
+            return Filter(must=[FieldCondition(key="attack_type", match=MatchValue(value=attack_type))])
+        return None
+    
+    async def _count_points(self, attack_type: str) -> int:
+        result = await self.client.count(
+            collection_name=self.collection_for(attack_type),
+            count_filter=self.attack_type_filter(attack_type),
+            exact=True
+        )
+        return result.count
+    
+    async def scroll_points(self, attack_type: str, batch_size: int = 1000, with_vectors: bool = True) -> List:
+        """All points (with payloads and, unless with_vectors=False, vectors) of one attack type"""
+        records = []
+        offset = None
+        while True:
+            batch, offset = await self.client.scroll(
+                collection_name=self.collection_for(attack_type),
+                scroll_filter=self.attack_type_filter(attack_type),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            records.extend(batch)
+            if offset is None or not batch:
+                return records
+    
+    async def sync_local_index(self, full: bool = False):
+        """
+        Load attack types into the local index
+        
+        Args:
+            full: Reload every attack type; otherwise only those whose point count changed
+        """
+        attack_types = list(self.collections.keys())
+        counts = dict(zip(attack_types, await asyncio.gather(*(
+            self._count_points(attack_type) for attack_type in attack_types
+        ))))
+        
+        total = sum(counts.values())
+        if total > self.local_index.max_points:
+            self.local_index.clear(total)
+            return
+        
+        for attack_type, count in counts.items():
+            if full or self.local_index.size(attack_type) != count:
+                self.local_index.load(attack_type, await self.scroll_points(attack_type))
+        self.local_index.finish_sync(full)
+    
+    def start_local_index(self, sync_now: bool):
+        """
+        Start the background refresher once (no-op without LOCAL_INDEX)
+        
+        Args:
+            sync_now: Load the index first instead of after refresh_seconds
+        """
+        if self.local_index and self._local_index_task is None:
+            self._local_index_task = asyncio.create_task(self._refresh_local_index(sync_now))
+    
+    async def _refresh_local_index(self, sync_now: bool = False):
+        """Background refresh: reload changed attack types, with a periodic full reload"""
+        if sync_now:
+            try:
+                await self.sync_local_index(full=True)
+            except Exception as e:
+                print(f"Warning: Local index load failed: {e}")
+        while True:
+            await asyncio.sleep(self.local_index.refresh_seconds)
+            try:
+                await self.sync_local_index(full=self.local_index.needs_full_sync())
+            except Exception as e:
+                print(f"Warning: Local index refresh failed: {e}")
+    
+    async def sync_payload_store(self, attack_types: Optional[List[str]] = None):
+        """
+        Load pattern payloads (no vectors) into the payload store
+        
+        Args:
+            attack_types: Attack types to reload (None = all)
+        """
+        all_types = list(self.collections.keys())
+        total = sum(await asyncio.gather(*(self._count_points(attack_type) for attack_type in all_types)))
+        if total > self.payload_store.max_points:
+            self.payload_store.clear(total)
+            return
+        
+        for attack_type in attack_types or all_types:
+            self.payload_store.load(attack_type, await self.scroll_points(attack_type, with_vectors=False))
+        self.payload_store.finish_sync()
+    
+    def start_payload_store(self, sync_now: bool):
+        """
+        Start the background refresher once (no-op without PAYLOAD_STORE)
+        
+        Args:
+            sync_now: Load the store first instead of after refresh_seconds
+        """
+        if self.payload_store is not None and self._payload_store_task is None:
+            self._payload_store_task = asyncio.create_task(self._refresh_payload_store(sync_now))
+    
+    async def _refresh_payload_store(self, sync_now: bool = False):
+        """Background full reload (catches edits made by other processes)"""
+        if sync_now:
+            try:
+                await self.sync_payload_store()
+            except Exception as e:
+                print(f"Warning: Payload store load failed: {e}")
+        while True:
+            await asyncio.sleep(self.payload_store.refresh_seconds)
             try:
-                self.client.get_collection(collection_name)
-            except Exception:
-                # Collection doesn't exist, create it
-                self.client.create_collection(
+                await self.sync_payload_store()
+            except Exception as e:
+                print(f"Warning: Payload store refresh failed: {e}")
+    
+    async def encode_batch_async(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encode one large batch for ingestion
+        
+        Bypasses the embedding cache (bulk pattern texts are seen once and would
+        evict hot query vectors) and the micro-batcher (the batch is already large).
+        """
+        return await self._encode_on_pool(texts)
+    
+    async def _encode_on_pool(self, texts: List[str]) -> List[List[float]]:
+        """Run the model on the inference pool, bypassing cache and batching"""
+        if self.inference_pool.kind == "process":
+            return await self.inference_pool.run(_encode_in_worker, texts)
+        return await self.inference_pool.run(self._encode_uncached, texts)
+    
+    async def _ensure_all_collections(self):
+        """Create all collections if they don't exist, migrating existing ones to their settings"""
+        if self.storage_layout == "unified":
+            await self.ensure_unified_collection()
+            return
+        
+        for attack_type, collection_name in self.collections.items():
+            await self.ensure_collection(collection_name, self.collection_settings[attack_type], aliased=True)
+    
+    async def ensure_unified_collection(self, collection_name: Optional[str] = None):
+        """Create the unified collection (or a shadow copy of it) and its keyword payload indexes"""
+        info = await self.ensure_collection(
+            collection_name or self.unified_collection,
+            self.unified_settings,
+            aliased=collection_name is None
+        )
+        collection_name = collection_name or self.unified_collection
+        indexed = set((info.payload_schema or {}).keys()) if info else set()
+        for field_name in UNIFIED_PAYLOAD_INDEXES:
+            if field_name not in indexed:
+                await self.client.create_payload_index(
                     collection_name=collection_name,
-                    vectors_config=VectorParams(
-                        size=self.vector_size,
-                        distance=Distance.COSINE
-                    )
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType.KEYWORD
                 )
+    
+    async def ensure_collection(self, collection_name: str, settings: CollectionSettings, aliased: bool = False):
+        """
+        Create one collection, or migrate it to its settings if it exists
+        
+        Args:
+            collection_name: Collection (or alias) name
+            settings: Quantization, on-disk and HNSW settings
+            aliased: Create a physical collection behind an alias of this name
+                (live names), so PatternSync rebuilds can swap it atomically later
+        
+        Returns:
+            Existing collection info (None when the collection was just created)
+        """
+        try:
+            info = await self.client.get_collection(collection_name)
+        except Exception:
+            # Collection doesn't exist, create it
+            physical = await self.unused_physical_name(collection_name) if aliased else collection_name
+            await self.client.create_collection(
+                collection_name=physical,
+                vectors_config=settings.vectors_config(self.vector_size),
+                quantization_config=settings.quantization_config(),
+                hnsw_config=settings.hnsw_config()
+            )
+            if aliased:
+                try:
+                    await self.client.update_collection_aliases(change_aliases_operations=[
+                        CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=collection_name))
+                    ])
+                except Exception:
+                    # Nothing was live under this name yet; do not leave an orphan behind
+                    await self.client.delete_collection(physical)
+                    raise
+                print(f"Created collection: {physical} (alias {collection_name})")
+            else:
                 print(f"Created collection: {collection_name}")
+            return None
+        
+        await self._migrate_collection(collection_name, info, settings)
+        return info
+    
+    async def unused_physical_name(self, collection_name: str) -> str:
+        """Free physical collection name for a live name (timestamped, e.g. for shadow rebuilds)"""
+        base = f"{collection_name}__{time.strftime('%Y%m%d%H%M%S')}"
+        name, attempt = base, 1
+        while await self.client.collection_exists(name):
+            attempt += 1
+            name = f"{base}_{attempt}"
+        return name
+    
+    async def physical_collection(self, collection_name: str) -> Optional[str]:
+        """Collection behind a live name: the alias target, the name itself for plain collections, None when missing"""
+        aliases = {alias.alias_name: alias.collection_name for alias in (await self.client.get_aliases()).aliases}
+        if collection_name in aliases:
+            return aliases[collection_name]
+        if await self.client.collection_exists(collection_name):
+            return collection_name
+        return None
+    
+    async def _migrate_collection(self, collection_name: str, info, settings: CollectionSettings):
+        """Apply quantization, on-disk and HNSW settings to an existing collection when they differ"""
+        current_quantization = info.config.quantization_config
+        if isinstance(current_quantization, ScalarQuantization):
+            current_mode = "scalar"
+        elif isinstance(current_quantization, BinaryQuantization):
+            current_mode = "binary"
+        else:
+            current_mode = "none"
+        
+        vectors = info.config.params.vectors
+        current_on_disk = bool(getattr(vectors, "on_disk", False))
+        
+        current_hnsw = info.config.hnsw_config
+        hnsw_changed = settings.hnsw_differs(current_hnsw)
+        
+        if current_mode == settings.quantization and current_on_disk == settings.on_disk and not hnsw_changed:
+            return
+        
+        try:
+            await self.client.update_collection(
+                collection_name=collection_name,
+                vectors_config={"": settings.vectors_diff()},
+                quantization_config=settings.quantization_diff(),
+                hnsw_config=settings.hnsw_config() if hnsw_changed else None
+            )
+            print(
+                f"Migrated collection {collection_name}: quantization {current_mode} -> {settings.quantization}, "
+                f"on_disk {current_on_disk} -> {settings.on_disk}, "
+                f"hnsw m={current_hnsw.m}/ef_construct={current_hnsw.ef_construct} -> "
+                f"m={settings.m or current_hnsw.m}/ef_construct={settings.ef_construct or current_hnsw.ef_construct}"
+            )
+        except Exception as e:
+            print(f"Warning: Could not migrate collection {collection_name}: {e}")
     
     def encode_text(self, text: str) -> List[float]:
-        """Convert text to vector representation"""
-        vector = self.model.encode(text, normalize_embeddings=True).tolist()
-        return vector
+        """Convert text to vector representation (served from the embedding cache when possible)"""
+        return self.encode_texts([text])[0]
+    
+    def encode_texts(self, texts: List[str]) -> List[List[float]]:
+        """Convert many texts to vectors, encoding all cache misses in one batch"""
+        vectors: List[Optional[List[float]]] = [self.embedding_cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            encoded = self._encode_misses([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+                self.embedding_cache.put(texts[i], vector)
+        
+        return vectors
+    
+    async def encode_text_async(self, text: str) -> List[float]:
+        """Like encode_text, but the model runs on the inference pool instead of the event loop"""
+        return (await self.encode_texts_async([text]))[0]
+    
+    async def encode_texts_async(self, texts: List[str]) -> List[List[float]]:
+        """Like encode_texts, but the model runs on the inference pool instead of the event loop"""
+        # Cache lookups are cheap and stay on the loop; only misses hop to the pool
+        vectors: List[Optional[List[float]]] = [self.embedding_cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            if self.batch_encoder:
+                # Queued straight from the loop so concurrent requests share batches
+                encoded = await self.batch_encoder.encode_many_async(missing_texts)
+            elif self.inference_pool.kind == "process":
+                # Worker processes hold their own model; the cache stays in this process
+                encoded = await self.inference_pool.run(_encode_in_worker, missing_texts)
+            else:
+                encoded = await self.inference_pool.run(self._encode_misses, missing_texts)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+                self.embedding_cache.put(texts[i], vector)
+        
+        return vectors
+    
+    def _encode_misses(self, texts: List[str]) -> List[List[float]]:
+        """Encode cache misses, through the micro-batcher when enabled"""
+        if self.batch_encoder:
+            return self.batch_encoder.encode_many(texts)
+        return self._encode_uncached(texts)
+    
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encode one micro-batch (runs on the batcher's worker thread)
+        
+        With a process inference pool the model lives in the worker processes,
+        so each batch is handed to one of them; otherwise the batcher thread
+        runs the model itself, off the event loop.
+        """
+        if self.inference_pool.kind == "process":
+            return self.inference_pool.executor.submit(_encode_in_worker, texts).result()
+        return self._encode_uncached(texts)
+    
+    def _encode_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Run the embedding backend on a batch of texts"""
+        return self.encoder.encode(texts)
     
     def extract_wallet_addresses(self, text: str) -> List[str]:
         """Extract Ethereum-style addresses from text"""
@@ -114,7 +631,7 @@ class EnhancedQdrantService:
         attack_types: Optional[List[str]] = None,
         limit: int = 5,
         score_threshold: float = 0.5
-    ) -> Dict[str, List[Dict]]:
+    ) -> SearchResults:
         """
         Search across multiple collections for attack patterns
         
@@ -125,50 +642,437 @@ class EnhancedQdrantService:
             score_threshold: Minimum similarity score
         
         Returns:
-            Dict mapping attack type to list of similar patterns
+            SearchResults mapping attack type to list of similar patterns; attack
+            types that failed or missed QDRANT_SEARCH_DEADLINE are listed in `.missing`
+        """
+        if self.chunker and self.chunker.is_long(query_text):
+            return await self.search_long_document(
+                query_text,
+                attack_types=attack_types,
+                limit=limit,
+                score_threshold=score_threshold
+            )
+        query_vector = await self.encode_text_async(query_text)
+        return await self.search_by_vector(
+            query_vector,
+            attack_types=attack_types,
+            limit=limit,
+            score_threshold=score_threshold
+        )
+    
+    async def search_long_document(
+        self,
+        query_text: str,
+        attack_types: Optional[List[str]] = None,
+        limit: int = 5,
+        score_threshold: float = 0.5
+    ) -> SearchResults:
+        """
+        search_attack_patterns for texts longer than one window
+        
+        The text is split into overlapping windows (see DocumentChunker), which
+        are encoded and searched batch_size at a time; each pattern keeps its
+        best score over all windows. Memory stays bounded by one batch of
+        vectors plus the pooled hits.
+        
+        Returns:
+            SearchResults like search_attack_patterns; every hit carries the
+            index of the window that matched best under "window"
         """
-        query_vector = self.encode_text(query_text)
+        windows, truncated = self.chunker.split(query_text)
+        self.chunker.documents += 1
+        self.chunker.windows_searched += len(windows)
+        if truncated:
+            self.chunker.truncated += 1
+        
+        pooled = SearchResults()
+        batch_size = self.chunker.batch_size
+        for start in range(0, len(windows), batch_size):
+            batch = windows[start:start + batch_size]
+            vectors = await self.encode_texts_async(batch)
+            batch_results = await self.search_batch_by_vector(
+                vectors,
+                attack_types=attack_types,
+                limit=limit,
+                score_threshold=score_threshold
+            )
+            for offset, results in enumerate(batch_results):
+                self.chunker.pool(pooled, results, start + offset)
+        return self.chunker.finish(pooled, limit)
+    
+    async def search_by_vector(
+        self,
+        query_vector: List[float],
+        attack_types: Optional[List[str]] = None,
+        limit: int = 5,
+        score_threshold: float = 0.5
+    ) -> SearchResults:
+        """
+        Search attack pattern collections with an already encoded query
+        
+        Args:
+            query_vector: Normalized query embedding
+            attack_types: List of attack types to search (None = search all)
+            limit: Number of results per collection
+            score_threshold: Minimum similarity score
+        
+        Returns:
+            SearchResults mapping attack type to list of similar patterns; attack
+            types that failed or missed the deadline are listed in `.missing`
+        """
+        await self.ensure_collections()
+        
+        # Determine which attack types to search
+        types_to_search = attack_types if attack_types else list(self.collections.keys())
+        
+        if not self.result_cache:
+            searched = await self._search_types(query_vector, types_to_search, limit, score_threshold)
+            return SearchResults(
+                {attack_type: searched[attack_type] or [] for attack_type in types_to_search},
+                missing=[attack_type for attack_type in types_to_search if searched[attack_type] is None]
+            )
+        
+        cache_key = self.result_cache.key(query_vector, limit, score_threshold)
         results = {}
+        for attack_type in types_to_search:
+            hits = self.result_cache.get(cache_key, attack_type)
+            if hits is not None:
+                results[attack_type] = hits
         
-        # Determine which collections to search
-        collections_to_search = (
-            [self.collections[at] for at in attack_types]
-            if attack_types
-            else list(self.collections.values())
+        uncached = [attack_type for attack_type in types_to_search if attack_type not in results]
+        failed = []
+        if uncached:
+            # Generations are read before searching so a concurrent write discards these results
+            generations = {attack_type: self.result_cache.generation(attack_type) for attack_type in uncached}
+            searched = await self._search_types(query_vector, uncached, limit, score_threshold)
+            for attack_type in uncached:
+                hits = searched[attack_type]
+                if hits is None:
+                    failed.append(attack_type)
+                else:
+                    self.result_cache.put(cache_key, attack_type, hits, generations[attack_type])
+                results[attack_type] = hits or []
+        
+        return SearchResults(
+            {attack_type: results[attack_type] for attack_type in types_to_search},
+            missing=failed
         )
+    
+    async def _search_types(
+        self,
+        query_vector: List[float],
+        types_to_search: List[str],
+        limit: int,
+        score_threshold: float
+    ) -> Dict[str, Optional[List[Dict]]]:
+        """Search the local index, the unified collection or each per-type collection (None = search failed)"""
+        # Small pattern sets are answered in-process with exact cosine search
+        if self.local_index and self.local_index.covers(types_to_search):
+            return {
+                attack_type: self.local_index.search(attack_type, query_vector, limit, score_threshold)
+                for attack_type in types_to_search
+            }
         
-        for collection_name in collections_to_search:
-            try:
-                search_results = self.client.search(
+        if self.storage_layout == "unified":
+            return await self._search_unified(query_vector, types_to_search, limit, score_threshold)
+        
+        # Fan out across collections concurrently; a slow or unreachable collection
+        # costs at most the deadline, not its full client timeout
+        tasks = {
+            attack_type: asyncio.create_task(
+                self._search_collection(attack_type, query_vector, limit, score_threshold)
+            )
+            for attack_type in types_to_search
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.search_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.search_latency.deadline_misses += 1
+            late = [attack_type for attack_type, task in tasks.items() if task in pending]
+            print(f"Search deadline of {self.search_deadline}s expired; missing {', '.join(late)}")
+        return {
+            attack_type: task.result() if task in done else None
+            for attack_type, task in tasks.items()
+        }
+    
+    async def search_batch_by_vector(
+        self,
+        query_vectors: List[List[float]],
+        attack_types: Optional[List[str]] = None,
+        limit: int = 5,
+        score_threshold: float = 0.5
+    ) -> List[SearchResults]:
+        """
+        search_by_vector for many queries, with one batched request per collection
+        
+        Returns:
+            One SearchResults per query vector, in order
+        """
+        await self.ensure_collections()
+        types_to_search = attack_types if attack_types else list(self.collections.keys())
+        results: List[Dict[str, List[Dict]]] = [{} for _ in query_vectors]
+        missing: List[List[str]] = [[] for _ in query_vectors]
+        
+        cache_keys = []
+        if self.result_cache:
+            for i, vector in enumerate(query_vectors):
+                cache_keys.append(self.result_cache.key(vector, limit, score_threshold))
+                for attack_type in types_to_search:
+                    hits = self.result_cache.get(cache_keys[i], attack_type)
+                    if hits is not None:
+                        results[i][attack_type] = hits
+        
+        rows = [i for i in range(len(query_vectors)) if len(results[i]) < len(types_to_search)]
+        if rows:
+            uncached = [attack_type for attack_type in types_to_search if any(attack_type not in results[i] for i in rows)]
+            generations = {
+                attack_type: self.result_cache.generation(attack_type) for attack_type in uncached
+            } if self.result_cache else {}
+            searched = await self._search_types_batch(
+                [query_vectors[i] for i in rows], uncached, limit, score_threshold
+            )
+            for i, row_results in zip(rows, searched):
+                for attack_type in uncached:
+                    if attack_type in results[i]:
+                        continue
+                    hits = row_results[attack_type]
+                    if hits is None:
+                        missing[i].append(attack_type)
+                    elif self.result_cache:
+                        self.result_cache.put(cache_keys[i], attack_type, hits, generations[attack_type])
+                    results[i][attack_type] = hits or []
+        
+        return [
+            SearchResults({attack_type: row[attack_type] for attack_type in types_to_search}, missing=row_missing)
+            for row, row_missing in zip(results, missing)
+        ]
+    
+    async def _search_types_batch(
+        self,
+        query_vectors: List[List[float]],
+        types_to_search: List[str],
+        limit: int,
+        score_threshold: float
+    ) -> List[Dict[str, Optional[List[Dict]]]]:
+        """_search_types for many query vectors (None = search failed)"""
+        if (self.local_index and self.local_index.covers(types_to_search)) or self.storage_layout == "unified":
+            # The local index needs no round trips; grouped unified queries have no batch form
+            return list(await asyncio.gather(*(
+                self._search_types(vector, types_to_search, limit, score_threshold)
+                for vector in query_vectors
+            )))
+        
+        tasks = {
+            attack_type: asyncio.create_task(
+                self._search_collection_batch(attack_type, query_vectors, limit, score_threshold)
+            )
+            for attack_type in types_to_search
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.search_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.search_latency.deadline_misses += 1
+            late = [attack_type for attack_type, task in tasks.items() if task in pending]
+            print(f"Batch search deadline of {self.search_deadline}s expired; missing {', '.join(late)}")
+        
+        by_type = {
+            attack_type: task.result() if task in done else [None] * len(query_vectors)
+            for attack_type, task in tasks.items()
+        }
+        return [
+            {attack_type: by_type[attack_type][i] for attack_type in types_to_search}
+            for i in range(len(query_vectors))
+        ]
+    
+    async def _search_collection_batch(
+        self,
+        attack_type: str,
+        query_vectors: List[List[float]],
+        limit: int,
+        score_threshold: float
+    ) -> List[Optional[List[Dict]]]:
+        """Search one collection with many query vectors in a single request (None per query on errors)"""
+        collection_name = self.collections[attack_type]
+        with_payload = not self._payloads_local()
+        search_params = self.collection_settings[attack_type].search_params()
+        try:
+            batches = await asyncio.wait_for(
+                self.client.search_batch(
                     collection_name=collection_name,
-                    query_vector=query_vector,
-                    limit=limit,
-                    score_threshold=score_threshold
-                )
-                
-                formatted_results = []
-                for result in search_results:
-                    formatted_results.append({
-                        "id": result.id,
-                        "score": result.score,
-                        "payload": result.payload
-                    })
-                
-                # Get collection type name
-                collection_type = next(
-                    k for k, v in self.collections.items() if v == collection_name
+                    requests=[
+                        SearchRequest(
+                            vector=vector,
+                            limit=limit,
+                            score_threshold=score_threshold,
+                            params=search_params,
+                            with_payload=with_payload
+                        )
+                        for vector in query_vectors
+                    ],
+                    timeout=max(1, int(self.search_timeout))
+                ),
+                timeout=self.search_timeout
+            )
+            if with_payload:
+                return [self._format_hits(points) for points in batches]
+            return [await self._hits_from_store(attack_type, collection_name, points) for points in batches]
+        except asyncio.TimeoutError:
+            print(f"Error batch searching {collection_name}: timed out after {self.search_timeout}s")
+            return [None] * len(query_vectors)
+        except Exception as e:
+            print(f"Error batch searching {collection_name}: {e}")
+            return [None] * len(query_vectors)
+    
+    async def _search_collection(
+        self,
+        attack_type: str,
+        query_vector: List[float],
+        limit: int,
+        score_threshold: float
+    ) -> Optional[List[Dict]]:
+        """Search one collection (None on errors and timeouts)"""
+        collection_name = self.collections[attack_type]
+        with_payload = not self._payloads_local()
+        
+        async def search():
+            started = time.perf_counter()
+            try:
+                points = await asyncio.wait_for(
+                    self.client.search(
+                        collection_name=collection_name,
+                        query_vector=query_vector,
+                        limit=limit,
+                        score_threshold=score_threshold,
+                        search_params=self.collection_settings[attack_type].search_params(),
+                        with_payload=with_payload,
+                        timeout=max(1, int(self.search_timeout))
+                    ),
+                    timeout=self.search_timeout
                 )
-                results[collection_type] = formatted_results
-            except Exception as e:
-                print(f"Error searching {collection_name}: {e}")
-                results[collection_name] = []
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Timed out, lost a hedge race or hit the deadline: it took at least this long
+                elapsed = min(time.perf_counter() - started, self.search_deadline)
+                self.search_latency.record(collection_name, elapsed, finished=False)
+                raise
+            self.search_latency.record(collection_name, time.perf_counter() - started)
+            return points
         
-        return results
+        hedge_after = self.search_latency.hedge_delay(collection_name) if self.search_hedging else None
+        try:
+            search_results = await hedged(search, hedge_after, self.search_latency)
+            if with_payload:
+                return self._format_hits(search_results)
+            # Payload lookups can hit Qdrant too; their failures count as a failed search
+            return await self._hits_from_store(attack_type, collection_name, search_results)
+        except asyncio.TimeoutError:
+            print(f"Error searching {collection_name}: timed out after {self.search_timeout}s")
+            return None
+        except Exception as e:
+            print(f"Error searching {collection_name}: {e}")
+            return None
+    
+    async def _search_unified(
+        self,
+        query_vector: List[float],
+        attack_types: List[str],
+        limit: int,
+        score_threshold: float
+    ) -> Dict[str, Optional[List[Dict]]]:
+        """
+        Top-k per attack type from the unified collection in a single grouped query
+        
+        ELI5: Instead of asking five librarians for their best books, ask one
+        librarian for the best few books from each of five shelves.
+        """
+        with_payload = not self._payloads_local()
+        try:
+            groups = await asyncio.wait_for(
+                self.client.search_groups(
+                    collection_name=self.unified_collection,
+                    query_vector=query_vector,
+                    group_by="attack_type",
+                    query_filter=Filter(
+                        must=[FieldCondition(key="attack_type", match=MatchAny(any=attack_types))]
+                    ),
+                    search_params=self.unified_settings.search_params(),
+                    limit=len(attack_types),
+                    group_size=limit,
+                    score_threshold=score_threshold,
+                    with_payload=with_payload,
+                    timeout=max(1, int(self.search_timeout))
+                ),
+                # One grouped query answers every attack type, so it gets the whole deadline
+                timeout=min(self.search_timeout, self.search_deadline)
+            )
+            results = {attack_type: [] for attack_type in attack_types}
+            for group in groups.groups:
+                if group.id not in results:
+                    continue
+                if with_payload:
+                    results[group.id] = self._format_hits(group.hits)
+                else:
+                    results[group.id] = await self._hits_from_store(group.id, self.unified_collection, group.hits)
+            return results
+        except asyncio.TimeoutError:
+            print(f"Error searching {self.unified_collection}: timed out after {min(self.search_timeout, self.search_deadline)}s")
+            return {attack_type: None for attack_type in attack_types}
+        except Exception as e:
+            print(f"Error searching {self.unified_collection}: {e}")
+            return {attack_type: None for attack_type in attack_types}
+    
+    def _payloads_local(self) -> bool:
+        """Whether searches can skip payloads and resolve them from the payload store"""
+        return self.payload_store is not None and self.payload_store.active
+    
+    async def _hits_from_store(self, attack_type: str, collection_name: str, points) -> List[Dict]:
+        """
+        Hits for id-only search results, with payloads from the payload store
+        
+        Ids the store does not know yet (written by another process) are fetched once and added.
+        """
+        unknown = [point.id for point in points if self.payload_store.get(attack_type, point.id) is None]
+        if unknown:
+            records = await self.client.retrieve(
+                collection_name=collection_name,
+                ids=unknown,
+                with_payload=True,
+                with_vectors=False
+            )
+            for record in records:
+                self.payload_store.put(attack_type, record.id, record.payload or {})
+            self.payload_store.fetched += len(unknown)
+        
+        hits = []
+        for point in points:
+            record = self.payload_store.get(attack_type, point.id)
+            hits.append({
+                "id": point.id,
+                "score": point.score,
+                "payload": record.payload() if record else {}
+            })
+        self.payload_store.resolved += len(hits)
+        return hits
+    
+    @staticmethod
+    def _format_hits(points) -> List[Dict]:
+        """Scored points as plain dicts (without bookkeeping fields, like payload store hits)"""
+        return [
+            {
+                "id": point.id,
+                "score": point.score,
+                "payload": public_payload(point.payload)
+            }
+            for point in points
+        ]
     
     async def detect_address_spoofing(
         self,
         suspicious_address: str,
-        known_addresses: List[str]
+        known_addresses: List[str],
+        semantic: bool = True,
+        prior: Optional[Dict] = None
     ) -> Dict:
         """
         Detect if an address is a spoofed version of a known address
@@ -176,34 +1080,41 @@ class EnhancedQdrantService:
         Args:
             suspicious_address: The address to check
             known_addresses: List of addresses the user owns/trusts
+            semantic: Also look up similar addresses in the pattern database
+            prior: Result of a semantic=False run for the same address (its
+                similarity matches are reused instead of recomputed)
         
         Returns:
             Dict with spoofing detection results
         """
-        spoofing_results = []
-        
-        for known_addr in known_addresses:
-            similarity = self.calculate_address_similarity(
-                suspicious_address,
-                known_addr
-            )
-            
-            if similarity > 0.6:  # Threshold for potential spoofing
-                spoofing_results.append({
-                    "known_address": known_addr,
-                    "suspicious_address": suspicious_address,
-                    "similarity": similarity,
-                    "risk_level": "HIGH" if similarity > 0.8 else "MEDIUM"
-                })
+        if prior:
+            spoofing_results = list(prior["similarity_matches"])
+        else:
+            spoofing_results = []
+            for known_addr in known_addresses:
+                similarity = self.calculate_address_similarity(
+                    suspicious_address,
+                    known_addr
+                )
+                
+                if similarity > 0.6:  # Threshold for potential spoofing
+                    spoofing_results.append({
+                        "known_address": known_addr,
+                        "suspicious_address": suspicious_address,
+                        "similarity": similarity,
+                        "risk_level": "HIGH" if similarity > 0.8 else "MEDIUM"
+                    })
         
         # Also search for similar addresses in our database
-        query_text = f"wallet address {suspicious_address} transaction"
-        vector_results = await self.search_attack_patterns(
-            query_text,
-            attack_types=["address_spoofing"],
-            limit=3,
-            score_threshold=0.4
-        )
+        vector_results = SearchResults()
+        if semantic:
+            query_text = f"wallet address {suspicious_address} transaction"
+            vector_results = await self.search_attack_patterns(
+                query_text,
+                attack_types=["address_spoofing"],
+                limit=3,
+                score_threshold=0.4
+            )
         
         return {
             "is_spoofed": len(spoofing_results) > 0,
@@ -223,10 +1134,22 @@ class EnhancedQdrantService:
         
         return f"⚠️ MEDIUM RISK: Address shows similarity to your known addresses. Double-check the full address before sending any transactions."
     
+    def build_wallet_stalking_query(self, transaction_data: Dict) -> str:
+        """Build the wallet stalking search query from transaction details"""
+        return f"""
+        Transaction from {transaction_data.get('from', '')} 
+        to {transaction_data.get('to', '')}
+        Amount: {transaction_data.get('value', '0')}
+        Message: {transaction_data.get('message', '')}
+        """
+    
     async def detect_wallet_stalking(
         self,
         transaction_data: Dict,
-        user_address: str
+        user_address: str,
+        planner: Optional["SearchPlanner"] = None,
+        semantic: bool = True,
+        prior: Optional[Dict] = None
     ) -> Dict:
         """
         Detect wallet stalking patterns
@@ -234,36 +1157,36 @@ class EnhancedQdrantService:
         Args:
             transaction_data: Dict with transaction details
             user_address: User's wallet address
+            planner: Request-scoped search planner to share searches with (optional)
+            semantic: Search the pattern database (False = transaction indicators only)
+            prior: Result of a semantic=False run for the same transaction (its
+                indicators are reused instead of recomputed)
         
         Returns:
             Dict with stalking detection results
         """
-        # Extract relevant text from transaction
-        analysis_text = f"""
-        Transaction from {transaction_data.get('from', '')} 
-        to {transaction_data.get('to', '')}
-        Amount: {transaction_data.get('value', '0')}
-        Message: {transaction_data.get('message', '')}
-        """
-        
         # Search for stalking patterns
-        results = await self.search_attack_patterns(
-            analysis_text,
-            attack_types=["wallet_stalking"],
-            limit=5,
-            score_threshold=0.4
-        )
+        results = SearchResults()
+        if semantic:
+            search = planner.search if planner else self.search_attack_patterns
+            results = await search(
+                self.build_wallet_stalking_query(transaction_data),
+                attack_types=["wallet_stalking"],
+                limit=5,
+                score_threshold=0.4
+            )
         
         # Check for suspicious patterns
-        suspicious_indicators = []
+        suspicious_indicators = list(prior["indicators"]) if prior else []
         
-        # Check if transaction is from unknown address with small amount (dusting attack)
-        if transaction_data.get('value', 0) < 0.0001:
-            suspicious_indicators.append("Dusting attack detected (very small transaction)")
-        
-        # Check for repeated transactions from same address
-        if transaction_data.get('repeated_from', False):
-            suspicious_indicators.append("Repeated transactions from same address")
+        if prior is None:
+            # Check if transaction is from unknown address with small amount (dusting attack)
+            if transaction_data.get('value', 0) < 0.0001:
+                suspicious_indicators.append("Dusting attack detected (very small transaction)")
+            
+            # Check for repeated transactions from same address
+            if transaction_data.get('repeated_from', False):
+                suspicious_indicators.append("Repeated transactions from same address")
         
         return {
             "is_stalking": len(results.get("wallet_stalking", [])) > 0 or len(suspicious_indicators) > 0,
@@ -282,10 +1205,21 @@ class EnhancedQdrantService:
         
         return "⚠️ Potential wallet stalking detected. Be cautious about sharing your wallet address publicly."
     
+    def build_sim_swap_query(self, message_text: str, context: Optional[Dict] = None) -> str:
+        """Build the SIM swap search query (message enhanced with phone/carrier context)"""
+        enhanced_query = message_text
+        if context:
+            enhanced_query += f" phone {context.get('phone', '')} carrier {context.get('carrier', '')}"
+        return enhanced_query
+    
     async def detect_sim_swapping(
         self,
         message_text: str,
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        planner: Optional["SearchPlanner"] = None,
+        keyword_scan: Optional[KeywordScan] = None,
+        semantic: bool = True,
+        prior: Optional[Dict] = None
     ) -> Dict:
         """
         Detect SIM swapping attack indicators
@@ -293,41 +1227,35 @@ class EnhancedQdrantService:
         Args:
             message_text: Message to analyze
             context: Additional context (phone number, carrier, etc.)
+            planner: Request-scoped search planner to share searches with (optional)
+            keyword_scan: Keyword scan of message_text already made by the caller (optional)
+            semantic: Search the pattern database (False = keyword indicators only)
+            prior: Result of a semantic=False run for the same message (its
+                indicators are reused instead of recomputed)
         
         Returns:
             Dict with SIM swapping detection results
         """
-        # Enhance query with context
-        enhanced_query = message_text
-        if context:
-            enhanced_query += f" phone {context.get('phone', '')} carrier {context.get('carrier', '')}"
-        
         # Search for SIM swapping patterns
-        results = await self.search_attack_patterns(
-            enhanced_query,
-            attack_types=["sim_swapping"],
-            limit=5,
-            score_threshold=0.4
-        )
-        
-        # Check for SIM swap indicators
-        indicators = []
-        text_lower = message_text.lower()
-        
-        sim_swap_keywords = [
-            "port your number",
-            "transfer your sim",
-            "carrier verification",
-            "phone number change",
-            "sim card replacement",
-            "two-factor authentication",
-            "sms verification code",
-            "text message code"
-        ]
+        results = SearchResults()
+        if semantic:
+            search = planner.search if planner else self.search_attack_patterns
+            results = await search(
+                self.build_sim_swap_query(message_text, context),
+                attack_types=["sim_swapping"],
+                limit=5,
+                score_threshold=0.4
+            )
         
-        for keyword in sim_swap_keywords:
-            if keyword in text_lower:
-                indicators.append(f"Contains SIM swap keyword: {keyword}")
+        # Check for SIM swap indicators (sim_swap dictionary of data/keywords.json)
+        if prior:
+            indicators = list(prior["indicators"])
+        else:
+            keyword_scan = keyword_scan or self.keywords.scan(message_text)
+            indicators = [
+                f"Contains SIM swap keyword: {entry.phrase}"
+                for entry in keyword_scan.matches("sim_swap")
+            ]
         
         return {
             "is_sim_swap": len(results.get("sim_swapping", [])) > 0 or len(indicators) > 2,
@@ -362,47 +1290,188 @@ class EnhancedQdrantService:
         if attack_type not in self.collections:
             raise ValueError(f"Unknown attack type: {attack_type}")
         
-        collection_name = self.collections[attack_type]
-        vector = self.encode_text(text)
+        await self.ensure_collections()
+        collection_name = self.collection_for(attack_type)
+        vector = await self.encode_text_async(text)
+        point = self.pattern_point(pattern_id, text, attack_type, vector, metadata)
+        
+        await self.client.upsert(
+            collection_name=collection_name,
+            points=[point]
+        )
+        
+        if self.local_index:
+            self.local_index.upsert(attack_type, pattern_id, vector, point.payload)
+        if self.payload_store is not None:
+            self.payload_store.put(attack_type, pattern_id, point.payload)
+        self.invalidate_search_results([attack_type])
+        self.stats_refresher.request_refresh()
+    
+    def pattern_point(
+        self,
+        pattern_id,
+        text: str,
+        attack_type: str,
+        vector: List[float],
+        metadata: Optional[Dict] = None
+    ) -> PointStruct:
+        """
+        Qdrant point stored for an attack pattern
         
-        point = PointStruct(
+        The payload records a content hash and the embedding model so re-seeding
+        can skip unchanged patterns and detect vectors from another model.
+        """
+        return PointStruct(
             id=pattern_id,
             vector=vector,
             payload={
                 "text": text,
                 "attack_type": attack_type,
-                **(metadata or {})
+                **(metadata or {}),
+                "content_hash": pattern_content_hash(text, attack_type, metadata),
+                "embedding_model": self.model_id,
+                "schema_version": PAYLOAD_SCHEMA_VERSION
             }
         )
+    
+    async def add_attack_patterns(self, patterns: List[Dict], wait: bool = True) -> int:
+        """
+        Add many patterns with one batched encode and one upsert per collection
         
-        self.client.upsert(
-            collection_name=collection_name,
-            points=[point]
-        )
+        Args:
+            patterns: Dicts with id, text, attack_type and optional metadata
+            wait: Wait until Qdrant has applied the write (False = return once it is acknowledged)
+        
+        Returns:
+            Number of patterns written
+        """
+        if not patterns:
+            return 0
+        for pattern in patterns:
+            if pattern["attack_type"] not in self.collections:
+                raise ValueError(f"Unknown attack type: {pattern['attack_type']}")
+        
+        await self.ensure_collections()
+        vectors = await self.encode_batch_async([pattern["text"] for pattern in patterns])
+        
+        points_by_collection: Dict[str, List[PointStruct]] = {}
+        for pattern, vector in zip(patterns, vectors):
+            points_by_collection.setdefault(self.collection_for(pattern["attack_type"]), []).append(
+                self.pattern_point(pattern["id"], pattern["text"], pattern["attack_type"], vector, pattern.get("metadata"))
+            )
+        
+        await asyncio.gather(*(
+            self.client.upsert(collection_name=collection_name, points=points, wait=wait)
+            for collection_name, points in points_by_collection.items()
+        ))
+        await self.patterns_written({pattern["attack_type"] for pattern in patterns})
+        return len(patterns)
+    
+    async def patterns_written(self, attack_types, full: bool = False):
+        """
+        Bring derived state (search cache, local index, payload store) up to date after bulk writes
+        
+        Args:
+            full: Reload the local index completely (in-place updates keep point counts unchanged)
+        """
+        self.invalidate_search_results(list(attack_types))
+        self.stats_refresher.request_refresh()
+        if self.local_index and self.local_index.active:
+            try:
+                await self.sync_local_index(full=full)
+            except Exception as e:
+                print(f"Warning: Local index refresh failed: {e}")
+        if self._payloads_local():
+            try:
+                await self.sync_payload_store(list(attack_types))
+            except Exception as e:
+                print(f"Warning: Payload store refresh failed: {e}")
+    
+    def invalidate_search_results(self, attack_types: List[str]):
+        """Drop cached search results of attack types whose patterns were written"""
+        if self.result_cache:
+            self.result_cache.invalidate(attack_types)
+        if self.near_duplicates:
+            # Near-duplicate entries hold results of every attack type
+            self.near_duplicates.invalidate()
+    
+    def settings_for(self, attack_type: str) -> CollectionSettings:
+        """Storage and search settings that apply to an attack type in the current layout"""
+        if self.storage_layout == "unified":
+            return self.unified_settings
+        return self.collection_settings[attack_type]
+    
+    def target_collections(self) -> Dict[str, List[str]]:
+        """Collection (or alias) name -> attack types stored in it, for the current layout"""
+        if self.storage_layout == "unified":
+            return {self.unified_collection: list(self.collections.keys())}
+        return {collection_name: [attack_type] for attack_type, collection_name in self.collections.items()}
+    
+    def collection_for(self, attack_type: str) -> str:
+        """Qdrant collection holding patterns of an attack type in the current layout"""
+        if self.storage_layout == "unified":
+            return self.unified_collection
+        return self.collections[attack_type]
     
     async def get_collection_stats(self) -> Dict:
-        """Get statistics for all collections"""
-        stats = {}
-        for attack_type, collection_name in self.collections.items():
+        """Get statistics for all collections (queried concurrently)"""
+        await self.ensure_collections()
+        
+        if self.storage_layout == "unified":
+            return await self.unified_stats()
+        
+        async def collection_stats(collection_name: str) -> Dict:
             try:
-                info = self.client.get_collection(collection_name)
-                # Handle both old and new API versions
-                vectors_count = getattr(info, 'vectors_count', getattr(info, 'points_count', 0))
-                points_count = getattr(info, 'points_count', vectors_count)
-                stats[attack_type] = {
+                info = await self.client.get_collection(collection_name)
+                # Handle both old and new API versions (newer clients report vectors_count as None)
+                points_count = getattr(info, 'points_count', None) or 0
+                vectors_count = getattr(info, 'vectors_count', None) or points_count
+                return {
                     "vectors_count": vectors_count,
                     "points_count": points_count
                 }
             except Exception as e:
-                stats[attack_type] = {"error": str(e)}
+                return {"error": str(e)}
         
-        return stats
+        results = await asyncio.gather(*(
+            collection_stats(collection_name) for collection_name in self.collections.values()
+        ))
+        return dict(zip(self.collections.keys(), results))
+    
+    async def unified_stats(self) -> Dict:
+        """Per attack type pattern counts in the unified collection (same shape as per-type stats)"""
+        async def type_stats(attack_type: str) -> Dict:
+            try:
+                result = await self.client.count(
+                    collection_name=self.unified_collection,
+                    count_filter=Filter(
+                        must=[FieldCondition(key="attack_type", match=MatchValue(value=attack_type))]
+                    ),
+                    exact=True
+                )
+                return {
+                    "vectors_count": result.count,
+                    "points_count": result.count
+                }
+            except Exception as e:
+                return {"error": str(e)}
+        
+        results = await asyncio.gather(*(type_stats(attack_type) for attack_type in self.collections))
+        return dict(zip(self.collections.keys(), results))
     
     async def check_health(self) -> bool:
         """Check if Qdrant is accessible"""
         try:
-            self.client.get_collections()
+            await self.client.get_collections()
             return True
         except Exception:
             return False
-
+    
+    async def close(self):
+        """Stop background refreshers and close pooled Qdrant connections"""
+        self.stats_refresher.stop()
+        if self._local_index_task:
+            self._local_index_task.cancel()
+        if self._payload_store_task:
+            self._payload_store_task.cancel()
+        await self.client.close()
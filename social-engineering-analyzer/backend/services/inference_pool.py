@@ -0,0 +1,140 @@
+"""
+Inference Pool - Runs CPU-heavy work (embeddings, scoring) off the asyncio event loop
+Dedicated thread or process pool with bounded queueing and awaitable results
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import functools
+import os
+
+
+class InferencePoolSaturated(Exception):
+    """Raised when the pool already holds max_pending jobs"""
+    pass
+
+
+class InferencePool:
+    """
+    Executor wrapper used by async handlers for blocking, CPU-bound calls
+
+    Jobs beyond max_pending are rejected immediately with InferencePoolSaturated
+    instead of piling up, so a burst of expensive requests cannot starve cheap
+    endpoints like /health and /credits/{address}.
+
+    ELI5: The waiter hands heavy orders to the kitchen and keeps taking new
+    orders instead of standing at the stove.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = ()
+    ):
+        """
+        Args:
+            kind: "thread" or "process"
+            max_workers: Worker count (defaults to min(4, CPU count))
+            max_pending: Maximum queued plus running jobs before rejecting
+            initializer: Called once in every worker (process pools load models here)
+            initargs: Arguments for initializer
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference pool kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending)
+        self.initializer = initializer
+        self.initargs = initargs
+
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = ()
+    ) -> "InferencePool":
+        """Build a pool from INFERENCE_POOL_* environment variables"""
+        workers = os.getenv("INFERENCE_POOL_WORKERS")
+        return cls(
+            kind=os.getenv("INFERENCE_POOL_KIND", "thread").lower(),
+            max_workers=int(workers) if workers else None,
+            max_pending=int(os.getenv("INFERENCE_POOL_MAX_PENDING", "64")),
+            initializer=initializer,
+            initargs=initargs
+        )
+
+    @property
+    def executor(self) -> Executor:
+        """Create the executor on first use"""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=self.initializer,
+                    initargs=self.initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference",
+                    initializer=self.initializer,
+                    initargs=self.initargs
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result
+
+        Raises:
+            InferencePoolSaturated: If max_pending jobs are already queued or running
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferencePoolSaturated(
+                f"Inference pool is saturated ({self.pending} jobs pending). Please retry shortly."
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor,
+                functools.partial(fn, *args, **kwargs)
+            )
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        """Pool occupancy counters"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,230 @@
+"""
+Keyword Engine - Single-pass multi-phrase matching for red flags and attack indicators
+One Aho-Corasick automaton over every keyword dictionary, hot-reloaded from data/keywords.json
+"""
+
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+DEFAULT_KEYWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "keywords.json"
+)
+
+
+class KeywordEntry(NamedTuple):
+    """One phrase of one category; `order` is its position in the file"""
+    dictionary: str
+    category: str
+    phrase: str
+    weight: float
+    order: int
+
+
+class KeywordSpan(NamedTuple):
+    """A matched phrase and its [start, end) offsets in the lower-cased text"""
+    start: int
+    end: int
+    entry: KeywordEntry
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds every occurrence of every phrase in one pass
+
+    Scanning costs O(len(text) + matches) no matter how many phrases are loaded.
+    Matching is plain substring matching, like `phrase in text`.
+
+    ELI5: Instead of reading the message once per suspicious phrase, read it
+    once while following a map that knows every phrase at the same time.
+    """
+
+    def __init__(self, entries: List[KeywordEntry]):
+        self.entries = entries
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for index, entry in enumerate(entries):
+            state = 0
+            for char in entry.phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # Breadth-first failure links; each state inherits the outputs of its failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def scan(self, text: str) -> Iterator[KeywordSpan]:
+        """Every (possibly overlapping) phrase occurrence in text"""
+        goto, fail, output, entries = self._goto, self._fail, self._output, self.entries
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                entry = entries[index]
+                yield KeywordSpan(position + 1 - len(entry.phrase), position + 1, entry)
+
+
+class KeywordScan:
+    """Category hits, scores and spans of one scan, for every dictionary at once"""
+
+    def __init__(self, spans: List[KeywordSpan]):
+        self.spans = spans
+        # Distinct phrases in file order (matches the old nested keyword loops)
+        self._entries = sorted({span.entry for span in spans}, key=lambda entry: entry.order)
+
+    def matches(self, dictionary: str) -> List[KeywordEntry]:
+        """Distinct matched phrases of one dictionary"""
+        return [entry for entry in self._entries if entry.dictionary == dictionary]
+
+    def categories(self, dictionary: str) -> Dict[str, List[str]]:
+        """Category -> matched phrases"""
+        hits: Dict[str, List[str]] = {}
+        for entry in self.matches(dictionary):
+            hits.setdefault(entry.category, []).append(entry.phrase)
+        return hits
+
+    def score(self, dictionary: str, cap: float = 100.0) -> float:
+        """Sum of category weights over distinct matched phrases, capped"""
+        return min(sum(entry.weight for entry in self.matches(dictionary)), cap)
+
+    def span_dicts(self, dictionary: str) -> List[Dict]:
+        return [
+            {
+                "start": span.start,
+                "end": span.end,
+                "category": span.entry.category,
+                "phrase": span.entry.phrase
+            }
+            for span in self.spans
+            if span.entry.dictionary == dictionary
+        ]
+
+
+def load_keyword_entries(path: str) -> List[KeywordEntry]:
+    """
+    Read keyword dictionaries
+
+    The JSON file maps dictionary -> category -> {"weight": ..., "phrases": [...]}:
+
+        {"red_flags": {"urgency": {"weight": 15, "phrases": ["urgent", "act now"]}}}
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    entries = []
+    for dictionary, categories in raw.items():
+        for category, spec in categories.items():
+            weight = float(spec.get("weight", 1))
+            for phrase in spec.get("phrases", []):
+                phrase = phrase.strip().lower()
+                if phrase:
+                    entries.append(KeywordEntry(dictionary, category, phrase, weight, len(entries)))
+    return entries
+
+
+class KeywordEngine:
+    """
+    Compiled keyword dictionaries with hot reload
+
+    The file's modification time is checked at most every reload_seconds
+    during scans; a changed file is compiled into a new automaton and swapped
+    in atomically. A file that fails to load keeps the previous automaton.
+    """
+
+    def __init__(self, path: str = DEFAULT_KEYWORDS_PATH, reload_seconds: float = 5.0):
+        """
+        Args:
+            path: Keyword dictionaries JSON file
+            reload_seconds: Minimum seconds between file change checks (0 = never reload)
+        """
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+        self.automaton = KeywordAutomaton(load_keyword_entries(path))
+        self._mtime = os.path.getmtime(path)
+        self._checked_at = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> "KeywordEngine":
+        """Build from KEYWORDS_PATH / KEYWORDS_RELOAD_SECONDS"""
+        return cls(
+            path=os.getenv("KEYWORDS_PATH", DEFAULT_KEYWORDS_PATH),
+            reload_seconds=float(os.getenv("KEYWORDS_RELOAD_SECONDS", "5"))
+        )
+
+    def reload(self) -> bool:
+        """Recompile from the file (returns False and keeps the old automaton on errors)"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                automaton = KeywordAutomaton(load_keyword_entries(self.path))
+            except (OSError, ValueError, AttributeError) as e:
+                self.last_error = str(e)
+                print(f"Warning: Keyword reload from {self.path} failed: {e}")
+                return False
+            self.automaton = automaton
+            self._mtime = mtime
+            self.reloads += 1
+            self.last_error = None
+            print(f"Reloaded {len(automaton.entries)} keywords from {self.path}")
+            return True
+
+    def _maybe_reload(self):
+        if not self.reload_seconds or time.monotonic() - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            self.reload()
+
+    def scan(self, text: str) -> KeywordScan:
+        """Match every dictionary against text in a single pass"""
+        self._maybe_reload()
+        return KeywordScan(list(self.automaton.scan(text.lower())))
+
+    def stats(self) -> Dict:
+        automaton = self.automaton
+        return {
+            "path": self.path,
+            "phrases": len(automaton.entries),
+            "dictionaries": sorted({entry.dictionary for entry in automaton.entries}),
+            "states": automaton.states,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
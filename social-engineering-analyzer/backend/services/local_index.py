@@ -0,0 +1,203 @@
+"""
+Local Index - In-process exact vector search over the attack pattern set
+Keeps one contiguous float32 matrix per attack type, synchronized from Qdrant
+"""
+
+from typing import Dict, Iterable, List, Optional
+import os
+import time
+
+import numpy as np
+
+from services.payload_store import public_payload
+
+
+class _Segment:
+    """Immutable snapshot of one attack type's patterns (replaced, never mutated)"""
+
+    __slots__ = ("ids", "matrix", "payloads", "positions")
+
+    def __init__(self, ids: List, matrix: np.ndarray, payloads: List[Dict]):
+        self.ids = ids
+        self.matrix = matrix
+        self.payloads = payloads
+        self.positions = {point_id: i for i, point_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+class LocalIndex:
+    """
+    Exact cosine top-k over small pattern sets without a network hop
+
+    The pattern set is a few hundred to a few tens of thousands of vectors, so
+    one matrix-vector product per attack type is faster than a round trip to
+    Qdrant. Qdrant stays the source of truth: segments are loaded by scrolling
+    the collections and refreshed when their point counts change. Above
+    max_points the index deactivates itself and searches go to Qdrant.
+
+    Segments are swapped atomically, so searches never see a half-built matrix.
+
+    ELI5: Keep a photocopy of the small phone book on your desk instead of
+    calling the operator every time, and re-copy a page when it changes.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        max_points: int = 20000,
+        refresh_seconds: float = 30.0,
+        full_sync_seconds: float = 600.0
+    ):
+        """
+        Args:
+            dimension: Vector size
+            max_points: Fall back to Qdrant when the pattern set is larger than this
+            refresh_seconds: Interval of the background point-count check
+            full_sync_seconds: Interval of the full reload (catches in-place edits by other writers)
+        """
+        self.dimension = dimension
+        self.max_points = max_points
+        self.refresh_seconds = refresh_seconds
+        self.full_sync_seconds = full_sync_seconds
+
+        self._segments: Dict[str, _Segment] = {}
+        self.active = False
+        self.last_sync: Optional[float] = None
+        self.last_full_sync: Optional[float] = None
+
+        self.searches = 0
+        self.syncs = 0
+        self.upserts = 0
+
+    @classmethod
+    def from_env(cls, dimension: int) -> Optional["LocalIndex"]:
+        """Build from LOCAL_INDEX_* environment variables (None unless LOCAL_INDEX is enabled)"""
+        if os.getenv("LOCAL_INDEX", "false").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            dimension,
+            max_points=int(os.getenv("LOCAL_INDEX_MAX_POINTS", "20000")),
+            refresh_seconds=float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "30")),
+            full_sync_seconds=float(os.getenv("LOCAL_INDEX_FULL_SYNC_SECONDS", "600"))
+        )
+
+    @property
+    def total_points(self) -> int:
+        return sum(len(segment) for segment in self._segments.values())
+
+    def size(self, attack_type: str) -> Optional[int]:
+        """Points loaded for an attack type (None if never loaded)"""
+        segment = self._segments.get(attack_type)
+        return len(segment) if segment is not None else None
+
+    def covers(self, attack_types: Iterable[str]) -> bool:
+        """Whether every requested attack type can be answered locally"""
+        return self.active and all(attack_type in self._segments for attack_type in attack_types)
+
+    def load(self, attack_type: str, records: Iterable):
+        """Replace one attack type's segment with scrolled Qdrant records (id, vector, payload)"""
+        ids, vectors, payloads = [], [], []
+        for record in records:
+            ids.append(record.id)
+            vectors.append(record.vector)
+            payloads.append(public_payload(record.payload))
+
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension)
+        self._segments[attack_type] = _Segment(ids, _normalize(matrix), payloads)
+        self.syncs += 1
+
+    def finish_sync(self, full: bool):
+        """Record a completed sync and activate the index if it fits"""
+        now = time.time()
+        self.last_sync = now
+        if full:
+            self.last_full_sync = now
+        if self.total_points > self.max_points:
+            self.clear(self.total_points)
+        else:
+            self.active = True
+
+    def clear(self, total_points: int):
+        """Drop all segments and fall back to Qdrant (pattern set too large)"""
+        if self.active or self._segments:
+            print(f"Local index disabled: {total_points} points exceeds LOCAL_INDEX_MAX_POINTS={self.max_points}")
+        self._segments = {}
+        self.active = False
+        self.last_sync = time.time()
+
+    def needs_full_sync(self) -> bool:
+        return self.last_full_sync is None or time.time() - self.last_full_sync >= self.full_sync_seconds
+
+    def upsert(self, attack_type: str, point_id, vector: List[float], payload: Dict):
+        """Apply a write made through this process immediately (copy-on-write)"""
+        segment = self._segments.get(attack_type)
+        if segment is None:
+            return
+        row = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, self.dimension))
+        payload = public_payload(payload)
+        ids = list(segment.ids)
+        payloads = list(segment.payloads)
+        position = segment.positions.get(point_id)
+        if position is None:
+            ids.append(point_id)
+            payloads.append(payload)
+            matrix = np.vstack([segment.matrix, row])
+        else:
+            payloads[position] = payload
+            matrix = segment.matrix.copy()
+            matrix[position] = row[0]
+        self._segments[attack_type] = _Segment(ids, matrix, payloads)
+        self.upserts += 1
+
+    def search(
+        self,
+        attack_type: str,
+        query_vector: List[float],
+        limit: int,
+        score_threshold: float
+    ) -> List[Dict]:
+        """Exact cosine top-k above the threshold, in the same format as Qdrant results"""
+        segment = self._segments[attack_type]
+        self.searches += 1
+        if not len(segment) or limit <= 0:
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = segment.matrix @ query
+
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            {
+                "id": segment.ids[i],
+                "score": float(scores[i]),
+                "payload": segment.payloads[i]
+            }
+            for i in top
+            if scores[i] >= score_threshold
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": True,
+            "active": self.active,
+            "points": {attack_type: len(segment) for attack_type, segment in self._segments.items()},
+            "max_points": self.max_points,
+            "memory_bytes": sum(segment.matrix.nbytes for segment in self._segments.values()),
+            "last_sync": self.last_sync,
+            "last_full_sync": self.last_full_sync,
+            "searches": self.searches,
+            "syncs": self.syncs,
+            "upserts": self.upserts
+        }
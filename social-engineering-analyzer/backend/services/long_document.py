@@ -0,0 +1,167 @@
+"""
+Long Document - Overlapping-window search for texts longer than the model's sequence length
+Windows are encoded and searched in batches and their scores are max-pooled per attack type
+"""
+
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+
+from services.search_fanout import SearchResults
+
+_WORD = re.compile(r"\S+")
+
+
+class DocumentChunker:
+    """
+    Splits long texts into overlapping word windows with a fixed cost ceiling
+
+    The embedding model only reads its first few hundred tokens, so a long
+    phishing email would be scored on its greeting. Texts longer than one
+    window are split into windows of window_words words, each overlapping the
+    previous one by overlap_words; a pattern hit counts with the best score of
+    any window.
+
+    Cost is capped per request: only the first max_chars characters are read
+    and at most max_windows windows are embedded, so a megabyte paste costs the
+    same as a long email. Anything beyond the caps is reported as truncated.
+
+    ELI5: Instead of reading only the first page of a long letter, read it one
+    page at a time (with a little overlap) and keep the most suspicious page.
+    """
+
+    def __init__(
+        self,
+        window_words: int = 200,
+        overlap_words: int = 40,
+        max_windows: int = 32,
+        max_chars: int = 200000,
+        batch_size: int = 16
+    ):
+        """
+        Args:
+            window_words: Words per window (all-mpnet-base-v2 reads ~384 tokens, about 250 words)
+            overlap_words: Words shared by consecutive windows
+            max_windows: Windows embedded per text at most
+            max_chars: Characters of a text read at most
+            batch_size: Windows encoded and searched per batch
+        """
+        if overlap_words >= window_words:
+            raise ValueError("overlap_words must be smaller than window_words")
+        self.window_words = window_words
+        self.overlap_words = overlap_words
+        self.max_windows = max_windows
+        self.max_chars = max_chars
+        self.batch_size = batch_size
+
+        self.documents = 0
+        self.windows_searched = 0
+        self.truncated = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["DocumentChunker"]:
+        """Build from LONG_DOCUMENT_* environment variables (None when LONG_DOCUMENT=false)"""
+        if os.getenv("LONG_DOCUMENT", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            window_words=int(os.getenv("LONG_DOCUMENT_WINDOW_WORDS", "200")),
+            overlap_words=int(os.getenv("LONG_DOCUMENT_OVERLAP_WORDS", "40")),
+            max_windows=int(os.getenv("LONG_DOCUMENT_MAX_WINDOWS", "32")),
+            max_chars=int(os.getenv("LONG_DOCUMENT_MAX_CHARS", "200000")),
+            batch_size=int(os.getenv("LONG_DOCUMENT_BATCH_SIZE", "16"))
+        )
+
+    @property
+    def stride(self) -> int:
+        return self.window_words - self.overlap_words
+
+    def clip(self, text: str) -> str:
+        """The part of text that is analyzed at all"""
+        return text[:self.max_chars]
+
+    def is_long(self, text: str) -> bool:
+        """Whether text has more words than one window (stops counting early)"""
+        if len(text) <= self.window_words:
+            return False
+        words = islice(_WORD.finditer(text, 0, self.max_chars), self.window_words + 1)
+        return sum(1 for _ in words) > self.window_words
+
+    def split(self, text: str) -> Tuple[List[str], bool]:
+        """
+        Overlapping windows of text
+
+        Only the words the windows cover are ever materialized.
+
+        Returns:
+            (windows, whether part of the text was left out by the caps)
+        """
+        covered = self.stride * (self.max_windows - 1) + self.window_words
+        words = [
+            match.group(0)
+            for match in islice(_WORD.finditer(text, 0, self.max_chars), covered + 1)
+        ]
+        truncated = len(text) > self.max_chars or len(words) > covered
+        words = words[:covered]
+
+        windows = []
+        start = 0
+        while True:
+            windows.append(" ".join(words[start:start + self.window_words]))
+            if start + self.window_words >= len(words):
+                break
+            start += self.stride
+        return windows, truncated
+
+    def describe(self, text: str) -> Optional[Dict]:
+        """Window count and truncation of a long text (None for texts that fit one window)"""
+        if not self.is_long(text):
+            return None
+        windows, truncated = self.split(text)
+        return {
+            "chars": len(text),
+            "windows": len(windows),
+            "truncated": truncated
+        }
+
+    @staticmethod
+    def pool(pooled: SearchResults, results: SearchResults, window: int):
+        """
+        Max-pool one window's results into pooled (best score per pattern wins)
+
+        An attack type missing from any window stays missing: its pooled score
+        may be lower than a complete search would have found.
+        """
+        for attack_type, hits in results.items():
+            best = pooled.setdefault(attack_type, [])
+            by_id = {hit["id"]: index for index, hit in enumerate(best)}
+            for hit in hits:
+                index = by_id.get(hit["id"])
+                if index is None:
+                    by_id[hit["id"]] = len(best)
+                    best.append({**hit, "window": window})
+                elif hit["score"] > best[index]["score"]:
+                    best[index] = {**hit, "window": window}
+        for attack_type in results.missing:
+            if attack_type not in pooled.missing:
+                pooled.missing.append(attack_type)
+
+    @staticmethod
+    def finish(pooled: SearchResults, limit: int) -> SearchResults:
+        """Sort pooled hits by score and cut each attack type to limit"""
+        for attack_type, hits in pooled.items():
+            hits.sort(key=lambda hit: hit["score"], reverse=True)
+            del hits[limit:]
+        return pooled
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": True,
+            "window_words": self.window_words,
+            "overlap_words": self.overlap_words,
+            "max_windows": self.max_windows,
+            "max_chars": self.max_chars,
+            "documents": self.documents,
+            "windows_searched": self.windows_searched,
+            "truncated": self.truncated
+        }
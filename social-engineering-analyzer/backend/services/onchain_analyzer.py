@@ -4,6 +4,7 @@ Detects wallet relationships, transaction patterns, and suspicious activity
 """
 
 from services.enhanced_qdrant_service import EnhancedQdrantService
+from services.search_planner import SearchPlanner
 from typing import Dict, List, Optional, Tuple
 from web3 import Web3
 import asyncio
@@ -22,6 +23,24 @@ class OnChainAnalyzer:
     - Pattern recognition in on-chain activity
     """
     
+    # Searches run on the behavioral signature. They are planned together so a
+    # single analyze_wallet_activity call embeds and searches the signature once.
+    SIGNATURE_PATTERN_SEARCH = {
+        "attack_types": ["transaction_analysis", "wallet_stalking"],
+        "limit": 10,
+        "score_threshold": 0.3  # Lower threshold to catch more patterns
+    }
+    CLUSTER_SEARCH = {
+        "attack_types": ["transaction_analysis", "wallet_stalking"],
+        "limit": 5,
+        "score_threshold": 0.35
+    }
+    ANOMALY_SEARCH = {
+        "attack_types": ["transaction_analysis"],
+        "limit": 5,
+        "score_threshold": 0.35
+    }
+    
     def __init__(self, qdrant_service: EnhancedQdrantService, rpc_url: str):
         self.qdrant = qdrant_service
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
@@ -51,17 +70,20 @@ class OnChainAnalyzer:
         balance = self.w3.eth.get_balance(wallet_address)
         balance_eth = float(self.w3.from_wei(balance, 'ether'))
         
+        # Shares embeddings and Qdrant queries between the steps below
+        planner = SearchPlanner(self.qdrant)
+        
         # ACTUALLY FETCH TRANSACTION HISTORY
-        tx_patterns = await self._analyze_transaction_patterns(wallet_address, block_range)
+        tx_patterns = await self._analyze_transaction_patterns(wallet_address, block_range, planner)
         
         # Detect behavioral cluster
-        behavioral_cluster = await self._find_behavioral_cluster(wallet_address, tx_patterns)
+        behavioral_cluster = await self._find_behavioral_cluster(wallet_address, tx_patterns, planner)
         
         # Identify relationships
-        relationships = await self._identify_wallet_relationships(wallet_address, tx_patterns)
+        relationships = await self._identify_wallet_relationships(wallet_address, tx_patterns, planner)
         
         # Detect anomalies
-        anomalies = await self._detect_anomalies(wallet_address, tx_patterns)
+        anomalies = await self._detect_anomalies(wallet_address, tx_patterns, planner)
         
         # Calculate risk score
         risk_analysis = self._calculate_risk(tx_patterns, anomalies, behavioral_cluster)
@@ -81,7 +103,8 @@ class OnChainAnalyzer:
     async def _analyze_transaction_patterns(
         self,
         wallet_address: str,
-        block_range: Optional[Tuple[int, int]]
+        block_range: Optional[Tuple[int, int]],
+        planner: Optional[SearchPlanner] = None
     ) -> Dict:
         """ACTUALLY fetch and analyze transaction history from blockchain"""
         
@@ -259,12 +282,18 @@ class OnChainAnalyzer:
         
         print(f"DEBUG: Behavioral signature: {behavioral_signature[:200]}")
         
+        # Every later step that searches the signature is planned now, so the
+        # union below is embedded and queried only once per collection
+        if planner:
+            planner.plan(behavioral_signature, **self.SIGNATURE_PATTERN_SEARCH)
+            planner.plan(behavioral_signature, **self.CLUSTER_SEARCH)
+            planner.plan(behavioral_signature, **self.ANOMALY_SEARCH)
+        
         # Search Qdrant for similar patterns
-        similar_patterns = await self.qdrant.search_attack_patterns(
+        similar_patterns = await self._search(
+            planner,
             behavioral_signature,
-            attack_types=["transaction_analysis", "wallet_stalking"],
-            limit=10,
-            score_threshold=0.3  # Lower threshold to catch more patterns
+            self.SIGNATURE_PATTERN_SEARCH
         )
         
         pattern_matches_count = sum(len(patterns) for patterns in similar_patterns.values())
@@ -296,19 +325,15 @@ class OnChainAnalyzer:
     async def _find_behavioral_cluster(
         self,
         wallet_address: str,
-        tx_patterns: Dict
+        tx_patterns: Dict,
+        planner: Optional[SearchPlanner] = None
     ) -> Optional[Dict]:
         """Find which behavioral cluster this wallet belongs to"""
         
         cluster_text = tx_patterns.get("signature", f"wallet behavior pattern {wallet_address}")
         
         # Search for similar behaviors
-        results = await self.qdrant.search_attack_patterns(
-            cluster_text,
-            attack_types=["transaction_analysis", "wallet_stalking"],
-            limit=5,
-            score_threshold=0.35
-        )
+        results = await self._search(planner, cluster_text, self.CLUSTER_SEARCH)
         
         if results.get("transaction_analysis"):
             best_match = results["transaction_analysis"][0]
@@ -323,7 +348,8 @@ class OnChainAnalyzer:
     async def _identify_wallet_relationships(
         self,
         wallet_address: str,
-        tx_patterns: Dict
+        tx_patterns: Dict,
+        planner: Optional[SearchPlanner] = None
     ) -> List[Dict]:
         """Identify relationships with other wallets"""
         
@@ -351,12 +377,11 @@ class OnChainAnalyzer:
         # Search Qdrant for relationship patterns
         relationship_text = f"wallet relationships {wallet_address} {len(transactions)} transactions {len(address_frequency)} partners"
         
-        results = await self.qdrant.search_attack_patterns(
-            relationship_text,
-            attack_types=["wallet_stalking", "transaction_analysis"],
-            limit=5,
-            score_threshold=0.4
-        )
+        results = await self._search(planner, relationship_text, {
+            "attack_types": ["wallet_stalking", "transaction_analysis"],
+            "limit": 5,
+            "score_threshold": 0.4
+        })
         
         for attack_type, matches in results.items():
             for match in matches:
@@ -372,7 +397,8 @@ class OnChainAnalyzer:
     async def _detect_anomalies(
         self,
         wallet_address: str,
-        tx_patterns: Dict
+        tx_patterns: Dict,
+        planner: Optional[SearchPlanner] = None
     ) -> List[Dict]:
         """Detect anomalies in wallet behavior"""
         
@@ -414,12 +440,7 @@ class OnChainAnalyzer:
         # Search Qdrant for anomaly patterns
         anomaly_text = tx_patterns.get("signature", f"anomaly detection wallet {wallet_address}")
         
-        results = await self.qdrant.search_attack_patterns(
-            anomaly_text,
-            attack_types=["transaction_analysis"],
-            limit=5,
-            score_threshold=0.35
-        )
+        results = await self._search(planner, anomaly_text, self.ANOMALY_SEARCH)
         
         for attack_type, matches in results.items():
             for match in matches:
@@ -433,6 +454,17 @@ class OnChainAnalyzer:
         
         return anomalies
     
+    async def _search(
+        self,
+        planner: Optional[SearchPlanner],
+        query_text: str,
+        search_params: Dict
+    ) -> Dict[str, List[Dict]]:
+        """Run a search through the request planner when one is available"""
+        if planner:
+            return await planner.search(query_text, **search_params)
+        return await self.qdrant.search_attack_patterns(query_text, **search_params)
+    
     def _calculate_risk(
         self,
         tx_patterns: Dict,
@@ -632,24 +664,30 @@ class OnChainAnalyzer:
         if len(wallet_addresses) < 2:
             return {"error": "Need at least 2 wallets to detect clusters"}
         
-        # Create signatures for each wallet
-        signatures = []
-        for addr in wallet_addresses:
-            sig = f"wallet address {addr} behavioral pattern"
-            vector = []
-            if hasattr(self.qdrant, 'encode_text'):
-                vector = self.qdrant.encode_text(sig)
-            signatures.append({
-                "address": addr,
-                "signature": sig,
-                "vector": vector
-            })
+        # Create signatures for each wallet (encoded together, off the event loop)
+        texts = [f"wallet address {addr} behavioral pattern" for addr in wallet_addresses]
+        vectors = await self.qdrant.encode_texts_async(texts)
+        signatures = [
+            {"address": addr, "signature": sig, "vector": vector}
+            for addr, sig, vector in zip(wallet_addresses, texts, vectors)
+        ]
         
-        # Calculate pairwise similarities
+        # Calculate pairwise similarities on the inference pool
+        clusters = await self.qdrant.inference_pool.run(self._pairwise_clusters, signatures)
+        
+        return {
+            "wallets_analyzed": len(wallet_addresses),
+            "clusters_found": len(clusters),
+            "relationships": clusters
+        }
+    
+    @staticmethod
+    def _pairwise_clusters(signatures: List[Dict]) -> List[Dict]:
+        """Compare every pair of wallet signatures"""
         clusters = []
         for i, sig1 in enumerate(signatures):
             for j, sig2 in enumerate(signatures[i+1:], i+1):
-                similarity = self._cosine_similarity(sig1["vector"], sig2["vector"])
+                similarity = OnChainAnalyzer._cosine_similarity(sig1["vector"], sig2["vector"])
                 if similarity > 0.7:
                     clusters.append({
                         "wallet1": sig1["address"],
@@ -658,13 +696,10 @@ class OnChainAnalyzer:
                         "likely_same_entity": similarity > 0.8
                     })
         
-        return {
-            "wallets_analyzed": len(wallet_addresses),
-            "clusters_found": len(clusters),
-            "relationships": clusters
-        }
+        return clusters
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    @staticmethod
+    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity"""
         if not vec1 or not vec2 or len(vec1) != len(vec2):
             return 0.0
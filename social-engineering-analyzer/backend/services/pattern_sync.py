@@ -0,0 +1,353 @@
+"""
+Pattern Sync - Incremental re-seeding by content hash and zero-downtime collection rebuilds
+Only new or changed patterns are re-embedded; model changes build shadow collections swapped in via aliases
+"""
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+import asyncio
+import hashlib
+import json
+import time
+
+from qdrant_client.models import (
+    CollectionStatus,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointIdsList,
+    PointStruct
+)
+
+if TYPE_CHECKING:
+    from services.enhanced_qdrant_service import EnhancedQdrantService
+
+# Bump when the stored payload layout changes; stored points from another
+# version are rebuilt into a shadow collection on the next sync
+PAYLOAD_SCHEMA_VERSION = 1
+
+# Payload fields needed to diff stored points against the desired pattern set
+SYNC_FIELDS = ["content_hash", "embedding_model", "schema_version", "pattern_pack"]
+
+# Payload fields derived by EnhancedQdrantService.pattern_point (not part of the metadata)
+DERIVED_FIELDS = ("text", "attack_type", "content_hash", "embedding_model", "schema_version")
+
+
+def pattern_content_hash(text: str, attack_type: str, metadata: Optional[Dict] = None) -> str:
+    """Stable hash of everything that goes into a pattern's point (whitespace-insensitive text)"""
+    body = json.dumps(
+        {"text": " ".join(text.split()), "attack_type": attack_type, "metadata": metadata or {}},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class PatternSync:
+    """
+    Brings the stored patterns of one pattern pack in line with a desired list
+
+    Every point carries content_hash, embedding_model and schema_version in
+    its payload (see EnhancedQdrantService.pattern_point). For each target
+    collection:
+
+    - Incremental: all stored points use the current model and schema. Only
+      patterns whose hash changed (or that are new) are re-embedded, and points
+      of this pack that are no longer in the list are deleted.
+    - Rebuild: some stored points were embedded by another model or schema.
+      A shadow collection is built with every pattern (patterns of other packs,
+      e.g. bulk-ingested feeds, are re-embedded from their stored text) and the
+      live name is flipped to it atomically through a Qdrant collection alias,
+      so searches never hit a half-built index.
+
+    ELI5: Only reprint the pages that changed. If the whole book needs a new
+    font, print a complete new copy first, then swap it onto the shelf in one go.
+    """
+
+    def __init__(
+        self,
+        qdrant_service: "EnhancedQdrantService",
+        pack: str = "seed",
+        batch_size: int = 256,
+        keep_old: bool = False,
+        index_timeout: float = 300.0
+    ):
+        """
+        Args:
+            qdrant_service: Service providing the encoder and Qdrant client
+            pack: Name of the pattern set being synced (only its points are ever deleted)
+            batch_size: Patterns encoded per model call
+            keep_old: Keep the previous physical collection after an alias swap
+            index_timeout: Seconds to wait for a shadow collection to finish indexing
+        """
+        self.qdrant = qdrant_service
+        self.pack = pack
+        self.batch_size = batch_size
+        self.keep_old = keep_old
+        self.index_timeout = index_timeout
+
+    async def sync(self, patterns: List[Dict], rebuild: bool = False) -> Dict[str, Dict]:
+        """
+        Sync the pack's patterns (dicts with id, text, attack_type, metadata)
+
+        Args:
+            rebuild: Force a shadow rebuild even if the stored model and schema match
+
+        Returns:
+            Dict mapping target collection (alias) to what was done
+        """
+        await self.qdrant.ensure_collections()
+        client = self.qdrant.client
+        aliases = {alias.alias_name: alias.collection_name for alias in (await client.get_aliases()).aliases}
+
+        desired_by_target: Dict[str, List[Dict]] = {}
+        for pattern in patterns:
+            if pattern["attack_type"] not in self.qdrant.collections:
+                raise ValueError(f"Unknown attack type: {pattern['attack_type']}")
+            desired_by_target.setdefault(self.qdrant.collection_for(pattern["attack_type"]), []).append({
+                **pattern,
+                "metadata": {**(pattern.get("metadata") or {}), "pattern_pack": self.pack}
+            })
+
+        report = {}
+        for target, attack_types in self.qdrant.target_collections().items():
+            desired = desired_by_target.get(target, [])
+            existing = await self._stored(target)
+            stale = any(
+                payload.get("embedding_model") != self.qdrant.model_id
+                or payload.get("schema_version") != PAYLOAD_SCHEMA_VERSION
+                for payload in existing.values()
+            )
+            if rebuild or stale:
+                report[target] = await self._rebuild(target, attack_types, desired, existing, aliases)
+            else:
+                report[target] = await self._incremental(target, desired, existing)
+
+        await self.qdrant.patterns_written(self.qdrant.collections.keys(), full=True)
+        return report
+
+    async def _stored(self, collection_name: str) -> Dict:
+        """Point id -> sync fields of every stored point"""
+        stored = {}
+        offset = None
+        while True:
+            records, offset = await self.qdrant.client.scroll(
+                collection_name=collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=SYNC_FIELDS,
+                with_vectors=False
+            )
+            for record in records:
+                stored[record.id] = record.payload or {}
+            if offset is None or not records:
+                return stored
+
+    async def _write(self, collection_name: str, patterns: List[Dict]):
+        """Encode and upsert patterns into a physical or aliased collection"""
+        for start in range(0, len(patterns), self.batch_size):
+            batch = patterns[start:start + self.batch_size]
+            vectors = await self.qdrant.encode_batch_async([pattern["text"] for pattern in batch])
+            await self.qdrant.client.upsert(
+                collection_name=collection_name,
+                points=[
+                    self.qdrant.pattern_point(
+                        pattern["id"], pattern["text"], pattern["attack_type"], vector, pattern["metadata"]
+                    )
+                    for pattern, vector in zip(batch, vectors)
+                ]
+            )
+
+    async def _incremental(self, target: str, desired: List[Dict], existing: Dict) -> Dict:
+        own = {point_id: payload for point_id, payload in existing.items() if payload.get("pattern_pack") == self.pack}
+        changed = [
+            pattern for pattern in desired
+            if own.get(pattern["id"], {}).get("content_hash")
+            != pattern_content_hash(pattern["text"], pattern["attack_type"], pattern["metadata"])
+        ]
+        desired_ids = {pattern["id"] for pattern in desired}
+        removed = [point_id for point_id in own if point_id not in desired_ids]
+
+        if changed:
+            await self._write(target, changed)
+        if removed:
+            await self.qdrant.client.delete(
+                collection_name=target,
+                points_selector=PointIdsList(points=removed)
+            )
+
+        added = sum(1 for pattern in changed if pattern["id"] not in own)
+        return {
+            "mode": "incremental",
+            "added": added,
+            "updated": len(changed) - added,
+            "unchanged": len(desired) - len(changed),
+            "deleted": len(removed)
+        }
+
+    async def _rebuild(
+        self,
+        target: str,
+        attack_types: List[str],
+        desired: List[Dict],
+        existing: Dict,
+        aliases: Dict[str, str]
+    ) -> Dict:
+        shadow = await self.qdrant.unused_physical_name(target)
+        await self._create_physical(shadow, attack_types)
+
+        try:
+            await self._write(shadow, desired)
+            carried = await self._carry_over(target, shadow, {pattern["id"] for pattern in desired})
+            await self._wait_until_indexed(shadow)
+
+            expected = len(desired) + carried
+            stored = (await self.qdrant.client.count(collection_name=shadow, exact=True)).count
+            if stored != expected:
+                raise RuntimeError(f"Shadow collection {shadow} has {stored} points, expected {expected}")
+        except Exception:
+            await self.qdrant.client.delete_collection(shadow)
+            raise
+
+        previous = await self._swap(target, shadow, aliases, attack_types)
+        return {
+            "mode": "rebuild",
+            "collection": shadow,
+            "previous": previous,
+            "patterns": len(desired),
+            "carried_over": carried,
+            "replaced_points": len(existing)
+        }
+
+    async def _create_physical(self, collection_name: str, attack_types: List[str]):
+        """Create a plain collection with the target's settings (and payload indexes)"""
+        if self.qdrant.storage_layout == "unified":
+            await self.qdrant.ensure_unified_collection(collection_name)
+        else:
+            await self.qdrant.ensure_collection(collection_name, self.qdrant.settings_for(attack_types[0]))
+
+    async def _copy_points(self, source: str, destination: str) -> int:
+        """Copy points with their stored vectors (nothing is re-embedded)"""
+        copied = 0
+        offset = None
+        while True:
+            records, offset = await self.qdrant.client.scroll(
+                collection_name=source,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if records:
+                await self.qdrant.client.upsert(
+                    collection_name=destination,
+                    points=[
+                        PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+                        for record in records
+                    ]
+                )
+                copied += len(records)
+            if offset is None or not records:
+                return copied
+
+    async def _carry_over(self, source: str, shadow: str, desired_ids) -> int:
+        """Re-embed patterns of other packs from their stored text into the shadow collection"""
+        carried = 0
+        offset = None
+        other_packs = Filter(must_not=[FieldCondition(key="pattern_pack", match=MatchValue(value=self.pack))])
+        while True:
+            records, offset = await self.qdrant.client.scroll(
+                collection_name=source,
+                scroll_filter=other_packs,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            patterns = [
+                {
+                    "id": record.id,
+                    "text": record.payload["text"],
+                    "attack_type": record.payload["attack_type"],
+                    "metadata": {
+                        key: value for key, value in record.payload.items() if key not in DERIVED_FIELDS
+                    }
+                }
+                for record in records
+                if record.id not in desired_ids and record.payload and record.payload.get("text")
+            ]
+            if patterns:
+                await self._write(shadow, patterns)
+                carried += len(patterns)
+            if offset is None or not records:
+                return carried
+
+    async def _alias_points_to(self, alias: str, collection_name: str) -> Optional[bool]:
+        """Whether alias points at collection_name (None when Qdrant cannot tell)"""
+        try:
+            aliases = (await self.qdrant.client.get_aliases()).aliases
+        except Exception:
+            return None
+        return any(a.alias_name == alias and a.collection_name == collection_name for a in aliases)
+
+    async def _wait_until_indexed(self, collection_name: str):
+        deadline = time.monotonic() + self.index_timeout
+        while (await self.qdrant.client.get_collection(collection_name)).status != CollectionStatus.GREEN:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{collection_name} did not finish indexing within {self.index_timeout}s")
+            await asyncio.sleep(1.0)
+
+    async def _swap(self, alias: str, shadow: str, aliases: Dict[str, str], attack_types: List[str]) -> Optional[str]:
+        """
+        Point the live name at the shadow collection
+
+        Live names are created as aliases (EnhancedQdrantService.ensure_collection),
+        so this is normally one atomic alias switch. Deployments created before
+        that still have a plain collection under the live name. Qdrant does not
+        let an alias take a collection's name, so that collection is deleted
+        first. This is a one-time conversion, and searches in the gap are
+        reported as missing. The shadow already holds every pattern (verified
+        by _rebuild), and a failed alias call restores the plain collection
+        from it.
+
+        Returns:
+            The physical collection that was replaced (None when converting a plain collection)
+        """
+        client = self.qdrant.client
+        previous = aliases.get(alias)
+        operations = []
+        converted = False
+        if previous:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        elif await client.collection_exists(alias):
+            print(f"Converting collection {alias} to an alias (one-time, searches may miss for a moment)")
+            await client.delete_collection(alias)
+            converted = True
+        operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=shadow, alias_name=alias)))
+
+        # Delete + create in one request is applied atomically by Qdrant
+        try:
+            await client.update_collection_aliases(change_aliases_operations=operations)
+        except Exception as e:
+            applied = await self._alias_points_to(alias, shadow)
+            if applied is None:
+                # Qdrant unreachable: keep the shadow, it may be (or have to become) the live data
+                print(f"Alias {alias} -> {shadow} failed: {e}; kept {shadow}, re-run the sync")
+                raise
+            if not applied:
+                print(f"Alias {alias} -> {shadow} failed: {e}")
+                if converted:
+                    print(f"Restoring collection {alias} from {shadow}")
+                    await self._create_physical(alias, attack_types)
+                    await self._copy_points(shadow, alias)
+                await client.delete_collection(shadow)
+                raise
+            # The switch was applied; only its response was lost
+        print(f"Alias {alias} -> {shadow}")
+
+        if previous and not self.keep_old:
+            await client.delete_collection(previous)
+        return previous
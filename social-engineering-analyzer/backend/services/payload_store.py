@@ -0,0 +1,148 @@
+"""
+Payload Store - Compact in-process copy of attack pattern payloads
+Searches ask Qdrant for ids and scores only; pattern text and metadata are resolved here
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+import os
+import sys
+import time
+
+# Bookkeeping written by EnhancedQdrantService.pattern_point; not needed to answer searches
+INTERNAL_FIELDS = ("content_hash", "embedding_model", "schema_version")
+
+
+def public_payload(payload: Optional[Dict]) -> Dict:
+    """Payload as returned to callers, without INTERNAL_FIELDS"""
+    return {key: value for key, value in (payload or {}).items() if key not in INTERNAL_FIELDS}
+
+
+def _compact(value: Any) -> Any:
+    # Severities, tactics and the like repeat across thousands of patterns
+    if isinstance(value, str) and len(value) <= 64:
+        return sys.intern(value)
+    return value
+
+
+class PatternRecord:
+    """Text, attack type and metadata of one stored pattern"""
+
+    __slots__ = ("text", "attack_type", "fields")
+
+    def __init__(self, text: str, attack_type: str, fields: Tuple[Tuple[str, Any], ...] = ()):
+        self.text = text
+        self.attack_type = attack_type
+        self.fields = fields
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "PatternRecord":
+        return cls(
+            payload.get("text", ""),
+            _compact(payload.get("attack_type", "")),
+            tuple(
+                (sys.intern(key), _compact(value))
+                for key, value in payload.items()
+                if key not in ("text", "attack_type") and key not in INTERNAL_FIELDS
+            )
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "text":
+            return self.text
+        if key == "attack_type":
+            return self.attack_type
+        for name, value in self.fields:
+            if name == key:
+                return value
+        return default
+
+    def payload(self) -> Dict:
+        """Materialize the payload dict returned to callers"""
+        return {"text": self.text, "attack_type": self.attack_type, **dict(self.fields)}
+
+
+class PayloadStore:
+    """
+    Pattern payloads keyed by (attack type, point id)
+
+    Loaded by scrolling Qdrant without vectors during warm-up, updated on
+    pattern writes and reloaded every refresh_seconds (catches edits by other
+    processes). Hits whose id is unknown, e.g. patterns written by another
+    worker since the last reload, are fetched from Qdrant and added. Above
+    max_points the store deactivates itself and searches fetch payloads again.
+
+    ELI5: Qdrant tells us which page numbers match; we keep our own index card
+    for every page, so the whole page does not have to be mailed every time.
+    """
+
+    def __init__(self, max_points: int = 200000, refresh_seconds: float = 300.0):
+        """
+        Args:
+            max_points: Fetch payloads from Qdrant again when the pattern set is larger than this
+            refresh_seconds: Interval of the background full reload
+        """
+        self.max_points = max_points
+        self.refresh_seconds = refresh_seconds
+
+        self._records: Dict[Tuple[str, Any], PatternRecord] = {}
+        self.active = False
+        self.last_sync: Optional[float] = None
+
+        self.resolved = 0
+        self.fetched = 0
+        self.syncs = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["PayloadStore"]:
+        """Build from PAYLOAD_STORE_* environment variables (None when PAYLOAD_STORE=false)"""
+        if os.getenv("PAYLOAD_STORE", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            max_points=int(os.getenv("PAYLOAD_STORE_MAX_POINTS", "200000")),
+            refresh_seconds=float(os.getenv("PAYLOAD_STORE_REFRESH_SECONDS", "300"))
+        )
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def load(self, attack_type: str, records: Iterable):
+        """Replace every record of one attack type (records with .id and .payload)"""
+        loaded = {
+            (attack_type, record.id): PatternRecord.from_payload(record.payload or {})
+            for record in records
+        }
+        self._records = {
+            key: record for key, record in self._records.items() if key[0] != attack_type
+        }
+        self._records.update(loaded)
+
+    def finish_sync(self):
+        self.active = True
+        self.last_sync = time.time()
+        self.syncs += 1
+
+    def clear(self, total_points: int):
+        """Deactivate (the pattern set outgrew max_points)"""
+        if self.active or self._records:
+            print(f"Payload store disabled: {total_points} points > {self.max_points}")
+        self._records = {}
+        self.active = False
+
+    def put(self, attack_type: str, point_id, payload: Dict):
+        """Add or replace one record (pattern writes)"""
+        self._records[(attack_type, point_id)] = PatternRecord.from_payload(payload)
+
+    def get(self, attack_type: str, point_id) -> Optional[PatternRecord]:
+        return self._records.get((attack_type, point_id))
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": True,
+            "active": self.active,
+            "records": len(self._records),
+            "max_points": self.max_points,
+            "resolved": self.resolved,
+            "fetched": self.fetched,
+            "syncs": self.syncs,
+            "last_sync": self.last_sync
+        }
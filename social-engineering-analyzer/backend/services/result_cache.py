@@ -0,0 +1,127 @@
+"""
+Search Result Cache - Reuses Qdrant results for repeated identical searches
+TTL and size-bounded LRU, invalidated per attack type whenever patterns are written
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import struct
+import time
+
+
+class SearchResultCache:
+    """
+    Cache of per attack type search hits keyed by query vector and search parameters
+
+    Entries are stored per attack type so a write to one collection only
+    invalidates that collection's results. Invalidation is O(1): every attack
+    type has a generation counter that is bumped on write, and entries from an
+    older generation are treated as misses. A search that was already in flight
+    during a write stores its results under the old generation, so they are
+    never served.
+
+    The TTL bounds staleness for writes made by other processes.
+
+    ELI5: Remember the answer to a question you were just asked, but forget it
+    as soon as the library gets a new book on that shelf.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 300.0):
+        """
+        Args:
+            max_entries: Maximum cached (query, attack type) results
+            ttl_seconds: Maximum age of a cached result
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # (key, attack_type) -> (stored_at, generation, hits)
+        self._entries: "OrderedDict[Tuple[bytes, str], Tuple[float, int, List[Dict]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchResultCache"]:
+        """Build from SEARCH_CACHE_* environment variables (None when SEARCH_CACHE_SIZE=0)"""
+        max_entries = int(os.getenv("SEARCH_CACHE_SIZE", "5000"))
+        if max_entries <= 0:
+            return None
+        return cls(
+            max_entries=max_entries,
+            ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+        )
+
+    @staticmethod
+    def key(query_vector: List[float], limit: int, score_threshold: float) -> bytes:
+        """Hash of the query vector and the search parameters"""
+        digest = hashlib.blake2b(array("f", query_vector).tobytes(), digest_size=16)
+        digest.update(struct.pack(">id", limit, score_threshold))
+        return digest.digest()
+
+    def generation(self, attack_type: str) -> int:
+        return self._generations.get(attack_type, 0)
+
+    def get(self, key: bytes, attack_type: str) -> Optional[List[Dict]]:
+        """Cached hits, or None on a miss"""
+        entry = self._entries.get((key, attack_type))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, generation, hits = entry
+        if generation != self.generation(attack_type) or time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[(key, attack_type)]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end((key, attack_type))
+        self.hits += 1
+        return list(hits)
+
+    def put(self, key: bytes, attack_type: str, hits: List[Dict], generation: int):
+        """
+        Store hits for one attack type
+
+        Args:
+            generation: Generation read before the search started
+        """
+        if generation != self.generation(attack_type):
+            return
+        self._entries[(key, attack_type)] = (time.monotonic(), generation, list(hits))
+        self._entries.move_to_end((key, attack_type))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, attack_types: List[str]):
+        """Drop every cached result of the given attack types (called on pattern writes)"""
+        for attack_type in attack_types:
+            self._generations[attack_type] = self.generation(attack_type) + 1
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,146 @@
+"""
+Search Fan-out - Deadline-bounded concurrent collection searches with hedged retries
+Returns whatever finished before the deadline and records which attack types are missing
+"""
+
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import os
+
+
+class SearchResults(dict):
+    """
+    Dict mapping attack type to hits, plus the attack types that have no answer
+
+    `missing` lists attack types whose search failed, timed out or was still
+    running when the deadline expired. Their value in the dict is an empty list,
+    so callers that only iterate hits keep working unchanged.
+    """
+
+    def __init__(self, *args, missing: Optional[List[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.missing: List[str] = list(missing or [])
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing)
+
+
+class SearchLatencyTracker:
+    """
+    Rolling per-collection search latencies, used to decide when to hedge
+
+    Searches that time out or are cancelled (hedge losers, deadline expiry)
+    are recorded too, with their elapsed time capped at the deadline.
+    Recording only successes would hide exactly the slow tail the hedge delay
+    is meant to track.
+
+    ELI5: Remember how long each shop usually takes to answer the phone. If
+    one is taking longer than it almost ever does, call a second line too.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20, percentile: float = 0.95):
+        """
+        Args:
+            window: Latencies kept per collection
+            min_samples: Samples required before hedging a collection
+            percentile: Latency percentile after which a hedge fires
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_misses = 0
+        self.unfinished = 0
+
+    def record(self, collection_name: str, seconds: float, finished: bool = True):
+        """
+        Args:
+            seconds: Search duration (for unfinished searches, time until they were abandoned)
+            finished: False for timed-out or cancelled searches
+        """
+        if not finished:
+            self.unfinished += 1
+        self._latencies.setdefault(collection_name, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, collection_name: str, q: float) -> Optional[float]:
+        """Latency quantile in seconds (None until enough samples were recorded)"""
+        samples = self._latencies.get(collection_name)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, collection_name: str) -> Optional[float]:
+        """Seconds after which a duplicate search is sent (None = do not hedge)"""
+        return self.quantile(collection_name, self.percentile)
+
+    def stats(self) -> Dict:
+        collections = {}
+        for collection_name, samples in self._latencies.items():
+            p50 = self.quantile(collection_name, 0.5)
+            p95 = self.quantile(collection_name, 0.95)
+            collections[collection_name] = {
+                "samples": len(samples),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+            }
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadline_misses": self.deadline_misses,
+            "unfinished_searches": self.unfinished,
+            "collections": collections
+        }
+
+
+def hedging_from_env() -> bool:
+    return os.getenv("QDRANT_SEARCH_HEDGING", "false").lower() in ("1", "true", "yes")
+
+
+async def hedged(
+    call: Callable[[], Awaitable],
+    hedge_after: Optional[float],
+    tracker: Optional[SearchLatencyTracker] = None
+):
+    """
+    Await call(); if it has not finished after hedge_after seconds, start a
+    second identical call and return whichever succeeds first
+
+    The slower call is cancelled. An exception is only raised when every
+    started call failed.
+    """
+    primary = asyncio.create_task(call())
+    if hedge_after is None:
+        return await primary
+
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    if done:
+        return primary.result()
+
+    if tracker:
+        tracker.hedges += 1
+    backup = asyncio.create_task(call())
+    pending = {primary, backup}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup and tracker:
+                        tracker.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,243 @@
+"""
+Search Planner - Request-scoped merging of redundant Qdrant searches
+Collects every search a pipeline needs for the same text and runs their union once per collection
+"""
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+import asyncio
+
+from services.search_fanout import SearchResults
+
+if TYPE_CHECKING:
+    from services.enhanced_qdrant_service import EnhancedQdrantService
+
+
+class _PlannedText:
+    """Union of all searches planned for one query text"""
+
+    def __init__(self):
+        self.attack_types: List[str] = []
+        self.limit = 0
+        self.score_threshold = 1.0
+        self.vector: Optional[List[float]] = None
+        # attack_type -> (limit, score_threshold, hits) actually executed
+        self.executed: Dict[str, tuple] = {}
+        # Attack types whose last execution failed or missed the search deadline
+        self.missing = set()
+        self.lock = asyncio.Lock()
+
+
+class SearchPlanner:
+    """
+    Merges the searches of a single request
+
+    A pipeline first calls plan() for every search it is going to need, then
+    calls search() with the same arguments wherever it used to call
+    search_attack_patterns(). Searches on the same text share one embedding and
+    one Qdrant query per collection, run with the loosest threshold and the
+    largest limit; each caller gets its own results filtered back in memory.
+
+    Searches that were not planned still work: they are merged into the plan on
+    first use and only the collections not yet covered are queried.
+
+    ELI5: Instead of four people each walking to the library for the same book,
+    one person fetches it and photocopies the pages each of them needs.
+    """
+
+    def __init__(self, qdrant_service: "EnhancedQdrantService"):
+        self.qdrant = qdrant_service
+        self._texts: Dict[str, _PlannedText] = {}
+
+        # Counters to verify how much work the plan saved
+        self.searches_requested = 0
+        self.embeddings = 0
+        self.collection_queries = 0
+        self.reused = 0
+
+    def plan(
+        self,
+        query_text: str,
+        attack_types: Optional[List[str]] = None,
+        limit: int = 5,
+        score_threshold: float = 0.5
+    ):
+        """
+        Register a search that will be requested later in this pipeline
+
+        Args:
+            query_text: Text to analyze
+            attack_types: List of attack types to search (None = search all)
+            limit: Number of results per collection
+            score_threshold: Minimum similarity score
+        """
+        planned = self._texts.setdefault(query_text, _PlannedText())
+        for attack_type in attack_types or list(self.qdrant.collections.keys()):
+            if attack_type not in self.qdrant.collections:
+                raise ValueError(f"Unknown attack type: {attack_type}")
+            if attack_type not in planned.attack_types:
+                planned.attack_types.append(attack_type)
+        planned.limit = max(planned.limit, limit)
+        planned.score_threshold = min(planned.score_threshold, score_threshold)
+
+    async def search(
+        self,
+        query_text: str,
+        attack_types: Optional[List[str]] = None,
+        limit: int = 5,
+        score_threshold: float = 0.5
+    ) -> SearchResults:
+        """
+        Drop-in replacement for EnhancedQdrantService.search_attack_patterns
+
+        Returns:
+            SearchResults mapping attack type to list of similar patterns
+            (attack types without an answer are listed in `.missing`)
+        """
+        self.searches_requested += 1
+        self.plan(query_text, attack_types, limit, score_threshold)
+        planned = self._texts[query_text]
+
+        async with planned.lock:
+            await self._execute(query_text, planned)
+
+        requested_types = attack_types or list(self.qdrant.collections.keys())
+        results = SearchResults(missing=[
+            attack_type for attack_type in requested_types if attack_type in planned.missing
+        ])
+        for attack_type in requested_types:
+            hits = planned.executed[attack_type][2]
+            results[attack_type] = [
+                hit for hit in hits if hit["score"] >= score_threshold
+            ][:limit]
+        return results
+
+    def _is_long(self, query_text: str) -> bool:
+        return bool(self.qdrant.chunker and self.qdrant.chunker.is_long(query_text))
+
+    async def execute(self):
+        """
+        Run every planned search at once (batch requests)
+        
+        All texts without a vector are embedded in one encode call, and texts
+        sharing the same attack types, limit and threshold are searched with one
+        batched request per collection. Later search() calls are answered from memory.
+        """
+        # Long texts are searched window by window when first requested
+        pending = {
+            query_text: planned for query_text, planned in self._texts.items()
+            if not self._is_long(query_text) and any(not self._covers(planned.executed.get(attack_type), planned) for attack_type in planned.attack_types)
+        }
+        if not pending:
+            return
+        
+        unencoded = [query_text for query_text, planned in pending.items() if planned.vector is None]
+        if unencoded:
+            vectors = await self.qdrant.encode_texts_async(unencoded)
+            for query_text, vector in zip(unencoded, vectors):
+                self._texts[query_text].vector = vector
+            self.embeddings += len(unencoded)
+        
+        groups: Dict[tuple, List[str]] = {}
+        for query_text, planned in pending.items():
+            stale_types = tuple(
+                attack_type for attack_type in planned.attack_types
+                if not self._covers(planned.executed.get(attack_type), planned)
+            )
+            groups.setdefault((stale_types, planned.limit, planned.score_threshold), []).append(query_text)
+        
+        for (stale_types, limit, score_threshold), query_texts in groups.items():
+            batch = await self.qdrant.search_batch_by_vector(
+                [self._texts[query_text].vector for query_text in query_texts],
+                attack_types=list(stale_types),
+                limit=limit,
+                score_threshold=score_threshold
+            )
+            self.collection_queries += len(stale_types)
+            for query_text, results in zip(query_texts, batch):
+                self._record(self._texts[query_text], list(stale_types), results)
+    
+    async def _execute(self, query_text: str, planned: _PlannedText):
+        """Query every planned collection not yet covered by an earlier execution (lock held)"""
+        stale_types = [
+            attack_type for attack_type in planned.attack_types
+            if not self._covers(planned.executed.get(attack_type), planned)
+        ]
+        if not stale_types:
+            return
+
+        if self._is_long(query_text):
+            results = await self.qdrant.search_long_document(
+                query_text,
+                attack_types=stale_types,
+                limit=planned.limit,
+                score_threshold=planned.score_threshold
+            )
+            self.collection_queries += len(stale_types)
+            self._record(planned, stale_types, results)
+            return
+
+        if planned.vector is None:
+            planned.vector = await self.qdrant.encode_text_async(query_text)
+            self.embeddings += 1
+
+        results = await self.qdrant.search_by_vector(
+            planned.vector,
+            attack_types=stale_types,
+            limit=planned.limit,
+            score_threshold=planned.score_threshold
+        )
+        self.collection_queries += len(stale_types)
+        self._record(planned, stale_types, results)
+
+    @staticmethod
+    def _record(planned: _PlannedText, stale_types: List[str], results: Dict):
+        """Store executed results (and which attack types are missing) for a planned text"""
+        missing = set(getattr(results, "missing", []))
+        for attack_type in stale_types:
+            if attack_type in missing:
+                planned.missing.add(attack_type)
+            else:
+                planned.missing.discard(attack_type)
+            planned.executed[attack_type] = (
+                planned.limit,
+                planned.score_threshold,
+                results.get(attack_type, [])
+            )
+
+    @staticmethod
+    def _covers(executed: Optional[tuple], planned: _PlannedText) -> bool:
+        """Whether an executed search already answers the current union"""
+        if executed is None:
+            return False
+        executed_limit, executed_threshold, _ = executed
+        return executed_limit >= planned.limit and executed_threshold <= planned.score_threshold
+
+    def snapshot(self, query_text: str) -> Optional[Dict]:
+        """Executed searches of a text, for reuse by a near-duplicate (None if incomplete)"""
+        planned = self._texts.get(query_text)
+        if planned is None or planned.missing or not planned.executed:
+            return None
+        return dict(planned.executed)
+
+    def prime(self, query_text: str, executed: Dict):
+        """Answer searches on query_text from another text's snapshot instead of Qdrant"""
+        planned = self._texts.setdefault(query_text, _PlannedText())
+        # Searches the snapshot does not cover (larger limit, lower threshold) still run
+        planned.executed.update(executed)
+        self.reused += len(executed)
+
+    def missing_attack_types(self, query_texts: Optional[List[str]] = None) -> List[str]:
+        """Attack types left unanswered in the planned searches of these texts (None = all)"""
+        texts = self._texts.values() if query_texts is None else [
+            self._texts[query_text] for query_text in query_texts if query_text in self._texts
+        ]
+        return sorted(set().union(*(planned.missing for planned in texts)))
+
+    def stats(self) -> Dict:
+        """How many searches were requested versus actually executed"""
+        return {
+            "searches_requested": self.searches_requested,
+            "embeddings": self.embeddings,
+            "collection_queries": self.collection_queries,
+            "searches_reused": self.reused
+        }
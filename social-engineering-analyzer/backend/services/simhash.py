@@ -0,0 +1,269 @@
+"""
+SimHash - Near-duplicate detection for phishing campaign waves
+Fingerprints normalized messages and reuses the semantic search results of a near-identical earlier message
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+import hashlib
+import os
+import re
+import time
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+
+# Parts that change between copies of the same scam: links, addresses, amounts, codes
+_NORMALIZERS = [
+    (re.compile(r"https?://\S+|www\.\S+"), " url "),
+    (re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.]+\b"), " email "),
+    (re.compile(r"0x[a-fA-F0-9]{6,}"), " address "),
+    (re.compile(r"\d+(?:[.,]\d+)*"), " number ")
+]
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-cased tokens with links, e-mails, addresses and numbers replaced by placeholders"""
+    text = text.lower()
+    for pattern, placeholder in _NORMALIZERS:
+        text = pattern.sub(placeholder, text)
+    return _TOKEN.findall(text)
+
+
+def simhash(tokens: List[str]) -> int:
+    """
+    64-bit SimHash of a token list (one feature per word)
+
+    Messages that share most of their words get fingerprints that differ in
+    few bits, so one changed name moves the fingerprint only a little. Word
+    pairs are not used: they double the weight of every changed word, which
+    pushed copies of one scam further apart than distinct scams.
+    """
+    if not tokens:
+        return 0
+    digests = b"".join(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest() for token in tokens
+    )
+    # One row of 64 bits per word; a fingerprint bit is set when most words set it
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    majority = 2 * bits.sum(axis=0) > len(tokens)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateMatch(NamedTuple):
+    """A cached message close enough to reuse"""
+    cluster: str
+    distance: int
+    executed: Dict
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "cluster", "executed", "stored_at")
+
+    def __init__(self, fingerprint: int, cluster: str, executed: Dict):
+        self.fingerprint = fingerprint
+        self.cluster = cluster
+        self.executed = executed
+        self.stored_at = time.monotonic()
+
+
+class NearDuplicateCache:
+    """
+    Recent message fingerprints with the semantic search results of their message
+
+    A message whose fingerprint is within `radius` bits of a cached one reuses
+    that message's searches; only the cheap per-message checks (keywords,
+    addresses, spoof check) run again. Lookups use the pigeonhole principle:
+    the 64 bits are split into radius + 1 bands, and two fingerprints within
+    the radius agree exactly on at least one band, so only entries sharing a
+    band are compared.
+
+    Each cached message founds a campaign cluster; near-duplicate hits are
+    counted against it, so /metrics shows which waves are being absorbed.
+
+    Entries expire after ttl_seconds and are dropped whenever patterns are
+    written (see invalidate), like the search result cache.
+
+    ELI5: Scammers send the same letter a thousand times with a different
+    name at the top. Once we have read one, we recognise the rest at a glance
+    and only double-check the parts that change.
+    """
+
+    def __init__(
+        self,
+        radius: int = 6,
+        max_entries: int = 10000,
+        ttl_seconds: float = 600.0,
+        min_tokens: int = 8,
+        max_clusters: int = 1000
+    ):
+        """
+        Args:
+            radius: Largest Hamming distance treated as a near-duplicate
+            max_entries: Cached fingerprints (least recently used are evicted)
+            ttl_seconds: Maximum age of a cached entry
+            min_tokens: Shorter messages are never matched (too little text to tell apart)
+            max_clusters: Campaign clusters whose hit rates are tracked
+        """
+        if not 0 <= radius < FINGERPRINT_BITS:
+            raise ValueError(f"radius must be between 0 and {FINGERPRINT_BITS - 1}")
+        self.radius = radius
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.max_clusters = max_clusters
+
+        bands = radius + 1
+        self._bands = [
+            (FINGERPRINT_BITS * band // bands, FINGERPRINT_BITS * (band + 1) // bands)
+            for band in range(bands)
+        ]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._tables: List[Dict[int, set]] = [{} for _ in self._bands]
+        self._clusters: "OrderedDict[str, Dict]" = OrderedDict()
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["NearDuplicateCache"]:
+        """Build from NEAR_DUPLICATE_* environment variables (None when NEAR_DUPLICATE_CACHE=false)"""
+        if os.getenv("NEAR_DUPLICATE_CACHE", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            radius=int(os.getenv("NEAR_DUPLICATE_RADIUS", "6")),
+            max_entries=int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("NEAR_DUPLICATE_TTL_SECONDS", "600")),
+            min_tokens=int(os.getenv("NEAR_DUPLICATE_MIN_TOKENS", "8"))
+        )
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        """SimHash of normalized text (None when the text is too short to match safely)"""
+        tokens = normalize(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens)
+
+    def _band_keys(self, fingerprint: int):
+        for index, (start, end) in enumerate(self._bands):
+            yield index, fingerprint >> start & ((1 << (end - start)) - 1)
+
+    def find(self, fingerprint: Optional[int]) -> Optional[NearDuplicateMatch]:
+        """Closest live entry within the radius (does not count a hit or miss, see record)"""
+        if fingerprint is None:
+            return None
+        candidates = set()
+        for index, key in self._band_keys(fingerprint):
+            candidates.update(self._tables[index].get(key, ()))
+
+        best: Optional[_Entry] = None
+        best_distance = self.radius + 1
+        now = time.monotonic()
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if now - entry.stored_at > self.ttl_seconds:
+                self._remove(candidate)
+                continue
+            distance = hamming(fingerprint, candidate)
+            if distance < best_distance:
+                best, best_distance = entry, distance
+        if best is None:
+            return None
+        self._entries.move_to_end(best.fingerprint)
+        return NearDuplicateMatch(best.cluster, best_distance, best.executed)
+
+    def record(self, match: Optional[NearDuplicateMatch]):
+        """Count one analyzed message as a hit on match's cluster, or as a miss"""
+        if match is None:
+            self.misses += 1
+            return
+        self.hits += 1
+        cluster = self._clusters.get(match.cluster)
+        if cluster is not None:
+            cluster["hits"] += 1
+            cluster["messages"] += 1
+            cluster["last_seen"] = time.time()
+            self._clusters.move_to_end(match.cluster)
+
+    def add(self, fingerprint: Optional[int], executed: Dict, generation: int, sample: str = ""):
+        """
+        Cache the searches of a message that had no near-duplicate
+
+        Args:
+            executed: Planner snapshot of the message's searches (see SearchPlanner.snapshot)
+            generation: Generation read before the searches started (stale results are dropped)
+            sample: Message text shown for the cluster on /metrics
+        """
+        if fingerprint is None or not executed or generation != self.generation:
+            return
+        if fingerprint in self._entries:
+            self._remove(fingerprint)
+        cluster = f"{fingerprint:016x}"
+        self._entries[fingerprint] = _Entry(fingerprint, cluster, executed)
+        for index, key in self._band_keys(fingerprint):
+            self._tables[index].setdefault(key, set()).add(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+        if cluster not in self._clusters:
+            now = time.time()
+            self._clusters[cluster] = {
+                "messages": 1,
+                "hits": 0,
+                "first_seen": now,
+                "last_seen": now,
+                "sample": " ".join(sample.split())[:80]
+            }
+            while len(self._clusters) > self.max_clusters:
+                self._clusters.popitem(last=False)
+
+    def _remove(self, fingerprint: int):
+        self._entries.pop(fingerprint, None)
+        for index, key in self._band_keys(fingerprint):
+            members = self._tables[index].get(key)
+            if members is not None:
+                members.discard(fingerprint)
+                if not members:
+                    del self._tables[index][key]
+
+    def invalidate(self):
+        """Drop every cached entry (called on pattern writes); cluster counters are kept"""
+        self.generation += 1
+        self._entries.clear()
+        for table in self._tables:
+            table.clear()
+        self.invalidations += 1
+
+    def stats(self, top_clusters: int = 20) -> Dict:
+        total = self.hits + self.misses
+        clusters = sorted(self._clusters.items(), key=lambda item: item[1]["messages"], reverse=True)
+        return {
+            "enabled": True,
+            "radius": self.radius,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "clusters": [
+                {
+                    "cluster": cluster,
+                    **info,
+                    "hit_rate": round(info["hits"] / info["messages"], 4)
+                }
+                for cluster, info in clusters[:top_clusters]
+            ]
+        }
@@ -0,0 +1,61 @@
+"""
+Startup State - Tracks application startup phases for the readiness probe
+Records status and duration of each phase (model load, collections, warm-up)
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional
+import time
+
+
+class StartupState:
+    """
+    Startup phase timings shared by the warm-up task and the /ready endpoint
+
+    ELI5: A checklist the app fills in while it gets ready, with a stopwatch
+    next to every line.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases: Dict[str, Dict] = {}
+        self.ready = False
+        self.error: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup phase and record whether it succeeded"""
+        self.phases[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.phases[name] = {
+                "status": "failed",
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "error": str(e)
+            }
+            raise
+        self.phases[name] = {
+            "status": "done",
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    def record(self, name: str, duration_seconds: float):
+        """Record a phase that was timed elsewhere (e.g. module import)"""
+        self.phases[name] = {"status": "done", "duration_ms": round(duration_seconds * 1000, 1)}
+
+    def mark_ready(self):
+        self.ready = True
+
+    def mark_failed(self, error: str):
+        self.error = error
+
+    def status(self) -> Dict:
+        """Readiness summary for /ready"""
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "phases": self.phases,
+            "error": self.error
+        }
@@ -0,0 +1,229 @@
+"""
+Stream Scan - Bulk analysis of NDJSON message exports with flat memory
+Incremental line parsing, bounded micro-batch pipeline and one result line per message
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
+import asyncio
+import json
+import os
+import time
+
+if TYPE_CHECKING:
+    from services.enhanced_analyzer import EnhancedAnalyzerService
+
+# Longest accepted input line; longer lines are reported as errors and skipped
+MAX_LINE_BYTES = 1024 * 1024
+
+_DONE = object()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without buffering more than one line
+
+    Yields None in place of a line longer than max_line_bytes.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            if oversized:
+                oversized = False
+                yield None
+            else:
+                yield line
+        if len(buffer) > max_line_bytes:
+            # Drop the partial line; the rest of it is skipped up to the next newline
+            buffer = b""
+            oversized = True
+    if oversized:
+        yield None
+    elif buffer.strip():
+        yield buffer
+
+
+class StreamScanner:
+    """
+    Runs an NDJSON stream of messages through EnhancedAnalyzerService.analyze_batch
+
+    Three stages connected by bounded queues:
+
+        read lines -> [inbox] -> micro-batches (max_in_flight at once) -> [outbox] -> response
+
+    When the client reads results slowly the outbox fills, batches stop
+    starting, the inbox fills and the request body stops being read, so memory
+    stays flat whatever the size of the export. Results are emitted as soon as
+    their batch finishes (not necessarily in input order; every result carries
+    its input line number).
+
+    ELI5: A conveyor belt with small trays: if the end of the belt is full,
+    nobody puts new letters on the start of it.
+    """
+
+    def __init__(
+        self,
+        analyzer: "EnhancedAnalyzerService",
+        batch_size: int = 32,
+        max_in_flight: int = 4,
+        queue_size: int = 256,
+        charge: Optional[Callable[[int], Awaitable[int]]] = None
+    ):
+        """
+        Args:
+            analyzer: Analyzer providing analyze_batch
+            batch_size: Messages per micro-batch
+            max_in_flight: Micro-batches analyzed concurrently
+            queue_size: Capacity of the inbox and outbox queues (messages)
+            charge: Called with a batch size before it is analyzed; returns how many
+                messages were paid for. Only that prefix is analyzed, and a short
+                payment stops the scan
+        """
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.charge = charge
+
+    @classmethod
+    def from_env(cls, analyzer: "EnhancedAnalyzerService", **kwargs) -> "StreamScanner":
+        """Build from STREAM_* environment variables"""
+        return cls(
+            analyzer,
+            batch_size=int(os.getenv("STREAM_BATCH_SIZE", "32")),
+            max_in_flight=int(os.getenv("STREAM_MAX_IN_FLIGHT", "4")),
+            queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "256")),
+            **kwargs
+        )
+
+    @staticmethod
+    def _parse(line_number: int, line: Optional[bytes]) -> Dict:
+        """Item to analyze, or a result line carrying an error"""
+        if line is None:
+            return {"line": line_number, "error": f"Line longer than {MAX_LINE_BYTES} bytes"}
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return {"line": line_number, "error": f"Invalid JSON: {e}"}
+        if isinstance(record, str):
+            record = {"content": record}
+        if not isinstance(record, dict) or not isinstance(record.get("content"), str):
+            return {"line": line_number, "error": "Expected an object with a content string"}
+        return {
+            "line": line_number,
+            "id": record.get("id"),
+            "item": {
+                "content": record["content"],
+                "user_address": record.get("user_address"),
+                "known_addresses": record.get("known_addresses"),
+                "context": record.get("context")
+            }
+        }
+
+    async def scan(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Analyze an NDJSON byte stream
+
+        Yields:
+            One JSON line per input line ({"line", "id", "result"} or {"line", "error"}),
+            then a {"summary": ...} line
+        """
+        inbox: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        outbox: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        slots = asyncio.Semaphore(self.max_in_flight)
+        stopped = asyncio.Event()
+        in_flight = set()
+        summary = {"messages": 0, "analyzed": 0, "errors": 0, "stopped": None}
+        started = time.perf_counter()
+
+        async def read():
+            line_number = 0
+            try:
+                async for line in iter_lines(chunks):
+                    line_number += 1
+                    if stopped.is_set():
+                        break
+                    if line is not None and not line.strip():
+                        continue
+                    await inbox.put(self._parse(line_number, line))
+            except Exception as e:
+                summary["stopped"] = f"Upload failed: {e}"
+            # Not in a finally: a cancelled scan must not block on a full queue
+            await inbox.put(_DONE)
+
+        async def analyze(batch: List[Dict]):
+            try:
+                paid = await self.charge(len(batch)) if self.charge else len(batch)
+                batch, unpaid = batch[:paid], batch[paid:]
+                if unpaid and not stopped.is_set():
+                    stopped.set()
+                    summary["stopped"] = "Insufficient credits"
+                if batch:
+                    try:
+                        results = await self.analyzer.analyze_batch([entry["item"] for entry in batch])
+                    except Exception as e:
+                        print(f"Stream scan batch failed: {e}")
+                        results = None
+                        for entry in batch:
+                            await outbox.put({"line": entry["line"], "id": entry["id"], "error": str(e)})
+                    for entry, result in zip(batch, results or []):
+                        await outbox.put({"line": entry["line"], "id": entry["id"], "result": result})
+                for entry in unpaid:
+                    await outbox.put({"line": entry["line"], "id": entry["id"], "error": "Insufficient credits"})
+            finally:
+                slots.release()
+
+        async def dispatch():
+            finished = False
+            while not finished:
+                batch = []
+                entry = await inbox.get()
+                # Take what is already queued, up to batch_size; never wait for a full batch
+                while entry is not _DONE:
+                    if "error" in entry:
+                        await outbox.put(entry)
+                    else:
+                        batch.append(entry)
+                    if len(batch) >= self.batch_size or inbox.empty():
+                        break
+                    entry = inbox.get_nowait()
+                finished = entry is _DONE
+                if batch:
+                    await slots.acquire()
+                    task = asyncio.create_task(analyze(batch))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+            await outbox.put(_DONE)
+
+        reader = asyncio.create_task(read())
+        dispatcher = asyncio.create_task(dispatch())
+        try:
+            while True:
+                line = await outbox.get()
+                if line is _DONE:
+                    break
+                summary["messages"] += 1
+                if "error" in line:
+                    summary["errors"] += 1
+                else:
+                    summary["analyzed"] += 1
+                yield json.dumps(line, default=str) + "\n"
+
+            await reader
+            elapsed = time.perf_counter() - started
+            summary["seconds"] = round(elapsed, 2)
+            summary["messages_per_second"] = round(summary["analyzed"] / elapsed, 1) if elapsed else 0.0
+            yield json.dumps({"summary": summary}) + "\n"
+        finally:
+            # Client went away (or the scan ended): stop every stage
+            reader.cancel()
+            dispatcher.cancel()
+            for task in list(in_flight):
+                task.cancel()
@@ -0,0 +1,82 @@
+"""
+Bulk ingest tests: corrupt lines in a pattern pack are skipped, not fatal
+Runs without Qdrant or an embedding model (python -m pytest test_bulk_ingest.py)
+"""
+import asyncio
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.bulk_ingest import BulkIngestor, read_patterns
+
+
+class FakeClient:
+    def __init__(self):
+        self.points = []
+
+    async def upsert(self, collection_name, points, wait=True):
+        self.points.extend((collection_name, point) for point in points)
+
+
+class FakeQdrantService:
+    """The parts of EnhancedQdrantService the ingestor uses"""
+
+    def __init__(self):
+        self.client = FakeClient()
+        self.collections = {"sim_swapping": "sim_swapping_patterns", "general_phishing": "general_phishing_patterns"}
+        self.written = []
+
+    async def ensure_collections(self):
+        pass
+
+    async def encode_batch_async(self, texts):
+        return [[0.0] * 4 for _ in texts]
+
+    def collection_for(self, attack_type):
+        return self.collections[attack_type]
+
+    def pattern_point(self, pattern_id, text, attack_type, vector, metadata):
+        return {"id": pattern_id, "text": text, "attack_type": attack_type}
+
+    async def patterns_written(self, attack_types):
+        self.written.extend(attack_types)
+
+
+def write_pack(path):
+    lines = [
+        json.dumps({"id": 1, "text": "Your SIM will be ported today", "attack_type": "sim_swapping"}),
+        json.dumps({"id": 2, "text": "Verify your wallet now", "attack_type": "general_phishing"}),
+        '{"id": 3, "text": "truncated record',
+        "",
+        json.dumps({"id": 4, "text": "Call us to keep your number", "attack_type": "sim_swapping"}),
+        json.dumps({"id": 5, "text": "", "attack_type": "sim_swapping"})
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_read_patterns_yields_none_for_corrupt_line(tmp_path, capsys):
+    pack = tmp_path / "pack.jsonl"
+    write_pack(pack)
+
+    records = list(read_patterns(str(pack)))
+
+    assert [record and record["id"] for record in records] == [1, 2, None, 4, 5]
+    assert "line 3" in capsys.readouterr().out
+
+
+def test_ingest_skips_corrupt_line_and_continues(tmp_path):
+    pack = tmp_path / "pack.jsonl"
+    write_pack(pack)
+    qdrant = FakeQdrantService()
+    checkpoint = tmp_path / "pack.checkpoint.json"
+
+    report = asyncio.run(BulkIngestor(qdrant, batch_size=2, checkpoint_path=str(checkpoint)).ingest(str(pack)))
+
+    assert report["records"] == 5
+    assert report["ingested"] == 3
+    # The corrupt line and the empty-text record share the skipped counter
+    assert report["skipped"] == 2
+    assert sorted(point["id"] for _, point in qdrant.client.points) == [1, 2, 4]
+    assert json.loads(checkpoint.read_text())["offset"] == 5